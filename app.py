@@ -3,24 +3,25 @@
 
 import sys
 import os
+import time
 from google import genai
 
 # ---------------- CONFIG ---------------- #
 
-DOMAIN_COMPATIBILITY = {
-    "traffic": {"traffic", "transport"},
-    "transport": {"transport", "traffic"},
-    "water": {"water"},
-    "power": {"power"},
-    "weather": {"weather"}
-}
+from config import CACHE, CONTEXT, DOMAIN_COMPATIBILITY, GENERATION
 
 VALID_DOMAINS = set(DOMAIN_COMPATIBILITY.keys())
 
 # ---------------- IMPORTS ---------------- #
 
-from rag.retrieve import retrieve
-from rag.domain_detect import detect_domain
+from rag.encoder import encode_query
+from rag.retrieve import get_store, retrieve_routed, start_watcher
+from rag.domain_detect import domain_scores
+from rag.warmup import warm_up
+from rag.answer_cache import AnswerCache, cached_answer
+from rag.context_pack import pack_context
+from rag.streaming import RESET, GuardedStream
+from rag import tracing
 
 # ---------------- GEMINI SETUP ---------------- #
 
@@ -37,6 +38,11 @@ client = genai.Client(api_key=API_KEY)
 
 MODEL_NAME = "models/gemini-flash-latest"  # ✅ VERIFIED WORKING
 
+answer_cache = AnswerCache()
+
+# Print answers token by token as Gemini produces them (--no-stream to disable)
+STREAM = "--no-stream" not in sys.argv
+
 # ---------------- HELPERS ---------------- #
 
 def is_valid_question(query: str) -> bool:
@@ -45,14 +51,24 @@ def is_valid_question(query: str) -> bool:
 
 
 def filter_by_domain(docs, detected_domain):
-    allowed = DOMAIN_COMPATIBILITY.get(detected_domain, {detected_domain})
-    return [d for d in docs if d.get("domain") in allowed]
+    """Keeps docs compatible with the detected domain (or any of several routed domains)."""
+    routed = [detected_domain] if isinstance(detected_domain, str) else list(detected_domain)
+    allowed = set().union(*(DOMAIN_COMPATIBILITY.get(d, {d}) for d in routed))
+
+    with tracing.span("filter_by_domain"):
+        kept = [d for d in docs if d.get("domain") in allowed]
+
+    tracing.incr("docs_before_filter", len(docs))
+    tracing.incr("docs_after_filter", len(kept))
+    return kept
 
 
 # ---------------- PROMPT ---------------- #
 
 def build_prompt(query, docs):
-    context = "\n".join(f"- {d['text']}" for d in docs[:5])
+    with tracing.span("build_prompt"):
+        # Most relevant sentences within CONTEXT.prompt_token_budget
+        context = "\n".join(f"- {p}" for p in pack_context(query, docs).passages)
 
     return f"""
 You are a hyperlocal city update assistant for Tamil Nadu.
@@ -84,23 +100,45 @@ Answer now using the exact format above:
 
 # ---------------- ANSWER GENERATION ---------------- #
 
-def generate_answer(query, docs):
-    if not docs:
-        return "No relevant update found."
+GENERATION_CONFIG = {
+    "temperature": 0.5,
+    "top_p": 0.95,
+    "max_output_tokens": 180,
+}
 
+
+def passes_guardrails(answer):
+    # 🚨 HARD GUARDRAILS
+    return not (
+        len(answer.split()) < 5
+        or answer.lower().startswith(("bro", "enna", "anyone", "-"))
+    )
+
+
+def guardrail_verdict(partial, done):
+    """
+    Guardrails on a partial streamed answer: None until decidable.
+    Both checks are settled once 5 words have arrived.
+    """
+    if done or len(partial.split()) >= 5:
+        return passes_guardrails(partial.strip())
+    return None
+
+
+def ask_gemini(query, docs):
+    """
+    Returns Gemini's answer, or None if the call fails or the answer
+    trips the guardrails (callers then use summarize_fallback).
+    """
     prompt = build_prompt(query, docs)
 
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config={
-                "temperature": 0.5,
-                "top_p": 0.95,
-                "max_output_tokens": 180,
-  
-            }
-        )
+        with tracing.span("gemini"):
+            response = client.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=GENERATION_CONFIG,
+            )
 
         # 🔍 DEBUG (you can remove later)
         print("\n🔹 RAW GEMINI OUTPUT 🔹")
@@ -109,62 +147,182 @@ def generate_answer(query, docs):
 
         answer = (response.text or "").strip()
 
-        # 🚨 HARD GUARDRAILS
-        if (
-            len(answer.split()) < 5
-            or answer.lower().startswith(("bro", "enna", "anyone", "-"))
-        ):
-            return summarize_fallback(docs)
+        if not passes_guardrails(answer):
+            return None
 
         return answer
 
     except Exception as e:
         print("❌ Gemini error:", e)
-        return summarize_fallback(docs)
+        return None
+
+
+def generate_answer(query, docs, query_emb=None, detected_domain=None):
+    if not docs:
+        return "No relevant update found."
+
+    tracing.incr("answers")
+    if query_emb is None:
+        answer = ask_gemini(query, docs)
+    else:
+        # Near-identical questions over the same docs reuse the last answer
+        answer = cached_answer(
+            answer_cache,
+            query_emb,
+            detected_domain,
+            docs,
+            lambda: ask_gemini(query, docs),
+            version=get_store().version,
+        )
+
+    return answer or offline_answer(query, docs)
+
+
+def stream_gemini(query, docs):
+    """Yields Gemini's answer text as it is generated."""
+    prompt = build_prompt(query, docs)
+
+    with tracing.span("gemini_stream"):
+        start = time.perf_counter()
+        first = True
+
+        for chunk in client.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=prompt,
+            config=GENERATION_CONFIG,
+        ):
+            if first:
+                tracing.observe("gemini_first_token", time.perf_counter() - start)
+                first = False
+            yield chunk.text or ""
+
+
+def generate_answer_stream(query, docs, query_emb=None, detected_domain=None):
+    """
+    Streaming twin of generate_answer: yields text deltas, or RESET when the
+    text shown so far must be replaced (mid-stream error -> fallback).
+    """
+    if not docs:
+        yield "No relevant update found."
+        return
+
+    tracing.incr("answers")
+    use_cache = CACHE.enabled and query_emb is not None
+    if use_cache:
+        key = answer_cache.make_key(detected_domain, docs)
+        version = get_store().version
+        answer = answer_cache.get(query_emb, key, version=version)
+        if answer is not None:
+            yield answer
+            return
+
+    stream = GuardedStream(
+        stream_gemini(query, docs),
+        guardrail_verdict,
+        lambda: offline_answer(query, docs),
+    )
+    yield from stream
+
+    if use_cache and not stream.fell_back:
+        answer_cache.put(query_emb, key, stream.text.strip(), version=version)
+
+
+def print_stream(deltas):
+    for delta in deltas:
+        if delta is RESET:
+            print("\n[stream interrupted, showing summary]\n", flush=True)
+            continue
+        print(delta, end="", flush=True)
+    print("\n")
 
 
 def summarize_fallback(docs):
+    tracing.incr("fallbacks")
     texts = [d["text"] for d in docs[:2]]
     return " ".join(texts)
 
 
+def offline_answer(query, docs):
+    """
+    Answer when Gemini failed or tripped the guardrails: the local flan-t5
+    engine (rag/generate.py) if GENERATION.local_fallback, else (or if that
+    fails too) the extractive summary.
+    """
+    if GENERATION.local_fallback:
+        from rag.generate import generate_answer as local_generate
+
+        try:
+            packed = pack_context(query, docs, budget=CONTEXT.local_token_budget)
+            answer = local_generate("\n".join(packed.passages), query).strip()
+            if passes_guardrails(answer):
+                tracing.incr("local_answers")
+                return answer
+        except Exception as e:
+            print("❌ Local generator error:", e)
+
+    return summarize_fallback(docs)
+
+
 
 # ---------------- MAIN LOOP ---------------- #
 
+def answer_query(query):
+    # Encode once; domain detection and retrieval share the embedding.
+    query_emb = encode_query(query)
+
+    # Every domain above the routing threshold is searched, best first
+    routed = domain_scores(query_emb).routed()
+    detected_domain = next(iter(routed))
+    print("Detected domains:", ", ".join(f"{d} ({p:.2f})" for d, p in routed.items()))
+    print("Allowed domains:", set().union(*(DOMAIN_COMPATIBILITY.get(d, {d}) for d in routed)))
+
+    if detected_domain not in VALID_DOMAINS:
+        print("\nAnswer:\n No relevant update found.\n")
+        return
+
+    docs = retrieve_routed(query_emb, routed, k=8)
+    docs = filter_by_domain(docs, routed)
+
+    print("Docs after filtering:", len(docs))
+    tracing.annotate(domain=detected_domain, domains=list(routed), docs=len(docs))
+
+    print("\n--- FINAL CONTEXT ---")
+    for d in docs[:5]:
+        print("-", d["text"])
+    print("---------------------")
+
+    if STREAM:
+        print("\nAnswer:")
+        print_stream(generate_answer_stream(query, docs, query_emb, detected_domain))
+    else:
+        answer = generate_answer(query, docs, query_emb, detected_domain)
+        print("\nAnswer:\n", answer, "\n")
+
+
 def main():
     print("Tamil–English Code-Switched RAG")
     print("Type 'exit' to quit\n")
 
+    # Load LaBSE + FAISS now so the first question is not slowed by cold start
+    cold_start = warm_up(include_generator=GENERATION.local_fallback)
+    start_watcher()
+    print(f"Cold start: {cold_start['total']:.2f}s "
+          + ", ".join(f"{k}={v:.2f}s" for k, v in cold_start.items() if k != "total")
+          + "\n")
+
     while True:
         query = input("Ask (or type exit): ").strip()
 
         if query.lower() == "exit":
+            print("Answer cache:", answer_cache.stats())
             sys.exit(0)
 
         if not is_valid_question(query):
             print("\nAnswer:\n Ask a clear, meaningful question.\n")
             continue
 
-        detected_domain = detect_domain(query)
-        print("Detected domain:", detected_domain)
-        print("Allowed domains:", DOMAIN_COMPATIBILITY.get(detected_domain))
-
-        if detected_domain not in VALID_DOMAINS:
-            print("\nAnswer:\n No relevant update found.\n")
-            continue
-
-        docs = retrieve(query, k=8)
-        docs = filter_by_domain(docs, detected_domain)
-
-        print("Docs after filtering:", len(docs))
-
-        print("\n--- FINAL CONTEXT ---")
-        for d in docs[:5]:
-            print("-", d["text"])
-        print("---------------------")
-
-        answer = generate_answer(query, docs)
-        print("\nAnswer:\n", answer, "\n")
+        with tracing.trace("query", query=query):
+            answer_query(query)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+"""
+Recall vs latency of approximate FAISS index types on synthetic corpora.
+
+For each corpus size, builds the exact flat index as ground truth and then
+each approximate type from embeddings/vector_store.make_index, and reports:
+- build (train + add) time
+- recall@k against the flat index
+- p50 / p99 single-query latency
+
+Usage (from project root):
+    python benchmarks/ann_benchmark.py --sizes 10000 100000 1000000
+    python benchmarks/ann_benchmark.py --types hnsw --ef-search 32 64 128
+    python benchmarks/ann_benchmark.py --dim 64 --pq-m 16
+
+Note: 1M x 768-d float32 vectors need ~3 GB RAM for the corpus alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import INDEX
+from embeddings.vector_store import make_index, set_search_params, train_index
+
+# Below this corpus size IVF-PQ is not meaningful: training 2^pq_nbits centroids
+# per sub-quantizer dominates the build, the PQ codes limit recall, and the
+# memory it saves is small
+PQ_MIN_VECTORS = 100_000
+
+
+# ------------------ SYNTHETIC DATA ------------------ #
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x
+
+
+def synthetic_corpus(n: int, d: int, *, n_clusters: int = 256, spread: float = 2.0, seed: int = 0) -> np.ndarray:
+    """
+    Clustered unit vectors: real sentence embeddings are far from uniform,
+    and uniform random data makes IVF look much worse than it is.
+    """
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((n_clusters, d)).astype(np.float32))
+    x = np.empty((n, d), dtype=np.float32)
+
+    # Generate in blocks to keep peak memory close to the corpus itself
+    block = 100_000
+    for start in range(0, n, block):
+        m = min(block, n - start)
+        labels = rng.integers(0, n_clusters, m)
+        noise = rng.standard_normal((m, d)).astype(np.float32) * (spread / np.sqrt(d))
+        x[start : start + m] = centers[labels] + noise
+    return _normalize(x)
+
+
+def synthetic_queries(corpus: np.ndarray, nq: int, *, spread: float = 1.0, seed: int = 1) -> np.ndarray:
+    """Queries are noisy copies of random corpus vectors."""
+    rng = np.random.default_rng(seed)
+    base = corpus[rng.integers(0, len(corpus), nq)]
+    noise = rng.standard_normal(base.shape).astype(np.float32) * (spread / np.sqrt(corpus.shape[1]))
+    return _normalize(base + noise)
+
+
+def default_pq_m(d: int) -> int:
+    """Largest divisor of d that is at most config.Index.pq_m."""
+    return max(m for m in range(1, min(INDEX.pq_m, d) + 1) if d % m == 0)
+
+
+# ------------------ MEASUREMENT ------------------ #
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray) -> float:
+    k = exact_ids.shape[1]
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx_ids, exact_ids))
+    return hits / (len(exact_ids) * k)
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int, threads: int) -> tuple[np.ndarray, np.ndarray]:
+    """Searches one query at a time (the serving pattern); returns ids and per-query ms."""
+    build_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(threads)
+
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    lat = np.empty(len(queries), dtype=np.float64)
+
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, I = index.search(queries[i : i + 1], k)
+        lat[i] = (time.perf_counter() - t0) * 1000
+        ids[i] = I[0]
+
+    faiss.omp_set_num_threads(build_threads)
+    return ids, lat
+
+
+def _report(name: str, build_s: float, recall: float, lat: np.ndarray) -> None:
+    print(
+        f"  {name:<28} build={build_s:7.2f}s  recall={recall:.3f}  "
+        f"p50={np.percentile(lat, 50):7.3f}ms  p99={np.percentile(lat, 99):7.3f}ms"
+    )
+
+
+def bench_size(n: int, args: argparse.Namespace) -> None:
+    print(f"\n=== n={n:,} d={args.dim} k={args.k} queries={args.queries} ===")
+    corpus = synthetic_corpus(n, args.dim)
+    queries = synthetic_queries(corpus, args.queries)
+
+    t0 = time.perf_counter()
+    flat = faiss.IndexFlatIP(args.dim)
+    flat.add(corpus)
+    flat_build = time.perf_counter() - t0
+
+    exact_ids, flat_lat = timed_search(flat, queries, args.k, args.threads)
+    _report("flat (exact)", flat_build, 1.0, flat_lat)
+
+    for kind in args.types:
+        params = replace(INDEX, index_type=kind, min_vectors_for_ann=0, pq_m=args.pq_m)
+        if kind == "ivf_pq" and n < PQ_MIN_VECTORS:
+            print(
+                f"  note: ivf_pq is meant for {PQ_MIN_VECTORS:,}+ vectors; at n={n:,} PQ training dominates "
+                f"its build and the PQ{args.pq_m} codes limit recall (use flat or ivf_flat)"
+            )
+
+        t0 = time.perf_counter()
+        index = make_index(args.dim, n, params)
+        train_index(index, corpus, params)
+        index.add(corpus)
+        build_s = time.perf_counter() - t0
+
+        if kind == "hnsw":
+            sweep = [("efSearch", v, replace(params, hnsw_ef_search=v)) for v in args.ef_search]
+        else:
+            sweep = [("nprobe", v, replace(params, nprobe=v)) for v in args.nprobe]
+
+        for knob, value, p in sweep:
+            set_search_params(index, p)
+            ids, lat = timed_search(index, queries, args.k, args.threads)
+            _report(f"{kind} {knob}={value}", build_s, recall_at_k(ids, exact_ids), lat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "hnsw", "ivf_pq"],
+                        choices=["ivf_flat", "hnsw", "ivf_pq"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--pq-m", type=int, default=None,
+                        help="ivf_pq sub-quantizers; must divide --dim (default: largest divisor <= Index.pq_m)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="FAISS OpenMP threads while searching (1 mirrors one query per worker)")
+    args = parser.parse_args()
+    if args.pq_m is None:
+        args.pq_m = default_pq_m(args.dim)
+    elif args.dim % args.pq_m:
+        parser.error(f"--pq-m {args.pq_m} must divide --dim {args.dim}")
+
+    for n in args.sizes:
+        bench_size(n, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Throughput of the batched query API vs the single-query path.
+
+Replays a query set through detect_domain + retrieve one query at a time,
+then through detect_domain_batch + retrieve_batch, and reports queries/sec
+for each (models and index are warmed up first, so cold start is excluded).
+
+Usage (from project root):
+    python benchmarks/batch_benchmark.py --queries 2000 --batch-size 64
+    python benchmarks/batch_benchmark.py --query-file my_queries.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import MODELS
+from rag.domain_detect import detect_domain, detect_domain_batch
+from rag.encoder import encode_query
+from rag.retrieve import retrieve, retrieve_batch
+from rag.warmup import warm_up
+
+SAMPLE_QUERIES = [
+    "gandhipuram route la traffic irukka?",
+    "iniku night power cut irukka anna nagar la?",
+    "chennai la rain situation epdi irukku?",
+    "kovai la perundhu strike iniku?",
+    "saibaba colony la thanni varala, enna problem?",
+    "கோவையில் இன்று மின்தடை உள்ளதா?",
+    "avinashi road la accident nala jam ah?",
+    "metro train delay irukka today?",
+    "ukkadam la pipeline work eppo mudiyum?",
+    "cyclone warning coimbatore ku irukka?",
+]
+
+
+def load_queries(args: argparse.Namespace) -> list[str]:
+    if args.query_file:
+        with open(args.query_file, encoding="utf-8") as f:
+            base = [line.strip() for line in f if line.strip()]
+    else:
+        base = SAMPLE_QUERIES
+
+    # Repeat the base set up to --queries, varying the text so no layer can cache
+    return [f"{base[i % len(base)]} #{i}" for i in range(args.queries)]
+
+
+def run_single(queries: list[str], k: int) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        query_emb = encode_query(q)
+        retrieve(query_emb, k=k, domain=detect_domain(query_emb))
+    return time.perf_counter() - t0
+
+
+def run_batch(queries: list[str], k: int, batch_size: int) -> float:
+    t0 = time.perf_counter()
+    for start in range(0, len(queries), batch_size):
+        chunk = queries[start : start + batch_size]
+        domains = detect_domain_batch(chunk, batch_size=batch_size)
+        retrieve_batch(chunk, k=k, domains=domains, batch_size=batch_size)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--query-file", type=str, default=None, help="one query per line")
+    parser.add_argument("--batch-size", type=int, default=MODELS.encode_batch_size)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    cold = warm_up()
+    print(f"Cold start: {cold['total']:.2f}s (excluded)")
+
+    queries = load_queries(args)
+
+    single_s = run_single(queries, args.k)
+    batch_s = run_batch(queries, args.k, args.batch_size)
+
+    n = len(queries)
+    print(f"single : {n / single_s:8.1f} q/s  ({single_s:.2f}s for {n} queries)")
+    print(f"batch  : {n / batch_s:8.1f} q/s  ({batch_s:.2f}s, batch_size={args.batch_size})")
+    print(f"speedup: {single_s / batch_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
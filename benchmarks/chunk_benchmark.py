@@ -0,0 +1,143 @@
+"""
+Chunker throughput and chunk quality: fixed word windows vs the sentence-
+and script-aware chunker (ingest/chunk.py).
+
+Runs the cleaned data/raw records, plus "articles" (the records of each
+domain joined into documents of --article-words words, as long news
+items are), through:
+- words:     the previous chunker: 200-word windows, 50-word overlap,
+             each window rebuilt with " ".join
+- sentences: chunk_spans: whole sentences up to 200 words, whole-sentence
+             overlap of at most 50 words, char offsets into the record
+
+Reports per chunker and corpus:
+- chunks and throughput (MB of record text per second, best of --repeat)
+- cut: share of chunks that end mid-sentence
+- dup: words repeated by the overlap, as a share of the record words
+- meta KB: text blob + offsets written by the metadata store (adjacent
+  chunks of one record share their overlap there when offsets are known)
+
+Usage (from project root):
+    python benchmarks/chunk_benchmark.py
+    python benchmarks/chunk_benchmark.py --article-words 1200 --copies 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from embeddings.meta_store import write_meta_store
+from ingest.build_corpus import list_raw_files
+from ingest.chunk import CHUNK_WORDS, OVERLAP_WORDS, chunk_words, iter_chunks, sentence_spans
+from ingest.stream import iter_cleaned_dicts
+from rag.tokens import count_tokens
+
+
+def articles(records: list[dict], words: int) -> list[dict]:
+    """Same-domain records joined into documents of about `words` words."""
+    by_domain = defaultdict(list)
+    for r in records:
+        by_domain[r.get("domain")].append(r["text"].rstrip(".") + ".")
+
+    docs = []
+    for domain, texts in sorted(by_domain.items(), key=lambda kv: str(kv[0])):
+        current: list[str] = []
+        for text in texts:
+            current.append(text)
+            if sum(len(t.split()) for t in current) >= words:
+                docs.append({"doc_id": f"article-{len(docs)}", "text": " ".join(current), "domain": domain, "source": "news"})
+                current = []
+    return docs
+
+
+def word_chunks(docs: list[dict]) -> list[dict]:
+    """The previous chunker (no offsets); token counts as iter_chunks stores them."""
+    out = []
+    for doc in docs:
+        windows = chunk_words((doc.get("text") or "").split(), chunk_words=CHUNK_WORDS, overlap_words=OVERLAP_WORDS)
+        for j, window in enumerate(windows):
+            text = " ".join(window)
+            out.append({"doc_id": doc.get("doc_id") or "", "chunk_id": f"{doc.get('doc_id')}#c{j}", "text": text, "n_tokens": count_tokens(text)})
+    return out
+
+
+def sentence_chunks(docs: list[dict]) -> list[dict]:
+    return list(iter_chunks(docs))
+
+
+def measure(chunker, docs: list[dict], repeat: int) -> dict:
+    mb = sum(len(d["text"].encode("utf-8")) for d in docs) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        chunks = chunker(docs)
+        best = min(best, time.perf_counter() - t0)
+
+    ends = {d["doc_id"]: {int(e) for _, e in sentence_spans(d["text"])} for d in docs}
+    texts = {d["doc_id"]: d["text"] for d in docs}
+    cut = []
+    for c in chunks:
+        # Word chunks have no offsets; find the chunk in the record (windows are in order)
+        text = texts[c["doc_id"]]
+        end = c.get("char_end")
+        if end is None:
+            end = text.find(c["text"]) + len(c["text"])
+        cut.append(end not in ends[c["doc_id"]])
+
+    doc_words = sum(len(d["text"].split()) for d in docs)
+    chunk_words_total = sum(len(c["text"].split()) for c in chunks)
+
+    with tempfile.TemporaryDirectory(prefix="rag-chunk-") as tmp:
+        root = Path(tmp)
+        write_meta_store(chunks, root)
+        text_files = [p for p in root.iterdir() if p.name.startswith("text")]
+        meta_kb = sum(p.stat().st_size for p in text_files) / 1e3
+
+    return {
+        "chunks": len(chunks),
+        "mb_s": mb / best if best else 0.0,
+        "cut": float(np.mean(cut)) if cut else 0.0,
+        "dup": chunk_words_total / doc_words - 1 if doc_words else 0.0,
+        "meta_kb": meta_kb,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--article-words", type=int, default=800, help="words per synthetic article")
+    parser.add_argument("--copies", type=int, default=20, help="times the record set is repeated (throughput)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = [r for r in iter_cleaned_dicts(list_raw_files()) if r.get("text")]
+    corpora = {
+        "records": records,
+        "articles": articles(records, args.article_words),
+    }
+
+    print(f"{len(records)} records, {len(corpora['articles'])} articles of ~{args.article_words} words, x{args.copies}\n")
+    print(f"{'corpus':<10}{'chunker':<11}{'chunks':>8}{'MB/s':>8}{'cut':>7}{'dup':>7}{'meta KB':>10}")
+    for name, docs in corpora.items():
+        docs = [dict(d, doc_id=f"{d['doc_id']}~{i}") for i in range(args.copies) for d in docs]
+        for label, chunker in [("words", word_chunks), ("sentences", sentence_chunks)]:
+            r = measure(chunker, docs, args.repeat)
+            print(
+                f"{name:<10}{label:<11}{r['chunks']:>8}{r['mb_s']:>8.1f}{r['cut']:>7.1%}{r['dup']:>7.1%}"
+                f"{r['meta_kb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Memory saved vs recall lost by PCA / OPQ projection and SQ / PQ codecs.
+
+Builds the data/raw corpus (scaled synthetically, as in e2e_benchmark.py)
+once per compression setting with IndexWriter, then searches it with the
+Tanglish + Tamil-script domain query set and reports, against the
+uncompressed float32 index:
+- index bytes on disk / in RAM (main + per-domain indexes + projection)
+- bytes per vector and memory saved
+- recall@k of the top-k source chunks (a synthetic copy counts as the
+  chunk it was made from, so near-tied copies do not skew the number)
+- p50 search latency per query
+- stream: whether the same config fed in batches of --stream-batch with no
+  expected size (as ingest/stream.py does) gives the same index type and
+  size as the one-shot build (SQ / PQ codes must be trained on the
+  training sample, not on the first batch)
+
+Usage (from project root):
+    python benchmarks/compression_benchmark.py --scale 50
+    python benchmarks/compression_benchmark.py --configs sq8 pca256_sq8 opq256_pq32 --k 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import QUERIES, base_chunks, iter_scaled
+from config import INDEX, MODELS
+import faiss
+
+from embeddings.vector_store import IndexFiles, IndexWriter, load
+from ingest.stream import batched
+
+# name -> overrides of config.Index
+CONFIGS = {
+    "float32": {},
+    "fp16": {"codec": "fp16"},
+    "sq8": {"codec": "sq8"},
+    "sq4": {"codec": "sq4"},
+    "pq96": {"codec": "pq", "pq_m": 96},
+    "pca256": {"projection": "pca", "projection_dim": 256},
+    "pca256_sq8": {"projection": "pca", "projection_dim": 256, "codec": "sq8"},
+    "pca128_sq8": {"projection": "pca", "projection_dim": 128, "codec": "sq8"},
+    "opq256_pq32": {"projection": "opq", "projection_dim": 256, "codec": "pq", "pq_m": 32},
+}
+
+
+def index_bytes(files: IndexFiles) -> int:
+    paths = [files.faiss_index, files.projection, *files.domain_dir.glob("*.faiss")]
+    return sum(p.stat().st_size for p in paths if p.exists())
+
+
+def build(root: Path, chunks, vectors, scale: int, params, batch_size: int = 4096, sized: bool = True) -> int:
+    expected = len(chunks) * scale if sized else 0
+    with IndexWriter(expected_size=expected, root=root, params=params) as writer:
+        for batch in batched(iter_scaled(chunks, vectors, scale), batch_size):
+            writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+    return writer.count
+
+
+def index_type(files: IndexFiles) -> str:
+    return type(faiss.downcast_index(faiss.read_index(str(files.faiss_index)))).__name__
+
+
+def search(store, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    latencies = []
+    ids = []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, row = store.index.search(store.project(q.reshape(1, -1)), k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids.append(row[0])
+    return np.stack(ids), float(np.percentile(latencies, 50))
+
+
+def recall(ref: np.ndarray, got: np.ndarray, n_base: int) -> float:
+    # iter_scaled emits copy after copy of the base corpus: row % n_base is the source chunk
+    scores = []
+    for a, b in zip(ref % n_base, got % n_base):
+        a = set(a.tolist())
+        scores.append(len(a & set(b.tolist())) / len(a))
+    return float(np.mean(scores))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=50, help="synthetic copies of the data/raw corpus")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--stream-batch", type=int, default=64, help="batch size of the streamed build")
+    args = parser.parse_args()
+
+    from rag.encoder import encode_texts
+
+    chunks = base_chunks()
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    queries = encode_texts(QUERIES)
+
+    names = ["float32"] + [c for c in args.configs if c != "float32"]
+    rows = []
+
+    with tempfile.TemporaryDirectory(prefix="rag-compress-") as tmp:
+        for name in names:
+            params = replace(INDEX, **CONFIGS[name])
+            root = Path(tmp) / name
+            n = build(root, chunks, vectors, args.scale, params)
+
+            store = load(root)
+            ids, p50 = search(store, queries, args.k)
+
+            files = IndexFiles(root)
+            streamed = IndexFiles(Path(tmp) / f"{name}-stream")
+            build(streamed.root, chunks, vectors, args.scale, params, batch_size=args.stream_batch, sized=False)
+            kind = index_type(files)
+            same = kind == index_type(streamed) and index_bytes(files) == index_bytes(streamed)
+            stream = "same" if same else f"{index_type(streamed)} {index_bytes(streamed) / 2**20:.2f}MB"
+            rows.append((name, n, index_bytes(files), ids, p50, kind, stream))
+
+    base_bytes, base_ids = rows[0][2], rows[0][3]
+    print(f"{rows[0][1]} vectors (data/raw x{args.scale}), {len(QUERIES)} queries, recall@{args.k} vs float32\n")
+    print(f"{'config':<14}{'index':<24}{'MB':>9}{'B/vec':>8}{'saved':>8}{'recall':>8}{'p50 ms':>8}  stream")
+    for name, n, size, ids, p50, kind, stream in rows:
+        print(
+            f"{name:<14}{kind:<24}{size / 2**20:>9.2f}{size / n:>8.0f}{1 - size / base_bytes:>8.1%}"
+            f"{recall(base_ids, ids, len(chunks)):>8.3f}{p50:>8.2f}  {stream}"
+        )
+
+    print("\nMB counts the main index, per-domain sub-indexes and projection (all loaded into RAM).")
+
+
+if __name__ == "__main__":
+    main()
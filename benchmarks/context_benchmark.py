@@ -0,0 +1,175 @@
+"""
+Prompt context size and content: docs[:5] vs token-budgeted packing
+(rag/context_pack.py).
+
+Builds a temporary index from data/raw plus "long" documents (the posts
+of each domain joined into documents of --long-words words, as in
+chunk_benchmark.py, chunked into overlapping windows), replays the labeled
+and multi-domain query sets of routing_benchmark.py through
+retrieve_routed, and builds each query's context three ways:
+- docs[:5]: the previous build_prompt (every doc's full text)
+- packed:   pack_context at CONTEXT.prompt_token_budget (Gemini prompt)
+- local:    pack_context at CONTEXT.local_token_budget (flan-t5 prompt)
+
+Reports per mode:
+- mean / p99 context tokens (rag/tokens.py estimate)
+- over: share of contexts above the flan-t5 budget (these were cut off at
+  GENERATION.max_input_tokens before, wherever the cut fell)
+- repeated words from overlapping windows of one document
+- recall: share of the query terms found in docs[:5] that the context keeps
+- p50 / p99 microseconds to build the context
+
+With --tokenizer, the estimate is compared to the flan-t5 tokenizer's real
+counts (needs transformers); the estimate should not fall below them.
+
+Usage (from project root):
+    python benchmarks/context_benchmark.py
+    python benchmarks/context_benchmark.py --budget 300 --long-words 600 --tokenizer
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.chunk_benchmark import articles
+from benchmarks.domain_benchmark import LABELED_QUERIES
+from benchmarks.e2e_benchmark import base_chunks
+from benchmarks.routing_benchmark import MULTI_DOMAIN_QUERIES
+from config import CONTEXT, MODELS
+from embeddings.vector_store import IndexWriter
+from ingest.chunk import iter_chunks
+from ingest.stream import batched
+
+
+def repeated_words(docs) -> int:
+    """Words shared by adjacent windows of the same document among `docs`."""
+    from rag.context_pack import _overlap, _window
+
+    windows = {(d.get("doc_id"), _window(d)): d["text"].split() for d in docs if _window(d) is not None}
+    return sum(
+        _overlap(words, windows[(doc_id, j + 1)])
+        for (doc_id, j), words in windows.items()
+        if (doc_id, j + 1) in windows
+    )
+
+
+def run(mode: str, queries, retrieved) -> dict:
+    import rag.context_pack as cp
+    from rag.tokens import count_tokens
+
+    tokens, over, repeats, recall, micros, contexts = [], [], [], [], [], []
+    for (text, _), docs in zip(queries, retrieved):
+        t0 = time.perf_counter()
+        if mode == "docs[:5]":
+            passages = [d["text"] for d in docs[:5]]
+        else:
+            budget = cp.CONTEXT.prompt_token_budget if mode == "packed" else cp.CONTEXT.local_token_budget
+            passages = cp.pack_context(text, docs, budget=budget).passages
+        micros.append((time.perf_counter() - t0) * 1e6)
+
+        context = "\n".join(f"- {p}" for p in passages)
+        contexts.append(context)
+        tokens.append(count_tokens(context))
+        over.append(tokens[-1] > cp.CONTEXT.local_token_budget)
+        repeats.append(repeated_words(docs[:5]) if mode == "docs[:5]" else 0)
+
+        found = cp._stems(text) & cp._stems(" ".join(d["text"] for d in docs[:5]))
+        recall.append(len(found & cp._stems(context)) / len(found) if found else 1.0)
+
+    p50, p99 = np.percentile(micros, [50, 99])
+    return {
+        "tokens": float(np.mean(tokens)),
+        "tokens_p99": float(np.percentile(tokens, 99)),
+        "over": float(np.mean(over)),
+        "repeated": float(np.mean(repeats)),
+        "recall": float(np.mean(recall)),
+        "p50": float(p50),
+        "p99": float(p99),
+        "contexts": contexts,
+    }
+
+
+def compare_tokenizer(contexts: list[str]) -> None:
+    from transformers import AutoTokenizer
+
+    from rag.tokens import count_tokens
+
+    tokenizer = AutoTokenizer.from_pretrained(MODELS.generate_model_name, use_fast=True)
+    real = np.asarray([len(tokenizer(c, add_special_tokens=False)["input_ids"]) for c in contexts], dtype=np.float64)
+    est = np.asarray([count_tokens(c) for c in contexts], dtype=np.float64)
+    ratio = est / np.maximum(real, 1)
+    print(
+        f"\nestimate / {MODELS.generate_model_name} tokens over {len(contexts)} contexts: "
+        f"mean {ratio.mean():.2f}, min {ratio.min():.2f}, under-estimated {np.mean(est < real):.0%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--budget", type=int, default=None, help="prompt_token_budget override")
+    parser.add_argument("--long-words", type=int, default=450, help="words per synthetic long document")
+    parser.add_argument("--tokenizer", action="store_true", help="compare the estimate to flan-t5's tokenizer")
+    args = parser.parse_args()
+
+    import rag.context_pack as cp
+    import rag.retrieve as retrieve_mod
+    from rag.domain_detect import domain_scores
+    from rag.encoder import encode_query, encode_texts
+    from rag.retrieve import retrieve_routed
+
+    if args.budget is not None:
+        cp.CONTEXT = replace(CONTEXT, prompt_token_budget=args.budget)
+
+    chunks = base_chunks()
+    chunks += iter_chunks(articles(chunks, args.long_words))
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    queries = [(q, {y}) for q, y in LABELED_QUERIES] + MULTI_DOMAIN_QUERIES
+
+    with tempfile.TemporaryDirectory(prefix="rag-context-") as tmp:
+        root = Path(tmp) / "index"
+        with IndexWriter(expected_size=len(chunks), root=root) as writer:
+            for batch in batched(zip(vectors, chunks), 4096):
+                writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+        retrieve_mod.set_index_root(root)
+        retrieve_mod.get_store()
+
+        retrieved = []
+        for text, _ in queries:
+            q = encode_query(text)
+            retrieved.append(retrieve_routed(q, domain_scores(q).routed(), k=args.k))
+
+    print(
+        f"{len(queries)} queries, {len(chunks)} chunks, top-{args.k}, "
+        f"prompt_token_budget={cp.CONTEXT.prompt_token_budget}, local_token_budget={cp.CONTEXT.local_token_budget}\n"
+    )
+    print(f"{'mode':<10}{'tokens':>8}{'p99':>7}{'over':>7}{'repeated':>10}{'recall':>8}{'p50 us':>9}{'p99 us':>9}")
+    rows = {}
+    for mode in ["docs[:5]", "packed", "local"]:
+        r = rows[mode] = run(mode, queries, retrieved)
+        print(
+            f"{mode:<10}{r['tokens']:>8.1f}{r['tokens_p99']:>7.0f}{r['over']:>7.0%}{r['repeated']:>10.1f}"
+            f"{r['recall']:>8.0%}{r['p50']:>9.1f}{r['p99']:>9.1f}"
+        )
+
+    saved = 1 - rows["packed"]["tokens"] / rows["docs[:5]"]["tokens"]
+    print(f"\npacked prompt context: {saved:.0%} fewer input tokens per Gemini call")
+
+    if args.tokenizer:
+        compare_tokenizer(rows["docs[:5]"]["contexts"] + rows["local"]["contexts"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Index size and evidence diversity with near-duplicate collapsing.
+
+Builds the data/raw corpus plus synthetic reposts (iter_scaled copies:
+same text with a locality tag, jittered vector) twice, without and with
+the ingest MinHash filter (ingest/dedup.py), then replays the Tanglish +
+Tamil-script query set through rag.retrieve with and without MMR. Reports:
+- chunks indexed and index MB (main + domain indexes + metadata + BM25)
+- mean pairwise cosine of the top-k (lower = more diverse)
+- distinct results per query: greedy clusters at --distinct-cosine
+- prompt words per distinct result
+
+Usage (from project root):
+    python benchmarks/dedup_benchmark.py --scale 5 --k 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import QUERIES, iter_scaled
+from config import MODELS, RETRIEVAL
+from embeddings.embed import iter_indexable_chunks
+from embeddings.vector_store import IndexFiles, IndexWriter
+from ingest.build_corpus import list_raw_files
+from ingest.chunk import iter_chunks
+from ingest.dedup import NearDuplicateFilter
+from ingest.stream import batched, iter_cleaned_dicts
+
+
+def dir_bytes(files: IndexFiles) -> int:
+    return sum(p.stat().st_size for p in files.root.rglob("*") if p.is_file())
+
+
+def build(root: Path, pairs: list) -> int:
+    with IndexWriter(expected_size=len(pairs), root=root) as writer:
+        for batch in batched(pairs, 4096):
+            writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+    return writer.count
+
+
+def distinct(vecs: np.ndarray, threshold: float) -> int:
+    """Greedy clusters: a result joins the first earlier cluster head it is >= threshold similar to."""
+    heads: list[np.ndarray] = []
+    for v in vecs:
+        if not any(float(v @ h) >= threshold for h in heads):
+            heads.append(v)
+    return len(heads)
+
+
+def evaluate(query_embs, encode_texts, k: int, distinct_cosine: float) -> dict:
+    from rag.retrieve import retrieve
+
+    pairwise, n_distinct, words = [], [], []
+    for q in query_embs:
+        docs = retrieve(q, k=k)
+        if not docs:
+            continue
+
+        vecs = encode_texts([d["text"] for d in docs])
+        sims = vecs @ vecs.T
+        if len(docs) > 1:
+            pairwise.append(float(sims[np.triu_indices(len(docs), 1)].mean()))
+        n = distinct(vecs, distinct_cosine)
+        n_distinct.append(n)
+        words.append(sum(len(d["text"].split()) for d in docs) / n)
+
+    return {
+        "pairwise": float(np.mean(pairwise)) if pairwise else 0.0,
+        "distinct": float(np.mean(n_distinct)),
+        "words": float(np.mean(words)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=5, help="copies of every chunk (1 = no synthetic reposts)")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--distinct-cosine", type=float, default=0.9, help="results this similar count as one")
+    args = parser.parse_args()
+
+    import rag.retrieve as retrieve_mod
+    from rag.encoder import encode_queries, encode_texts
+
+    chunks = list(iter_indexable_chunks(iter_chunks(iter_cleaned_dicts(list_raw_files()))))
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    pairs = list(iter_scaled(chunks, vectors, args.scale))
+
+    f = NearDuplicateFilter()
+    kept = [p for p in pairs if not f.is_duplicate(p[1])]
+
+    query_embs = encode_queries(QUERIES)
+    plain = replace(RETRIEVAL, mmr_lambda=1.0, dedup_cosine=1.0)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="rag-dedup-") as tmp:
+        for name, subset in [("all chunks", pairs), ("minhash", kept)]:
+            root = Path(tmp) / name.replace(" ", "_")
+            n = build(root, subset)
+            size = dir_bytes(IndexFiles(root))
+            retrieve_mod.set_index_root(root)
+
+            for mode, params in [("relevance", plain), ("mmr", RETRIEVAL)]:
+                retrieve_mod.RETRIEVAL = params
+                r = evaluate(query_embs, encode_texts, args.k, args.distinct_cosine)
+                rows.append((name, mode, n, size, r))
+
+    retrieve_mod.RETRIEVAL = RETRIEVAL
+
+    print(
+        f"{len(chunks)} base chunks x{args.scale}, {len(QUERIES)} queries, top-{args.k}, "
+        f"distinct at cosine >= {args.distinct_cosine}\n"
+    )
+    print(f"{'index':<12}{'ranking':<11}{'chunks':>8}{'MB':>8}{'pair cos':>10}{'distinct':>10}{'words/dist':>12}")
+    for name, mode, n, size, r in rows:
+        print(
+            f"{name:<12}{mode:<11}{n:>8}{size / 2**20:>8.2f}"
+            f"{r['pairwise']:>10.3f}{r['distinct']:>10.2f}{r['words']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
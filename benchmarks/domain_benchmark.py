@@ -0,0 +1,158 @@
+"""
+Accuracy and latency of the tiered domain classifier, per tier.
+
+Runs a labeled Tanglish + Tamil-script query set (raw text, as a caller
+without a pre-computed embedding would pass it) through:
+- keywords:      tier 1 alone (rag/keyword_matcher.py); coverage = share
+                 of queries it is confident on, accuracy over those
+- exemplars:     tier 2 alone for the queries tier 1 left undecided
+                 (LaBSE encode + multi-exemplar cosine)
+- tiered:        classify_domain end to end (tier 1, then tier 2)
+- exemplars all: tier 2 for every query (keyword tier disabled)
+- single string: the previous classifier, one description string per domain
+
+Latency is per query in microseconds, encoder included where it runs.
+
+Usage (from project root):
+    python benchmarks/domain_benchmark.py
+    python benchmarks/domain_benchmark.py --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import DOMAIN_DETECTION
+
+# (query, expected domain); the last block has no lexicon keyword, or conflicting ones
+LABELED_QUERIES = [
+    ("gandhipuram route la traffic irukka?", "traffic"),
+    ("avinashi road la accident nala jam ah?", "traffic"),
+    ("kovai la perundhu strike iniku?", "transport"),
+    ("metro train delay irukka today?", "transport"),
+    ("iniku night power cut irukka anna nagar la?", "power"),
+    ("peelamedu la current eppo varum?", "power"),
+    ("saibaba colony la thanni varala, enna problem?", "water"),
+    ("ukkadam la pipeline work eppo mudiyum?", "water"),
+    ("chennai la rain situation epdi irukku?", "weather"),
+    ("cyclone warning coimbatore ku irukka?", "weather"),
+    ("கோவையில் இன்று மின்தடை உள்ளதா?", "power"),
+    ("காந்திபுரம் பகுதியில் போக்குவரத்து நெரிசல் உள்ளதா?", "traffic"),
+    ("இன்று குடிநீர் விநியோகம் நிறுத்தப்படுமா?", "water"),
+    ("சென்னையில் கனமழை எச்சரிக்கை உள்ளதா?", "weather"),
+    ("பேருந்து வேலைநிறுத்தம் இன்னும் தொடர்கிறதா?", "transport"),
+    ("rs puram la water supply iniku irukka?", "water"),
+    ("tneb shutdown schedule for singanallur?", "power"),
+    ("velachery la water logging irukka?", "weather"),
+    ("tambaram local train cancel aa?", "transport"),
+    ("flyover kitta diversion podrukaanga", "traffic"),
+    ("tanker lorry eppo varum t nagar ku?", "water"),
+    ("transformer blast aagiduchu, eppo sari aagum?", "power"),
+    ("imd heatwave alert iniku?", "weather"),
+    ("mtc bus route maathirukaangala?", "transport"),
+    ("ரயில் சேவை தாமதமா?", "transport"),
+    ("சாலை விபத்து காரணமாக நெரிசல்", "traffic"),
+    ("மின்வெட்டு எப்போது முடியும்?", "power"),
+    ("புயல் கரையை கடக்குமா?", "weather"),
+    # no keyword / conflicting keywords: tier 2 decides
+    ("veetla light eriyala, fan kooda odala", "power"),
+    ("kuzhaila onnume varala moonu naala", "water"),
+    ("vandi ellam nagaravae illa, romba neram nikkuthu", "traffic"),
+    ("sky romba dark ah irukku, kudai venuma?", "weather"),
+    ("office ku poga vandi kidaikala, depot la ellam nikkuthu", "transport"),
+    ("semma mazhai, roads ellam thanni nikkuthu", "weather"),
+    ("rain nala train late ah?", "transport"),
+    ("வீட்டில் விளக்கு எரியவில்லை", "power"),
+    ("வாகனங்கள் நகரவே இல்லை", "traffic"),
+]
+
+
+def timed(fn, queries: list[str], repeat: int) -> tuple[list, list[float]]:
+    preds, latencies = [], []
+    for _ in range(repeat):
+        preds = []
+        for q in queries:
+            t0 = time.perf_counter()
+            preds.append(fn(q))
+            latencies.append((time.perf_counter() - t0) * 1e6)
+    return preds, latencies
+
+
+def row(name: str, preds: list, labels: list[str], latencies: list[float], n_total: int) -> None:
+    if not preds:
+        print(f"{name:<15}{0:>8}{'-':>9}{'-':>9}{'-':>11}{'-':>11}")
+        return
+    acc = np.mean([p == y for p, y in zip(preds, labels)])
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{name:<15}{len(preds):>8}{len(preds) / n_total:>9.0%}{acc:>9.1%}{p50:>11.1f}{p99:>11.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the query set (latency samples)")
+    args = parser.parse_args()
+
+    import rag.domain_detect as dd
+    from rag.encoder import encode_query, encode_texts
+
+    queries = [q for q, _ in LABELED_QUERIES]
+    labels = [y for _, y in LABELED_QUERIES]
+    n = len(queries)
+
+    # Load models / lexicon outside the timed loops
+    dd.get_keyword_matcher()
+    dd.get_domain_embeddings()
+    encode_query("warm up")
+
+    kw_preds, kw_lat = timed(dd.keyword_domain, queries, args.repeat)
+    hit = [i for i, p in enumerate(kw_preds) if p is not None]
+    miss = [i for i, p in enumerate(kw_preds) if p is None]
+    hit_set = set(hit)
+    kw_lat_hit = [t for j, t in enumerate(kw_lat) if j % n in hit_set]
+
+    def exemplar(q: str) -> str:
+        return dd.domain_names[int(dd._exemplar_scores(encode_query(q).as_matrix())[0].argmax())]
+
+    ex_preds, ex_lat = timed(exemplar, [queries[i] for i in miss], args.repeat)
+    tiered, tiered_lat = timed(lambda q: dd.classify_domain(q).domain, queries, args.repeat)
+    ex_all, ex_all_lat = timed(exemplar, queries, args.repeat)
+
+    # Previous classifier: the first exemplar of each domain is its old description string
+    single = encode_texts([dd.DOMAIN_EXEMPLARS[d][0] for d in dd.domain_names])
+
+    def single_string(q: str) -> str:
+        return dd.domain_names[int((single @ encode_query(q).vector).argmax())]
+
+    single_preds, single_lat = timed(single_string, queries, args.repeat)
+
+    print(
+        f"{n} labeled queries, keyword_min_score={DOMAIN_DETECTION.keyword_min_score}, "
+        f"keyword_margin={DOMAIN_DETECTION.keyword_margin}, exemplar_top_n={DOMAIN_DETECTION.exemplar_top_n}\n"
+    )
+    print(f"{'tier':<15}{'queries':>8}{'share':>9}{'accuracy':>9}{'p50 us':>11}{'p99 us':>11}")
+    row("keywords", [kw_preds[i].domain for i in hit], [labels[i] for i in hit], kw_lat_hit, n)
+    row("exemplars", ex_preds, [labels[i] for i in miss], ex_lat, n)
+    row("tiered", tiered, labels, tiered_lat, n)
+    print()
+    row("exemplars all", ex_all, labels, ex_all_lat, n)
+    row("single string", single_preds, labels, single_lat, n)
+
+    wrong = [(q, y, p) for q, y, p in zip(queries, labels, tiered) if p != y]
+    if wrong:
+        print("\ntiered misses:")
+        for q, y, p in wrong:
+            print(f"  {q!r}: expected {y}, got {p}")
+
+
+if __name__ == "__main__":
+    main()
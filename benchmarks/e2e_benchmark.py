@@ -0,0 +1,321 @@
+"""
+End-to-end benchmark of the query pipeline, fully offline.
+
+Replays a Tanglish + Tamil-script query set through encode_query,
+domain_scores, retrieve_routed, app.filter_by_domain and app.generate_answer,
+with the Gemini client replaced by a deterministic local stand-in
+(LocalGemini, optional simulated latency). For each corpus scale it
+reports:
+- cold start (model / index load seconds)
+- p50 / p95 / p99 per stage and end to end
+- throughput (queries/sec, single thread)
+- peak RSS of the process
+
+Corpora are built from data/raw: the raw files go through the normal
+ingest + chunking path, are encoded once, and scale N adds N-1 synthetic
+copies of every chunk (locality-tagged text, jittered vector, new ids)
+into a temporary index directory.
+
+Usage (from project root):
+    python benchmarks/e2e_benchmark.py --scales 1 10 100
+    python benchmarks/e2e_benchmark.py --llm-latency-ms 300 --queries 200
+    python benchmarks/e2e_benchmark.py --json bench.json
+    python benchmarks/e2e_benchmark.py --baseline bench.json   # exit 1 on regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import MODELS
+from embeddings.embed import iter_indexable_chunks
+from ingest.build_corpus import list_raw_files
+from ingest.chunk import iter_chunks
+from ingest.dedup import dedup_chunks
+from ingest.stream import batched, iter_cleaned_dicts
+
+QUERIES = [
+    "gandhipuram route la traffic irukka?",
+    "avinashi road la accident nala jam ah?",
+    "kovai la perundhu strike iniku?",
+    "metro train delay irukka today?",
+    "iniku night power cut irukka anna nagar la?",
+    "peelamedu la current eppo varum?",
+    "saibaba colony la thanni varala, enna problem?",
+    "ukkadam la pipeline work eppo mudiyum?",
+    "chennai la rain situation epdi irukku?",
+    "cyclone warning coimbatore ku irukka?",
+    "கோவையில் இன்று மின்தடை உள்ளதா?",
+    "காந்திபுரம் பகுதியில் போக்குவரத்து நெரிசல் உள்ளதா?",
+    "இன்று குடிநீர் விநியோகம் நிறுத்தப்படுமா?",
+    "சென்னையில் கனமழை எச்சரிக்கை உள்ளதா?",
+    "பேருந்து வேலைநிறுத்தம் இன்னும் தொடர்கிறதா?",
+    "rs puram la water supply iniku irukka?",
+]
+
+AREAS = [
+    "Gandhipuram", "RS Puram", "Peelamedu", "Ukkadam", "Saibaba Colony",
+    "Singanallur", "Anna Nagar", "T Nagar", "Velachery", "Tambaram",
+]
+
+STAGES = ["encode", "detect_domain", "retrieve", "filter_by_domain", "generate", "total"]
+
+
+# ------------------ LOCAL LLM STAND-IN ------------------ #
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _LocalModels:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+
+    @staticmethod
+    def _answer(contents: str) -> str:
+        # Deterministic: restate the first report in the app's answer format
+        reports = [l[2:] for l in contents.split("Reports:", 1)[-1].splitlines() if l.startswith("- ")]
+        first = reports[0] if reports else "No reports available."
+        return (
+            f"Status: {first}\n"
+            f"Reason: Based on {len(reports)} recent local reports.\n"
+            "Current situation: Updates are being monitored for this area."
+        )
+
+    def generate_content(self, *, model, contents, config=None):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return _Response(self._answer(contents))
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        words = self.generate_content(model=model, contents=contents).text.split(" ")
+        for i, w in enumerate(words):
+            yield _Response(w if i == 0 else " " + w)
+
+
+class LocalGemini:
+    """Offline drop-in for genai.Client as used by app.py."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.models = _LocalModels(latency_ms / 1000)
+
+
+# ------------------ SYNTHETIC CORPUS ------------------ #
+
+def base_chunks() -> list[dict]:
+    """Indexable chunks from data/raw via the normal ingest + chunk path."""
+    return list(iter_indexable_chunks(dedup_chunks(iter_chunks(iter_cleaned_dicts(list_raw_files())))))
+
+
+def iter_scaled(chunks: list[dict], vectors: np.ndarray, scale: int, *, jitter: float = 0.05, seed: int = 0):
+    """Yields (vector, meta) for the base corpus plus scale-1 synthetic copies."""
+    rng = np.random.default_rng(seed)
+    d = vectors.shape[1]
+
+    for copy in range(scale):
+        if copy == 0:
+            yield from zip(vectors, chunks)
+            continue
+
+        noise = rng.standard_normal(vectors.shape).astype(np.float32) * (jitter / np.sqrt(d))
+        jittered = vectors + noise
+        jittered /= np.linalg.norm(jittered, axis=1, keepdims=True)
+
+        for i, (v, c) in enumerate(zip(jittered, chunks)):
+            m = dict(c)
+            m["text"] = f"{c['text']} ({AREAS[(copy + i) % len(AREAS)]})"
+            m["doc_id"] = f"{c.get('doc_id')}~{copy}"
+            m["chunk_id"] = f"{c.get('chunk_id')}~{copy}"
+            m.pop("n_tokens", None)  # text changed: the index writer recounts it
+            yield v, m
+
+
+def build_scaled_index(root: Path, chunks: list[dict], vectors: np.ndarray, scale: int) -> int:
+    from embeddings.vector_store import IndexWriter
+
+    with IndexWriter(expected_size=len(chunks) * scale, root=root) as writer:
+        for batch in batched(iter_scaled(chunks, vectors, scale), 4096):
+            writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+    return writer.count
+
+
+# ------------------ MEASUREMENT ------------------ #
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_queries(app, queries: list[str], k: int) -> tuple[dict[str, list[float]], float]:
+    from rag.domain_detect import domain_scores
+    from rag.encoder import encode_query
+    from rag.retrieve import retrieve_routed
+
+    timings: dict[str, list[float]] = {s: [] for s in STAGES}
+    clock = time.perf_counter
+
+    start = clock()
+    # ask_gemini prints the raw model output; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for q in queries:
+            t0 = clock()
+            query_emb = encode_query(q)
+            t1 = clock()
+            routed = domain_scores(query_emb).routed()
+            domain = next(iter(routed))
+            t2 = clock()
+            timings["encode"].append(t1 - t0)
+            timings["detect_domain"].append(t2 - t1)
+
+            if domain in app.VALID_DOMAINS:
+                docs = retrieve_routed(query_emb, routed, k=k)
+                t3 = clock()
+                docs = app.filter_by_domain(docs, routed)
+                t4 = clock()
+                # No query_emb: bypasses the answer cache so every query generates
+                app.generate_answer(q, docs)
+                t5 = clock()
+                timings["retrieve"].append(t3 - t2)
+                timings["filter_by_domain"].append(t4 - t3)
+                timings["generate"].append(t5 - t4)
+
+            timings["total"].append(clock() - t0)
+
+    return timings, clock() - start
+
+
+def summarize(timings: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    out = {}
+    for stage, samples in timings.items():
+        if not samples:
+            continue
+        ms = np.asarray(samples) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        out[stage] = {"p50": p50, "p95": p95, "p99": p99, "n": len(ms)}
+    return out
+
+
+def bench_scale(app, root: Path, chunks, vectors, scale: int, queries: list[str], k: int) -> dict:
+    from rag.retrieve import set_index_root
+    from rag.warmup import warm_up
+
+    t0 = time.perf_counter()
+    n = build_scaled_index(root, chunks, vectors, scale)
+    build_s = time.perf_counter() - t0
+
+    set_index_root(root)
+    cold = warm_up()
+
+    timings, elapsed = run_queries(app, queries, k)
+    return {
+        "scale": scale,
+        "chunks": n,
+        "build_s": build_s,
+        "cold_start": cold,
+        "stages": summarize(timings),
+        "qps": len(queries) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ------------------ REPORT ------------------ #
+
+def print_result(r: dict) -> None:
+    cold = r["cold_start"]
+    print(f"\n=== scale x{r['scale']}: {r['chunks']} chunks (built in {r['build_s']:.1f}s) ===")
+    print("cold start: " + ", ".join(f"{k}={v:.2f}s" for k, v in cold.items()))
+    print(f"{'stage':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'n':>7}")
+    for stage, s in r["stages"].items():
+        print(f"{stage:<18}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['p99']:>10.2f}{s['n']:>7}")
+    print(f"throughput: {r['qps']:.1f} q/s   peak RSS: {r['peak_rss_mb']:.0f} MB")
+
+
+def compare(results: list[dict], baseline_path: Path, tolerance: float) -> list[str]:
+    """Regressions vs a previous --json run: p95 per stage, throughput."""
+    with baseline_path.open(encoding="utf-8") as f:
+        baseline = {r["scale"]: r for r in json.load(f)}
+
+    problems = []
+    for r in results:
+        base = baseline.get(r["scale"])
+        if base is None:
+            continue
+
+        for stage, s in r["stages"].items():
+            old = base["stages"].get(stage)
+            if old and s["p95"] > old["p95"] * (1 + tolerance):
+                problems.append(f"x{r['scale']} {stage} p95 {old['p95']:.2f} -> {s['p95']:.2f} ms")
+
+        if r["qps"] < base["qps"] * (1 - tolerance):
+            problems.append(f"x{r['scale']} throughput {base['qps']:.1f} -> {r['qps']:.1f} q/s")
+
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--queries", type=int, default=500, help="queries replayed per scale")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated Gemini latency")
+    parser.add_argument("--json", type=Path, default=None, help="write results here")
+    parser.add_argument("--baseline", type=Path, default=None, help="compare against a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression vs baseline")
+    args = parser.parse_args()
+
+    # app.py refuses to start without a key; the stand-in never uses it
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    import app
+
+    app.client = LocalGemini(args.llm_latency_ms)
+
+    from rag.encoder import encode_texts
+
+    chunks = base_chunks()
+    t0 = time.perf_counter()
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    print(f"Encoded {len(chunks)} base chunks from data/raw in {time.perf_counter() - t0:.1f}s")
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as tmp:
+        for scale in args.scales:
+            r = bench_scale(app, Path(tmp) / f"x{scale}", chunks, vectors, scale, queries, args.k)
+            print_result(r)
+            results.append(r)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        problems = compare(results, args.baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(" -", p)
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Parity, speed and memory of the LaBSE encoder backends vs fp32 torch.
+
+Encodes the chunk corpus (data/processed/chunks.json) and a Tanglish +
+Tamil-script query set with each backend from rag/encoder_backends.py
+and reports:
+- cosine agreement with fp32 per text (mean / min)
+- recall@k of corpus search against the fp32 top-k, both with the
+  corpus re-encoded by the backend ("rebuilt") and with the fp32 corpus
+  and only queries on the new backend ("query-only")
+- load time and resident memory added by the model
+- corpus throughput (texts/sec) and single-query latency p50 / p99
+
+Exits 1 if a backend falls below --min-cosine or --min-recall.
+
+Usage (from project root):
+    python benchmarks/encoder_benchmark.py
+    python benchmarks/encoder_benchmark.py --backends torch_int8 onnx_int8 --k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import QUERIES
+from config import MODELS
+from ingest.chunk import load_chunks
+from rag.encoder_backends import BACKENDS, load_encoder
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to the peak off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def encode(model, texts: list[str], batch_size: int) -> np.ndarray:
+    return np.asarray(
+        model.encode(texts, batch_size=batch_size, normalize_embeddings=True),
+        dtype=np.float32,
+    )
+
+
+def measure(backend: str, corpus: list[str], queries: list[str], batch_size: int) -> dict:
+    gc.collect()
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    model = load_encoder(backend)
+    load_s = time.perf_counter() - t0
+    model_mb = rss_mb() - rss0
+
+    encode(model, queries[:4], batch_size)  # warm up kernels / allocators
+
+    t0 = time.perf_counter()
+    corpus_vecs = encode(model, corpus, batch_size)
+    corpus_s = time.perf_counter() - t0
+
+    latencies = []
+    query_vecs = []
+    for q in queries:
+        t0 = time.perf_counter()
+        query_vecs.append(encode(model, [q], 1)[0])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    del model
+    gc.collect()
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "model_mb": model_mb,
+        "texts_per_s": len(corpus) / corpus_s,
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p99_ms": float(np.percentile(latencies, 99)),
+        "corpus": corpus_vecs,
+        "queries": np.stack(query_vecs),
+    }
+
+
+def recall_at_k(ref_q, ref_c, q, c, k: int) -> float:
+    ref = np.argsort(-(ref_q @ ref_c.T), axis=1)[:, :k]
+    got = np.argsort(-(q @ c.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref, got)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=MODELS.encode_batch_size)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="fail below this min cosine vs fp32")
+    parser.add_argument("--min-recall", type=float, default=0.90, help="fail below this recall@k vs fp32")
+    args = parser.parse_args()
+
+    corpus = [c["text"] for c in load_chunks()]
+    queries = QUERIES
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {b: measure(b, corpus, queries, args.batch_size) for b in backends}
+    ref = results["torch"]
+
+    print(f"{len(corpus)} corpus texts, {len(queries)} queries, recall@{args.k} vs fp32 torch\n")
+    print(
+        f"{'backend':<12}{'cos mean':>9}{'cos min':>9}{'rebuilt':>9}{'q-only':>8}"
+        f"{'load s':>8}{'MB':>7}{'texts/s':>9}{'p50 ms':>8}{'p99 ms':>8}"
+    )
+
+    failed = []
+    for b, r in results.items():
+        cos = np.concatenate([
+            np.sum(r["corpus"] * ref["corpus"], axis=1),
+            np.sum(r["queries"] * ref["queries"], axis=1),
+        ])
+        rebuilt = recall_at_k(ref["queries"], ref["corpus"], r["queries"], r["corpus"], args.k)
+        query_only = recall_at_k(ref["queries"], ref["corpus"], r["queries"], ref["corpus"], args.k)
+
+        print(
+            f"{b:<12}{cos.mean():>9.4f}{cos.min():>9.4f}{rebuilt:>9.3f}{query_only:>8.3f}"
+            f"{r['load_s']:>8.1f}{r['model_mb']:>7.0f}{r['texts_per_s']:>9.1f}"
+            f"{r['query_p50_ms']:>8.1f}{r['query_p99_ms']:>8.1f}"
+        )
+
+        if cos.min() < args.min_cosine or rebuilt < args.min_recall:
+            failed.append(b)
+
+    if failed:
+        print(f"\nParity check FAILED for: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nParity check passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Tokens/sec and latency of the local flan-t5 engine (rag/generate.py).
+
+Builds one prompt per query in the Tanglish + Tamil-script query set, with
+the text of up to 5 data/raw chunks of the query's domain as context, and
+runs them through:
+- baseline:   the previous path: slow T5Tokenizer (use_fast=False), full
+              prompt tokenized per call, fp32, one model.generate per request
+- fast_fp32:  LocalEngine, fast tokenizer, fp32, one request per generate
+- int8:       LocalEngine with dynamic int8 nn.Linear, one request per generate
+- int8_bN:    int8, N concurrent requests per generate (--batch-sizes)
+- int8_reuse: int8, every prompt asked a second time (cached encoder outputs)
+
+Reports per config: tokenize ms per request, p50 / p99 latency per request
+(a batched request waits for its whole batch), generated tokens/sec, and
+the share of answers identical to the baseline.
+
+Usage (from project root):
+    python benchmarks/generate_benchmark.py
+    python benchmarks/generate_benchmark.py --batch-sizes 4 8 16 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import QUERIES, base_chunks
+from config import MODELS
+from rag.domain_detect import keyword_domain
+from rag.generate import GENERATE_KWARGS, PROMPT_MIDDLE, PROMPT_PREFIX, PROMPT_SUFFIX, LocalEngine
+
+
+def build_items(chunks) -> list[tuple[str, str]]:
+    items = []
+    for q in QUERIES:
+        pred = keyword_domain(q)
+        same = [c["text"] for c in chunks if pred is None or c.get("domain") == pred.domain]
+        items.append(("\n".join(same[:5]), q))
+    return items
+
+
+def run_baseline(items, repeat: int) -> dict:
+    import torch
+    from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+    tokenizer = T5Tokenizer.from_pretrained(MODELS.generate_model_name, use_fast=False)
+    model = T5ForConditionalGeneration.from_pretrained(MODELS.generate_model_name).eval()
+
+    tok_ms, latencies, answers = [], [], []
+    tokens, gen_s = 0, 0.0
+    for _ in range(repeat):
+        answers = []
+        for context, query in items:
+            t0 = time.perf_counter()
+            inputs = tokenizer(
+                PROMPT_PREFIX + context + PROMPT_MIDDLE + query + PROMPT_SUFFIX,
+                return_tensors="pt",
+                truncation=True,
+                max_length=512,
+            )
+            t1 = time.perf_counter()
+            with torch.inference_mode():
+                out = model.generate(**inputs, **GENERATE_KWARGS)
+            t2 = time.perf_counter()
+
+            tok_ms.append((t1 - t0) * 1000)
+            latencies.append((t2 - t0) * 1000)
+            tokens += int((out[:, 1:] != tokenizer.pad_token_id).sum())
+            gen_s += t2 - t1
+            answers.append(tokenizer.decode(out[0], skip_special_tokens=True))
+
+    return summarize(tok_ms, latencies, tokens, gen_s, answers)
+
+
+def run_engine(engine: LocalEngine, items, batch_size: int, repeat: int, passes: int = 1) -> dict:
+    tok_ms, latencies, answers = [], [], []
+    tokens0, seconds0 = engine.generated_tokens, engine.generate_seconds
+
+    for _ in range(repeat):
+        engine._encoder_cache.clear()
+        for p in range(passes):
+            answers = []
+            for start in range(0, len(items), batch_size):
+                batch = items[start : start + batch_size]
+
+                t0 = time.perf_counter()
+                engine.input_ids(batch)
+                tok_ms.extend([(time.perf_counter() - t0) * 1000 / len(batch)] * len(batch))
+
+                t0 = time.perf_counter()
+                answers.extend(engine.generate(batch))
+                ms = (time.perf_counter() - t0) * 1000
+                if p == passes - 1:
+                    latencies.extend([ms] * len(batch))
+
+    return summarize(
+        tok_ms,
+        latencies,
+        engine.generated_tokens - tokens0,
+        engine.generate_seconds - seconds0,
+        answers,
+    )
+
+
+def summarize(tok_ms, latencies, tokens, seconds, answers) -> dict:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {
+        "tok_ms": float(np.mean(tok_ms)),
+        "p50": float(p50),
+        "p99": float(p99),
+        "tokens_per_s": tokens / seconds if seconds else 0.0,
+        "answers": answers,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--repeat", type=int, default=2, help="passes over the prompt set")
+    args = parser.parse_args()
+
+    import torch
+    from transformers import AutoTokenizer, T5ForConditionalGeneration
+
+    items = build_items(base_chunks())
+
+    tokenizer = AutoTokenizer.from_pretrained(MODELS.generate_model_name, use_fast=True)
+    fp32 = T5ForConditionalGeneration.from_pretrained(MODELS.generate_model_name).eval()
+    int8 = torch.quantization.quantize_dynamic(copy.deepcopy(fp32), {torch.nn.Linear}, dtype=torch.qint8)
+
+    rows = [("baseline", run_baseline(items, args.repeat))]
+    rows.append(("fast_fp32", run_engine(LocalEngine(tokenizer, fp32), items, 1, args.repeat)))
+
+    engine = LocalEngine(tokenizer, int8)
+    rows.append(("int8", run_engine(engine, items, 1, args.repeat)))
+    for b in args.batch_sizes:
+        rows.append((f"int8_b{b}", run_engine(engine, items, b, args.repeat)))
+    rows.append(("int8_reuse", run_engine(engine, items, 1, args.repeat, passes=2)))
+
+    ref = rows[0][1]["answers"]
+    print(f"{len(items)} prompts, max_new_tokens={GENERATE_KWARGS['max_new_tokens']}, torch threads={torch.get_num_threads()}\n")
+    print(f"{'config':<12}{'tok ms':>8}{'p50 ms':>9}{'p99 ms':>9}{'tok/s':>9}{'same':>7}")
+    for name, r in rows:
+        same = np.mean([a == b for a, b in zip(r["answers"], ref)])
+        print(f"{name:<12}{r['tok_ms']:>8.2f}{r['p50']:>9.1f}{r['p99']:>9.1f}{r['tokens_per_s']:>9.1f}{same:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
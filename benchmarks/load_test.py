@@ -0,0 +1,94 @@
+"""
+Local load generator for server.py.
+
+Fires --requests POST /query calls with --concurrency in flight, then
+reports QPS and p50 / p95 / p99 / max latency plus the server's
+micro-batching stats (average batch size).
+
+Usage (server running on localhost:8000):
+    python benchmarks/load_test.py --requests 2000 --concurrency 64
+    python benchmarks/load_test.py --generate      # include the Gemini call
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.batch_benchmark import SAMPLE_QUERIES
+
+
+async def _worker(session, url, queue, latencies, errors, generate):
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        payload = {"query": f"{SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]} #{i}", "generate": generate}
+        t0 = time.perf_counter()
+        try:
+            async with session.post(f"{url}/query", json=payload) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    errors.append(resp.status)
+                    continue
+        except aiohttp.ClientError as e:
+            errors.append(str(e))
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+
+async def run(args: argparse.Namespace) -> None:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    latencies: list[float] = []
+    errors: list = []
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(session, args.url, queue, latencies, errors, args.generate)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - t0
+
+        async with session.get(f"{args.url}/stats") as resp:
+            stats = await resp.json()
+
+    lat = np.asarray(latencies)
+    print(f"requests={args.requests} concurrency={args.concurrency} errors={len(errors)}")
+    print(f"QPS: {len(lat) / elapsed:.1f}")
+    if len(lat):
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(f"latency ms: p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} max={lat.max():.1f}")
+    print("server batching:", stats["batching"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--generate", action="store_true", help="also call Gemini (default: retrieval only)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Search cost of last-N-hours queries and index size under retention.
+
+Builds the data/raw corpus scaled synthetically (as in e2e_benchmark.py),
+dating copy c of every chunk c days before today, so the index covers
+--scale days of reports. Then reports:
+- per window (all / last N hours): vectors scanned per query and p50 / p99
+  retrieve latency with the Tanglish + Tamil-script query set
+- per retention setting: chunks indexed, time shards and index MB
+
+Usage (from project root):
+    python benchmarks/recency_benchmark.py --scale 30 --windows 24 72 168
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import QUERIES, base_chunks, iter_scaled
+from config import INDEX, MODELS
+from embeddings.meta_store import days_to_date
+from embeddings.vector_store import IndexFiles, IndexWriter, today_days
+from ingest.stream import batched
+
+
+def iter_dated(chunks, vectors, scale: int):
+    """iter_scaled copies, copy c dated c days ago."""
+    today = today_days()
+    n = len(chunks)
+    for row, (v, m) in enumerate(iter_scaled(chunks, vectors, scale)):
+        m = dict(m)
+        m["date"] = days_to_date(today - row // n)
+        yield v, m
+
+
+def build(root: Path, chunks, vectors, scale: int, params) -> IndexWriter:
+    with IndexWriter(expected_size=len(chunks) * scale, root=root, params=params) as writer:
+        for batch in batched(iter_dated(chunks, vectors, scale), 4096):
+            writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+    return writer
+
+
+def dir_mb(files: IndexFiles) -> float:
+    return sum(p.stat().st_size for p in files.root.rglob("*") if p.is_file()) / 2**20
+
+
+def scanned(store, since_day) -> int:
+    """Vectors a query has to score: the whole index, or the shards in the window."""
+    if since_day is None:
+        return store.index.ntotal
+    return sum(sub.ntotal for (day, _), sub in store.time_shards.items() if day >= since_day)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=30, help="days of synthetic reports")
+    parser.add_argument("--windows", type=float, nargs="+", default=[24, 72, 168], help="max_age_hours to compare")
+    parser.add_argument("--retention", type=int, nargs="+", default=[7, 3], help="retention_days to compare")
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    import rag.retrieve as retrieve_mod
+    from rag.encoder import encode_queries, encode_texts
+
+    chunks = base_chunks()
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    query_embs = encode_queries(QUERIES)
+    now = time.time()
+
+    with tempfile.TemporaryDirectory(prefix="rag-recency-") as tmp:
+        root = Path(tmp) / "all"
+        writer = build(root, chunks, vectors, args.scale, INDEX)
+        retrieve_mod.set_index_root(root)
+        store = retrieve_mod.get_store()
+
+        print(f"{writer.count} chunks over {args.scale} days, {len(QUERIES)} queries, top-{args.k}\n")
+        print(f"{'window':<10}{'scanned':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for window in [None, *args.windows]:
+            since = None if window is None else retrieve_mod._since_day(now / 3600, window)
+            latencies = []
+            for _ in range(5):
+                for q in query_embs:
+                    t0 = time.perf_counter()
+                    retrieve_mod.retrieve(q, k=args.k, max_age_hours=window, now=now)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+
+            p50, p99 = np.percentile(latencies, [50, 99])
+            label = "all" if window is None else f"{window:g}h"
+            print(f"{label:<10}{scanned(store, since):>10}{p50:>9.2f}{p99:>9.2f}")
+
+        print(f"\n{'retention':<10}{'chunks':>10}{'shards':>9}{'MB':>9}")
+        print(f"{'none':<10}{writer.count:>10}{len(store.time_shards):>9}{dir_mb(IndexFiles(root)):>9.2f}")
+        for days in args.retention:
+            r = Path(tmp) / f"keep{days}"
+            w = build(r, chunks, vectors, args.scale, replace(INDEX, retention_days=days))
+            shards = len(list(IndexFiles(r).time_dir.glob("*/*.faiss")))
+            print(f"{f'{days}d':<10}{w.count:>10}{shards:>9}{dir_mb(IndexFiles(r)):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
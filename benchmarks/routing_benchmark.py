@@ -0,0 +1,217 @@
+"""
+Single-label vs multi-label domain routing: empty answers, evidence
+coverage, domains searched and latency.
+
+Builds the data/raw corpus into a temporary index, then replays the
+labeled query set of domain_benchmark.py plus queries that span several
+domains ("rain la current cut and traffic jam") through:
+- top-1:  detect_domain + retrieve(domain=...) (the previous pipeline)
+- routed: domain_scores(...).routed() + retrieve_routed (concurrent fan-out)
+- all:    retrieve over every domain (no routing)
+
+Reports per mode:
+- empty: share of queries left with no docs after the domain filter
+  (these fall back to "No relevant update found.")
+- coverage: share of a query's labeled domains with at least one doc
+- domains: chunk domains searched per query (after DOMAIN_COMPATIBILITY)
+- p50 / p99 retrieve latency, routing included
+
+and a regression check: single-domain queries containing a weak keyword
+of another domain ("current water supply status") must not be routed
+to that domain.
+
+and the calibration of domain_scores over all (query, domain) pairs:
+Brier score and expected calibration error (10 bins). With --fit, also
+fits the embedding tier's Platt scaling (embedding_center /
+embedding_temperature) on the queries the keyword tier does not score.
+
+Usage (from project root):
+    python benchmarks/routing_benchmark.py --k 8
+    python benchmarks/routing_benchmark.py --threshold 0.4 --fit
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.domain_benchmark import LABELED_QUERIES
+from benchmarks.e2e_benchmark import base_chunks
+from config import DOMAIN_COMPATIBILITY, DOMAIN_DETECTION, MODELS
+from embeddings.vector_store import IndexWriter
+from ingest.stream import batched
+
+MULTI_DOMAIN_QUERIES = [
+    ("rain la current cut and traffic jam", {"weather", "power", "traffic"}),
+    ("mazhai nala power cut aa?", {"weather", "power"}),
+    ("flood nala bus ellam cancel aa?", {"weather", "transport"}),
+    ("pipeline work nala road block, traffic irukka?", {"water", "traffic"}),
+    ("current illa, motor odala, thanni eppo varum?", {"power", "water"}),
+    ("heavy rain, water logging and metro delay", {"weather", "transport"}),
+    ("புயல் காரணமாக மின்தடை மற்றும் பேருந்து சேவை நிறுத்தம்", {"weather", "power", "transport"}),
+    ("கனமழையால் சாலையில் போக்குவரத்து நெரிசல்", {"weather", "traffic"}),
+]
+
+# Single-domain queries that also contain a weak keyword of another domain
+# ("current" is also the English adjective). The weak hit alone must not
+# reach route_threshold, or the query fans out to a domain it is not about.
+WEAK_KEYWORD_QUERIES = [
+    ("current water supply status enna?", {"water"}),
+    ("what is the current status of water supply in rs puram?", {"water"}),
+    ("metro train current status?", {"transport"}),
+]
+
+
+def allowed(domains) -> set[str]:
+    return set().union(*(DOMAIN_COMPATIBILITY.get(d, {d}) for d in domains))
+
+
+def run(mode: str, queries, k: int, n_domains: int) -> dict:
+    from rag.domain_detect import detect_domain, domain_scores
+    from rag.encoder import encode_query
+    from rag.retrieve import retrieve, retrieve_routed
+
+    empty, coverage, searched, latencies = [], [], [], []
+    for text, labels in queries:
+        q = encode_query(text)
+        t0 = time.perf_counter()
+        if mode == "top-1":
+            domain = detect_domain(q)
+            routed = {domain}
+            docs = retrieve(q, k=k, domain=domain)
+        elif mode == "routed":
+            route = domain_scores(q).routed()
+            routed = set(route)
+            docs = retrieve_routed(q, route, k=k)
+        else:
+            routed = None
+            docs = retrieve(q, k=k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        if routed is not None:
+            keep = allowed(routed)
+            docs = [d for d in docs if d.get("domain") in keep]
+        found = {d.get("domain") for d in docs}
+
+        empty.append(not docs)
+        coverage.append(np.mean([bool(allowed([y]) & found) for y in labels]))
+        searched.append(n_domains if routed is None else len(allowed(routed)))
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {
+        "empty": float(np.mean(empty)),
+        "coverage": float(np.mean(coverage)),
+        "domains": float(np.mean(searched)),
+        "p50": float(p50),
+        "p99": float(p99),
+    }
+
+
+def calibration(probs: np.ndarray, truth: np.ndarray, bins: int = 10) -> tuple[float, float]:
+    brier = float(np.mean((probs - truth) ** 2))
+    idx = np.minimum((probs * bins).astype(int), bins - 1)
+    ece = 0.0
+    for b in range(bins):
+        mask = idx == b
+        if mask.any():
+            ece += mask.mean() * abs(probs[mask].mean() - truth[mask].mean())
+    return brier, float(ece)
+
+
+def fit_platt(x: np.ndarray, y: np.ndarray, steps: int = 5000, lr: float = 0.5) -> tuple[float, float]:
+    """Logistic regression p = sigmoid(a * x + b); returns (center, temperature)."""
+    a, b = 1.0, 0.0
+    for _ in range(steps):
+        p = 1.0 / (1.0 + np.exp(-(a * x + b)))
+        a -= lr * float(np.mean((p - y) * x))
+        b -= lr * float(np.mean(p - y))
+    return -b / a, 1.0 / a
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--threshold", type=float, default=None, help="route_threshold override")
+    parser.add_argument("--fit", action="store_true", help="fit the embedding tier's Platt scaling")
+    args = parser.parse_args()
+
+    import rag.domain_detect as dd
+    import rag.retrieve as retrieve_mod
+    from rag.encoder import encode_query, encode_texts
+
+    if args.threshold is not None:
+        dd.DOMAIN_DETECTION = replace(DOMAIN_DETECTION, route_threshold=args.threshold)
+
+    queries = [(q, {y}) for q, y in LABELED_QUERIES] + MULTI_DOMAIN_QUERIES + WEAK_KEYWORD_QUERIES
+    chunks = base_chunks()
+    vectors = encode_texts([c["text"] for c in chunks], batch_size=MODELS.encode_batch_size)
+    n_domains = len({c.get("domain") for c in chunks})
+
+    with tempfile.TemporaryDirectory(prefix="rag-routing-") as tmp:
+        root = Path(tmp) / "index"
+        with IndexWriter(expected_size=len(chunks), root=root) as writer:
+            for batch in batched(zip(vectors, chunks), 4096):
+                writer.add(np.stack([v for v, _ in batch]), [m for _, m in batch])
+        retrieve_mod.set_index_root(root)
+        retrieve_mod.get_store()
+
+        print(
+            f"{len(queries)} queries ({len(MULTI_DOMAIN_QUERIES)} multi-domain), {len(chunks)} chunks, "
+            f"top-{args.k}, route_threshold={dd.DOMAIN_DETECTION.route_threshold}\n"
+        )
+        print(f"{'mode':<8}{'empty':>8}{'coverage':>10}{'domains':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for mode in ["top-1", "routed", "all"]:
+            r = run(mode, queries, args.k, n_domains)
+            print(
+                f"{mode:<8}{r['empty']:>8.1%}{r['coverage']:>10.1%}{r['domains']:>9.2f}"
+                f"{r['p50']:>9.2f}{r['p99']:>9.2f}"
+            )
+
+    probs, truth, cos, cos_truth = [], [], [], []
+    for text, labels in queries:
+        q = encode_query(text)
+        s = dd.domain_scores(q)
+        for d in dd.domain_names:
+            probs.append(s.scores[d])
+            truth.append(d in labels)
+        if s.tier == "embedding":
+            cos.extend(dd._exemplar_scores(q.as_matrix())[0])
+            cos_truth.extend(d in labels for d in dd.domain_names)
+
+    # Regression check: no fan-out to a domain named only by a weak keyword
+    over = []
+    for text, labels in WEAK_KEYWORD_QUERIES:
+        extra = set(dd.domain_scores(encode_query(text)).routed()) - allowed(labels)
+        if extra:
+            over.append(f"{text!r} -> {sorted(extra)}")
+    print(f"\nweak-keyword queries routed outside their domain: {len(over)}/{len(WEAK_KEYWORD_QUERIES)}")
+    for line in over:
+        print(f"  FAIL {line}")
+
+    brier, ece = calibration(np.asarray(probs), np.asarray(truth, dtype=np.float64))
+    print(f"\ncalibration over {len(probs)} (query, domain) pairs: Brier {brier:.3f}, ECE {ece:.3f}")
+
+    if args.fit:
+        if cos:
+            center, temperature = fit_platt(np.asarray(cos, dtype=np.float64), np.asarray(cos_truth, dtype=np.float64))
+            print(
+                f"fitted on {len(cos) // len(dd.domain_names)} embedding-tier queries: "
+                f"embedding_center={center:.3f}, embedding_temperature={temperature:.3f}"
+            )
+        else:
+            print("every query was scored by the keyword tier; nothing to fit")
+
+
+if __name__ == "__main__":
+    main()
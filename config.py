@@ -14,9 +14,26 @@ class Paths:
     cleaned_path: Path = BASE_DIR / "data" / "processed" / "cleaned.json"
     chunks_path: Path = BASE_DIR / "data" / "processed" / "chunks.json"
 
+    # Streaming build (ingest/stream.py) writes JSONL instead
+    cleaned_jsonl_path: Path = BASE_DIR / "data" / "processed" / "cleaned.jsonl"
+    chunks_jsonl_path: Path = BASE_DIR / "data" / "processed" / "chunks.jsonl"
+
     embeddings_dir: Path = BASE_DIR / "embeddings"
     faiss_index_path: Path = BASE_DIR / "embeddings" / "index.faiss"
-    meta_path: Path = BASE_DIR / "embeddings" / "meta.json"
+    meta_path: Path = BASE_DIR / "embeddings" / "meta.json"  # legacy; see meta_store_dir
+    meta_store_dir: Path = BASE_DIR / "embeddings" / "meta"
+    sparse_index_path: Path = BASE_DIR / "embeddings" / "sparse_index.npz"
+    domain_index_dir: Path = BASE_DIR / "embeddings" / "domains"
+    time_index_dir: Path = BASE_DIR / "embeddings" / "time"
+    # Versioned builds: one directory per build + a pointer to the live one
+    index_versions_dir: Path = BASE_DIR / "embeddings" / "versions"
+    current_version_path: Path = BASE_DIR / "embeddings" / "CURRENT"
+    embedding_cache_path: Path = BASE_DIR / "embeddings" / "embedding_cache.npz"
+    onnx_encoder_dir: Path = BASE_DIR / "embeddings" / "onnx_encoder"
+    projection_path: Path = BASE_DIR / "embeddings" / "projection.faiss"
+
+    # Per-query traces (rag/tracing.py), one JSON object per line
+    trace_log_path: Path = BASE_DIR / "logs" / "traces.jsonl"
 
 
 @dataclass(frozen=True)
@@ -27,6 +44,15 @@ class Models:
     embed_model_name: str = "sentence-transformers/LaBSE"
     generate_model_name: str = "google/flan-t5-small"
 
+    # Texts per encoder call in batch / streaming paths
+    encode_batch_size: int = 64
+
+    # Encoder runtime (rag/encoder_backends.py): "torch" (fp32), "torch_int8",
+    # "onnx" or "onnx_int8". Rebuild the index after changing it.
+    encoder_backend: str = "torch"
+    # int8 ONNX kernels to target: "arm64", "avx2", "avx512" or "avx512_vnni"
+    onnx_quantization: str = "avx2"
+
     # When using E5 models, prefix queries/passages as below.
     e5_query_prefix: str = "query: "
     e5_passage_prefix: str = "passage: "
@@ -38,13 +64,214 @@ class Retrieval:
     dense_candidates_k: int = 30
     top_score_threshold: float = 0.30
 
-    # Hybrid retrieval (dense + BM25). If rank-bm25 is not installed, we fall back to dense-only.
+    # Hybrid retrieval (dense + BM25). If the sparse index has not been built, we fall back to dense-only.
     use_hybrid: bool = True
     dense_weight: float = 0.7
     bm25_weight: float = 0.3
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+
+    # MMR diversification of the final top-k (1.0 = plain relevance order)
+    mmr_lambda: float = 0.7
+    # Candidates at least this cosine-similar to an already picked chunk are dropped as duplicates
+    dedup_cosine: float = 0.95
+
+    # Recency bonus added to a chunk's score: recency_weight * 0.5 ** (age_hours / half-life).
+    # Dates are day precision; age is counted from the end of the chunk's date. 0 disables it.
+    recency_weight: float = 0.1
+    recency_half_life_hours: float = 24.0
+    # Default search window in hours (None: all dates). Windowed searches skip undated chunks.
+    max_age_hours: float | None = None
+
+    # Threads for concurrent per-domain sub-searches of multi-domain queries (retrieve_routed)
+    fanout_workers: int = 4
+
+
+@dataclass(frozen=True)
+class Index:
+    # "flat" (exact), "ivf_flat", "hnsw" or "ivf_pq"
+    index_type: str = "flat"
+
+    # Below this many vectors an exhaustive scan is fast enough; use flat.
+    min_vectors_for_ann: int = 10_000
+    # Vectors sampled for IVF / PQ training.
+    train_sample: int = 100_000
+
+    # IVF: 0 -> about 4 * sqrt(n) cells. nprobe = cells visited per query.
+    nlist: int = 0
+    nprobe: int = 16
+
+    # HNSW graph degree and beam widths.
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64
+
+    # IVF-PQ: sub-quantizers (must divide the embedding dim) x bits each.
+    pq_m: int = 48
+    pq_nbits: int = 8
+
+    # Compression. projection: "none", "pca" or "opq" (to projection_dim;
+    # for opq, pq_m must divide it). Trained at build time and saved next
+    # to the index; queries are projected the same way before search.
+    projection: str = "none"
+    projection_dim: int = 256
+    # Stored vector format: "flat" (float32), "fp16", "sq8", "sq4" or "pq"
+    # (pq_m x pq_nbits bytes). ivf_pq always stores PQ codes.
+    codec: str = "flat"
+
+    # Per-day, per-domain shards (embeddings/time/<YYYY-MM-DD>/<domain>.faiss)
+    # so last-N-hours searches only scan recent vectors. Every dated vector is
+    # then stored three times (main index, domain sub-index, time shard): about
+    # 3x the index memory and disk, e.g. ~9.3 KB instead of ~3.1 KB per 768-d
+    # float32 chunk. Turn off when no queries use max_age_hours.
+    time_shards: bool = True
+    # Chunks dated more than this many days ago are not indexed, and shards
+    # that age past it after a build are not loaded (None: keep everything).
+    retention_days: int | None = None
+
+    # Versioned builds kept on disk (the live one included) after a new one is published
+    keep_versions: int = 2
+    # Seconds between checks for a newly published version (0: no hot reload)
+    reload_interval_s: float = 5.0
+    # Memory-map index files instead of reading them into RAM, so workers share
+    # the page cache and a reload does not hold two copies in memory
+    mmap: bool = True
+
+
+@dataclass(frozen=True)
+class Cache:
+    # Semantic answer cache (rag/answer_cache.py)
+    enabled: bool = True
+    answer_max_entries: int = 2048
+    answer_ttl_seconds: float = 600.0
+    # Min cosine similarity between query embeddings for a hit
+    answer_similarity: float = 0.95
+
+
+@dataclass(frozen=True)
+class Serving:
+    # Async HTTP API (server.py)
+    host: str = "127.0.0.1"
+    port: int = 8000
+    retrieve_k: int = 8
+
+    # Micro-batching: requests arriving within max_wait_ms share one batch
+    max_batch: int = 32
+    max_wait_ms: float = 5.0
+
+
+@dataclass(frozen=True)
+class Generation:
+    # Local flan-t5 engine (rag/generate.py, MODELS.generate_model_name): answers
+    # offline when Gemini fails, before the extractive summary fallback.
+    # Needs torch + transformers.
+    local_fallback: bool = False
+    # Dynamic int8 quantization of every nn.Linear (fp32 when False)
+    quantize: bool = True
+    # torch intra-op threads (0: torch default)
+    num_threads: int = 0
+
+    # Prompt tokens; the context is cut so the question always fits
+    max_input_tokens: int = 512
+    max_new_tokens: int = 100
+
+    # Concurrent requests within max_wait_ms share one model.generate
+    max_batch: int = 8
+    max_wait_ms: float = 10.0
+    # Encoder outputs kept for repeated prompts (about 1 MB each at 512 tokens)
+    encoder_cache_entries: int = 32
+
+
+@dataclass(frozen=True)
+class Context:
+    # Token-budgeted prompt context (rag/context_pack.py): overlapping chunk
+    # windows of one document are merged, then the most relevant sentences are
+    # kept until the budget (estimated tokens, rag/tokens.py) is spent.
+    # Gemini "Reports:" block
+    prompt_token_budget: int = 400
+    # flan-t5 context: GENERATION.max_input_tokens minus the instructions and question
+    local_token_budget: int = 360
+    # Retrieved docs considered, best first
+    max_docs: int = 5
+    # Sentence relevance = doc score + query_term_weight * share of query terms it contains
+    query_term_weight: float = 0.3
+    # A sentence that does not fit is cut to the remaining budget if at least this many tokens remain
+    min_trim_tokens: int = 8
+
+
+@dataclass(frozen=True)
+class Tracing:
+    # Per-stage spans + counters (rag/tracing.py). RAG_TRACING=1 also enables it.
+    enabled: bool = False
+
+
+@dataclass(frozen=True)
+class Dedup:
+    # MinHash + LSH near-duplicate collapsing of chunks at ingest (ingest/dedup.py)
+    enabled: bool = True
+    shingle_chars: int = 5
+    num_perm: int = 64
+    # 16 bands x 4 rows: pairs from about Jaccard 0.5 upward become candidates
+    bands: int = 16
+    # Estimated Jaccard similarity at which a candidate counts as a duplicate
+    threshold: float = 0.7
+
+
+@dataclass(frozen=True)
+class Ingest:
+    # Process-pool corpus build (ingest/build_corpus.py); 1 = sequential, 0 = one per CPU
+    workers: int = 1
+    # Large JSONL files are split into line-aligned byte ranges of about this size
+    shard_mb: int = 32
+
+
+@dataclass(frozen=True)
+class DomainDetection:
+    # Tier 1 (rag/domain_detect.py): keyword / transliteration matcher. It answers
+    # when the best domain has at least keyword_min_score summed keyword weight
+    # and leads the runner-up by keyword_margin; otherwise tier 2 (LaBSE vs
+    # per-domain exemplars) decides.
+    use_keywords: bool = True
+    keyword_min_score: float = 1.0
+    keyword_margin: float = 1.0
+    # Tier 2 domain score: mean cosine of the query to its top-n closest exemplars
+    exemplar_top_n: int = 2
+
+    # Multi-label routing (domain_scores / route_domains): every domain gets a
+    # calibrated probability; retrieval fans out to those >= route_threshold
+    # (at most max_route_domains, at least the best one).
+    route_threshold: float = 0.5
+    max_route_domains: int = 3
+    # Keyword tier: summed keyword weight at which a domain's probability is 0.5.
+    # Weak keywords (weight 0.5, e.g. a bare "current") stay below
+    # route_threshold on their own (0.29), so they never fan a query out alone.
+    keyword_half_weight: float = 1.0
+    # Embedding tier (Platt scaling): exemplar cosine at which the probability
+    # is 0.5, and how sharply it rises around it
+    embedding_center: float = 0.35
+    embedding_temperature: float = 0.05
+
+
+# Which chunk domains a detected query domain may retrieve from.
+DOMAIN_COMPATIBILITY = {
+    "traffic": {"traffic", "transport"},
+    "transport": {"transport", "traffic"},
+    "water": {"water"},
+    "power": {"power"},
+    "weather": {"weather"}
+}
 
 
 PATHS = Paths()
 MODELS = Models()
 RETRIEVAL = Retrieval()
+INDEX = Index()
+CACHE = Cache()
+SERVING = Serving()
+GENERATION = Generation()
+CONTEXT = Context()
+TRACING = Tracing()
+INGEST = Ingest()
+DEDUP = Dedup()
+DOMAIN_DETECTION = DomainDetection()
 
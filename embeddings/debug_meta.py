@@ -1,7 +1,16 @@
-import json
+import sys
+from pathlib import Path
 
-with open("embeddings/meta.json", encoding="utf-8") as f:
-    meta = json.load(f)
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import PATHS
+from embeddings.meta_store import load_meta_store
+from embeddings.vector_store import IndexFiles, resolve_index_dir
+
+meta = load_meta_store(IndexFiles(resolve_index_dir(PATHS.embeddings_dir)).meta_store)
 
 print("Total chunks:", len(meta))
 print("First 5 entries:\n")
@@ -1,12 +1,16 @@
 """
-Build dense embeddings for chunks and write:
-- embeddings/index.faiss
-- embeddings/meta.json
+Build dense embeddings for chunks and write a new index version:
+- embeddings/versions/<version>/index.faiss
+- embeddings/versions/<version>/meta/ (columnar metadata store)
+- embeddings/CURRENT (swapped atomically once the build is complete)
+
+Running workers pick up the new version without a restart (rag/retrieve.py
+hot reload).
+
+Embeddings are cached in embeddings/embedding_cache.npz keyed by chunk text
++ model name, so a rebuild only encodes new or changed chunks.
 """
 
-import json
-import numpy as np
-from sentence_transformers import SentenceTransformer
 import sys
 from pathlib import Path
 
@@ -16,7 +20,10 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from config import MODELS, PATHS
-from embeddings.vector_store import build_and_save
+from embeddings.embedding_cache import encode_with_cache, load_cache, save_cache
+from embeddings.vector_store import build_and_save, resolve_index_dir
+from ingest.chunk import load_chunks
+from rag.encoder_backends import encoder_id, load_encoder
 
 
 # ---------- METADATA NORMALIZATION ---------- #
@@ -51,27 +58,34 @@ def infer_source(chunk):
     return "other"
 
 
-def normalize_chunks(chunks):
-    normalized = []
+def normalize_chunk(c):
+    nc = c.copy()
 
-    for c in chunks:
-        nc = c.copy()
+    # 1️⃣ DOMAIN — trust chunk if already present
+    if "domain" in c and c["domain"]:
+        nc["domain"] = c["domain"]
+    else:
+        nc["domain"] = "unknown"
+
+    # 2️⃣ SOURCE — trust chunk if clean
+    if c.get("source") in {"twitter", "news", "forums", "youtube", "govt"}:
+        nc["source"] = c["source"]
+    else:
+        nc["source"] = "other"
+
+    return nc
 
-        # 1️⃣ DOMAIN — trust chunk if already present
-        if "domain" in c and c["domain"]:
-            nc["domain"] = c["domain"]
-        else:
-            nc["domain"] = "unknown"
 
-        # 2️⃣ SOURCE — trust chunk if clean
-        if c.get("source") in {"twitter", "news", "forums", "youtube", "govt"}:
-            nc["source"] = c["source"]
-        else:
-            nc["source"] = "other"
+def normalize_chunks(chunks):
+    return [normalize_chunk(c) for c in chunks]
 
-        normalized.append(nc)
 
-    return normalized
+def iter_indexable_chunks(chunks):
+    """Normalizes chunks one at a time and drops those without a known domain."""
+    for c in chunks:
+        nc = normalize_chunk(c)
+        if nc.get("domain") not in {None, "", "unknown"}:
+            yield nc
 
 
 
@@ -86,8 +100,7 @@ def create_embeddings():
             "Please run ingest/chunk.py first."
         )
 
-    with chunks_path.open("r", encoding="utf-8") as f:
-        chunks = json.load(f)
+    chunks = load_chunks(chunks_path)
 
     if not chunks:
         raise ValueError("chunks.json is empty.")
@@ -105,21 +118,29 @@ def create_embeddings():
     print("Sample normalized chunk:")
     print({k: chunks[0][k] for k in ["text", "domain", "source"]})
 
-    model = SentenceTransformer(MODELS.embed_model_name)
+    def encode(texts):
+        # Only constructed when there is something new to encode
+        model = load_encoder(MODELS.encoder_backend)
+        return model.encode(
+            texts,
+            show_progress_bar=True,
+            normalize_embeddings=True,
+        )
+
+    cache = load_cache(PATHS.embedding_cache_path, encoder_id(MODELS.encoder_backend))
 
     texts = [c["text"] for c in chunks]
-    embeddings = model.encode(
-        texts,
-        show_progress_bar=True,
-        normalize_embeddings=True,
-    )
+    vectors, cache, stats = encode_with_cache(texts, cache, encode)
 
-    vectors = np.asarray(embeddings, dtype=np.float32)
+    print(
+        f"Embedding cache: {stats.hits} reused, "
+        f"{stats.encoded} encoded, {stats.removed} removed"
+    )
 
     build_and_save(vectors, chunks)
+    save_cache(cache, PATHS.embedding_cache_path)
 
-    print(f"FAISS index saved to {PATHS.faiss_index_path}")
-    print(f"Metadata saved to {PATHS.meta_path}")
+    print(f"Index published to {resolve_index_dir(PATHS.embeddings_dir)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""
+Persistent chunk-embedding cache keyed by sha1(encoder id + chunk text).
+The encoder id is the model name, plus the backend for non-fp32 encoders
+(rag/encoder_backends.encoder_id).
+
+A rebuild only encodes chunks whose text (or the model) changed; vectors for
+deleted chunks are dropped when the cache is rewritten, so the cache always
+mirrors the current chunks.json.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+
+def content_key(text: str, model_name: str) -> str:
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingCache:
+    model_name: str
+    keys: list[str] = field(default_factory=list)
+    vectors: np.ndarray | None = None  # float32 [len(keys), d]
+
+    def __post_init__(self) -> None:
+        self._rows = {k: i for i, k in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def row(self, key: str) -> int | None:
+        return self._rows.get(key)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    encoded: int
+    removed: int
+
+
+def load_cache(path: Path, model_name: str) -> EmbeddingCache:
+    """Loads the cache; a missing file or a different model gives an empty cache."""
+    if not path.exists():
+        return EmbeddingCache(model_name=model_name)
+
+    with np.load(path, allow_pickle=False) as data:
+        if str(data["model_name"]) != model_name:
+            return EmbeddingCache(model_name=model_name)
+        return EmbeddingCache(
+            model_name=model_name,
+            keys=data["keys"].astype(str).tolist(),
+            vectors=data["vectors"],
+        )
+
+
+def save_cache(cache: EmbeddingCache, path: Path) -> None:
+    """Writes to a temp file and renames, so a crash never leaves a torn cache."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+
+    with tmp.open("wb") as f:
+        np.savez(
+            f,
+            model_name=np.asarray(cache.model_name),
+            keys=np.asarray(cache.keys, dtype="S40"),
+            vectors=cache.vectors if cache.vectors is not None else np.empty((0, 0), dtype=np.float32),
+        )
+    tmp.replace(path)
+
+
+def encode_with_cache(
+    texts: list[str],
+    cache: EmbeddingCache,
+    encode: Callable[[list[str]], np.ndarray],
+) -> tuple[np.ndarray, EmbeddingCache, CacheStats]:
+    """
+    Returns vectors aligned with `texts`, encoding only cache misses.
+
+    The returned cache holds exactly the keys of `texts`, which drops
+    entries for chunks that no longer exist.
+    """
+    keys = [content_key(t, cache.model_name) for t in texts]
+    unique_keys = list(dict.fromkeys(keys))
+
+    missing: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if cache.row(key) is None:
+            missing.setdefault(key, text)
+
+    # Cached rows first, newly encoded rows after them
+    parts = [cache.vectors] if cache.vectors is not None and len(cache) else []
+    if missing:
+        parts.append(np.asarray(encode(list(missing.values())), dtype=np.float32))
+    pool = np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)
+
+    new_rows = {k: len(cache) + i for i, k in enumerate(missing)}
+    rows = [new_rows[k] if k in new_rows else cache.row(k) for k in unique_keys]
+
+    updated = EmbeddingCache(model_name=cache.model_name, keys=unique_keys, vectors=pool[rows])
+    stats = CacheStats(
+        hits=len(unique_keys) - len(missing),
+        encoded=len(missing),
+        removed=len(set(cache.keys) - set(unique_keys)),
+    )
+
+    return updated.vectors[[updated.row(k) for k in keys]], updated, stats
+
+
+class StreamingCache:
+    """
+    encode_with_cache() for a stream of batches (ingest/stream.py): each
+    batch reuses the vectors of `cache` and encodes only its misses, without
+    copying the cache per batch. The cache returned by finish() holds
+    exactly the keys seen in the stream, so entries for chunks that no
+    longer exist are dropped, as in a full rebuild. It grows by one vector
+    per distinct chunk, like the index.
+    """
+
+    def __init__(self, cache: EmbeddingCache, encode: Callable[[list[str]], np.ndarray]):
+        self.cache = cache
+        self._encode = encode
+        self._seen: dict[str, tuple[int, int]] = {}   # key -> (part, row) of its vector
+        self._parts: list[np.ndarray] = []
+        self.hits = 0
+        self.encoded = 0
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Vectors aligned with `texts`, encoding only cache misses."""
+        keys = [content_key(t, self.cache.model_name) for t in texts]
+
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if self.cache.row(key) is None and key not in self._seen:
+                missing.setdefault(key, text)
+
+        new = np.asarray(self._encode(list(missing.values())), dtype=np.float32) if missing else None
+        new_rows = {k: i for i, k in enumerate(missing)}
+        vectors = np.empty((len(texts), self._dim(new)), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in new_rows:
+                vectors[i] = new[new_rows[key]]
+            elif key in self._seen:
+                part, row = self._seen[key]
+                vectors[i] = self._parts[part][row]
+            else:
+                vectors[i] = self.cache.vectors[self.cache.row(key)]
+
+        first: dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in self._seen:
+                first.setdefault(key, i)
+        if first:
+            for row, key in enumerate(first):
+                self._seen[key] = (len(self._parts), row)
+            self._parts.append(vectors[list(first.values())])
+
+        self.hits += len(set(keys)) - len(missing)
+        self.encoded += len(missing)
+        return vectors
+
+    def _dim(self, new: np.ndarray | None) -> int:
+        if new is not None:
+            return new.shape[1]
+        return (self.cache.vectors if self.cache.vectors is not None and len(self.cache) else self._parts[0]).shape[1]
+
+    def finish(self) -> tuple[EmbeddingCache, CacheStats]:
+        vectors = np.concatenate(self._parts) if self._parts else None
+        updated = EmbeddingCache(model_name=self.cache.model_name, keys=list(self._seen), vectors=vectors)
+        stats = CacheStats(
+            hits=self.hits,
+            encoded=self.encoded,
+            removed=len(set(self.cache.keys) - self._seen.keys()),
+        )
+        return updated, stats
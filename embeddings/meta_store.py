@@ -0,0 +1,268 @@
+"""
+Columnar, memory-mapped chunk metadata (replaces embeddings/meta.json).
+
+Layout of embeddings/meta/:
+- <col>.bin + <col>_offsets.npy   UTF-8 blob + int64 offsets [n + 1]
+                                  for chunk_id, doc_id, url
+- text.bin + text_spans.npy       UTF-8 blob + int64 (start, end) [n, 2]. Adjacent
+                                  chunks of one document (ingest/chunk.py
+                                  char_start / char_end) share their overlapping
+                                  sentences: the blob holds each stretch of the
+                                  document once. Stores written before this have
+                                  text_offsets.npy instead.
+- domain.npy / source.npy         int16 dictionary codes (-1 = missing)
+- date.npy                        int32 days since 1970-01-01 (DATE_MISSING = missing)
+- n_tokens.npy                    int32 estimated prompt tokens of text (rag/tokens.py)
+- dictionaries.json               code -> label lists for domain / source
+
+Every array is opened with mmap, so load time does not grow with the corpus
+and worker processes share the same page cache instead of each holding
+Python dicts. Result dicts are built only for the ids actually returned.
+
+Convert an existing meta.json (from project root):
+    python embeddings/meta_store.py
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import PATHS
+from rag.tokens import count_tokens
+
+
+STRING_COLUMNS = ("text", "chunk_id", "doc_id", "url")
+CODED_COLUMNS = ("domain", "source")
+
+DATE_MISSING = np.iinfo(np.int32).min
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def date_to_days(value: str | None) -> int:
+    """'YYYY-MM-DD' -> days since epoch; anything unparseable is DATE_MISSING."""
+    if not value:
+        return DATE_MISSING
+    try:
+        return date.fromisoformat(value[:10]).toordinal() - _EPOCH
+    except ValueError:
+        return DATE_MISSING
+
+
+def days_to_date(days: int) -> str | None:
+    if days == DATE_MISSING:
+        return None
+    return date.fromordinal(int(days) + _EPOCH).isoformat()
+
+
+# ------------------ WRITER ------------------ #
+
+class MetaStoreWriter:
+    """Appends records column by column; nothing per-record is kept as dicts."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+
+        self._blobs = {c: (root / f"{c}.bin").open("wb") for c in STRING_COLUMNS}
+        self._offsets = {c: array("q", [0]) for c in STRING_COLUMNS if c != "text"}
+        self._text_spans = array("q")
+        self._text_end = 0
+        # (doc_id, char_start, char_end, text) of the last chunk written
+        self._last_chunk: tuple | None = None
+        self._codes = {c: array("h") for c in CODED_COLUMNS}
+        self._labels: dict[str, dict[str, int]] = {c: {} for c in CODED_COLUMNS}
+        self._dates = array("i")
+        self._tokens = array("i")
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def add(self, m: dict[str, Any]) -> None:
+        self._add_text(m)
+        for c in STRING_COLUMNS:
+            if c == "text":
+                continue
+            data = (m.get(c) or "").encode("utf-8")
+            self._blobs[c].write(data)
+            self._offsets[c].append(self._offsets[c][-1] + len(data))
+
+        for c in CODED_COLUMNS:
+            label = m.get(c)
+            code = -1 if label is None else self._labels[c].setdefault(label, len(self._labels[c]))
+            self._codes[c].append(code)
+
+        self._dates.append(date_to_days(m.get("date")))
+
+        # Chunks from ingest/chunk.py carry n_tokens; older chunk files are counted here
+        tokens = m.get("n_tokens")
+        self._tokens.append(count_tokens(m.get("text")) if tokens is None else int(tokens))
+
+    def _add_text(self, m: dict[str, Any]) -> None:
+        text = m.get("text") or ""
+        doc_id, start, end = m.get("doc_id"), m.get("char_start"), m.get("char_end")
+
+        # Overlap with the previous chunk of the same document: only the new tail is written
+        shared = 0
+        last = self._last_chunk
+        if last is not None and start is not None and doc_id and last[0] == doc_id:
+            _, last_start, last_end, last_text = last
+            n = last_end - start
+            if last_start <= start and 0 < n <= len(text) and last_text.endswith(text[:n]):
+                shared = n
+
+        head = text[:shared].encode("utf-8")
+        tail = text[shared:].encode("utf-8")
+        self._blobs["text"].write(tail)
+        self._text_spans.extend((self._text_end - len(head), self._text_end + len(tail)))
+        self._text_end += len(tail)
+
+        self._last_chunk = (doc_id, start, end, text) if start is not None else None
+
+    def add_many(self, records: Iterable[dict[str, Any]]) -> None:
+        for m in records:
+            self.add(m)
+
+    def close(self) -> None:
+        for c in STRING_COLUMNS:
+            self._blobs[c].close()
+            if c == "text":
+                np.save(self.root / "text_spans.npy", np.frombuffer(self._text_spans, dtype=np.int64).reshape(-1, 2))
+            else:
+                np.save(self.root / f"{c}_offsets.npy", np.frombuffer(self._offsets[c], dtype=np.int64))
+
+        for c in CODED_COLUMNS:
+            np.save(self.root / f"{c}.npy", np.frombuffer(self._codes[c], dtype=np.int16))
+
+        np.save(self.root / "date.npy", np.frombuffer(self._dates, dtype=np.int32))
+        np.save(self.root / "n_tokens.npy", np.frombuffer(self._tokens, dtype=np.int32))
+
+        dictionaries = {
+            c: sorted(self._labels[c], key=self._labels[c].__getitem__)
+            for c in CODED_COLUMNS
+        }
+        with (self.root / "dictionaries.json").open("w", encoding="utf-8") as f:
+            json.dump(dictionaries, f, ensure_ascii=False)
+
+
+def write_meta_store(records: Iterable[dict[str, Any]], root: Path) -> int:
+    writer = MetaStoreWriter(root)
+    writer.add_many(records)
+    writer.close()
+    return len(writer)
+
+
+# ------------------ READER ------------------ #
+
+def _map_blob(path: Path) -> np.ndarray:
+    # np.memmap refuses zero-length files
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class MetaStore:
+    """
+    Read-only, memory-mapped view of chunk metadata, indexed by FAISS row id.
+    `store[i]` hydrates one record into the same dict shape meta.json had.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+        with (root / "dictionaries.json").open("r", encoding="utf-8") as f:
+            self.dictionaries: dict[str, list[str]] = json.load(f)
+
+        self._blobs = {c: _map_blob(root / f"{c}.bin") for c in STRING_COLUMNS}
+        # Stores written before text spans: text_offsets.npy
+        spans_path = root / "text_spans.npy"
+        self._text_spans = np.load(spans_path, mmap_mode="r") if spans_path.exists() else None
+        self._offsets = {
+            c: np.load(root / f"{c}_offsets.npy", mmap_mode="r")
+            for c in STRING_COLUMNS
+            if c != "text" or self._text_spans is None
+        }
+        self._codes = {c: np.load(root / f"{c}.npy", mmap_mode="r") for c in CODED_COLUMNS}
+        self.dates: np.ndarray = np.load(root / "date.npy", mmap_mode="r")
+
+        # Stores written before token counts were kept: n_tokens is None
+        tokens_path = root / "n_tokens.npy"
+        self.tokens: np.ndarray | None = np.load(tokens_path, mmap_mode="r") if tokens_path.exists() else None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, i: int) -> dict[str, Any]:
+        i = int(i)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        m: dict[str, Any] = {c: self._string(c, i) for c in STRING_COLUMNS}
+        for c in CODED_COLUMNS:
+            code = int(self._codes[c][i])
+            m[c] = None if code < 0 else self.dictionaries[c][code]
+        m["date"] = days_to_date(int(self.dates[i]))
+        m["n_tokens"] = None if self.tokens is None else int(self.tokens[i])
+        return m
+
+    def hydrate(self, ids: Iterable[int]) -> list[dict[str, Any]]:
+        return [self[i] for i in ids]
+
+    def _string(self, column: str, i: int) -> str | None:
+        if column == "text" and self._text_spans is not None:
+            start, end = (int(x) for x in self._text_spans[i])
+        else:
+            off = self._offsets[column]
+            start, end = int(off[i]), int(off[i + 1])
+        if start == end:
+            return None if column == "url" else ""
+        return bytes(self._blobs[column][start:end]).decode("utf-8")
+
+    # ---- columnar accessors (no hydration) ---- #
+
+    @property
+    def domain_codes(self) -> np.ndarray:
+        return self._codes["domain"]
+
+    @property
+    def source_codes(self) -> np.ndarray:
+        return self._codes["source"]
+
+    def codes_for(self, column: str, labels: Iterable[str]) -> np.ndarray:
+        lookup = {label: code for code, label in enumerate(self.dictionaries[column])}
+        return np.asarray([lookup[x] for x in labels if x in lookup], dtype=np.int16)
+
+    def rows_with(self, column: str, labels: Iterable[str]) -> np.ndarray:
+        """Row ids whose `column` label is one of `labels`."""
+        return np.flatnonzero(np.isin(self._codes[column], self.codes_for(column, labels)))
+
+    def texts(self, ids: Iterable[int]) -> list[str]:
+        return [self._string("text", int(i)) for i in ids]
+
+
+def load_meta_store(root: Path = PATHS.meta_store_dir) -> MetaStore:
+    if not (root / "dictionaries.json").exists():
+        raise FileNotFoundError(
+            f"Metadata store not found: {root}. Run `python embeddings/embed.py` "
+            "(or `python embeddings/meta_store.py` to convert an existing meta.json)."
+        )
+    return MetaStore(root)
+
+
+if __name__ == "__main__":
+    with PATHS.meta_path.open("r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    n = write_meta_store(meta, PATHS.meta_store_dir)
+    print(f"Wrote {n} records to {PATHS.meta_store_dir}")
@@ -0,0 +1,211 @@
+"""
+Array-backed BM25 inverted index over chunk text, persisted next to index.faiss.
+
+Postings are stored term-major (CSR layout) with the BM25 term weight
+precomputed per (term, chunk), so scoring a query is a handful of array
+slices plus one np.bincount — no per-document Python work.
+
+Tokenization is code-switch aware:
+- Tamil script runs are kept whole, plus a short prefix stem so inflected
+  forms (கோவை / கோவையில்) still match.
+- Romanized Tanglish is lowercased and spelling-normalized (doubled letters,
+  aspirated "th"/"dh", "zh") so common variants (thanni / thani,
+  perundhu / perundu) collide, and attached case markers (kovaila) are split off.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+
+# ------------------ TOKENIZATION ------------------ #
+
+TOKEN_RE = re.compile(r"[\u0B80-\u0BFF]+|[a-z0-9]+")
+TAMIL_RE = re.compile(r"[\u0B80-\u0BFF]")
+REPEAT_RE = re.compile(r"(.)\1+")
+ASPIRATE_RE = re.compile(r"([tdkgpbcs])h")
+
+# Tamil code points kept for the prefix stem (roughly two syllables)
+TAMIL_STEM_CHARS = 4
+
+# Tanglish case markers / particles that get glued onto nouns ("kovaila")
+TANGLISH_SUFFIXES = ("nala", "oda", "la", "le", "ku", "ke")
+
+STOPWORDS = frozenset({
+    # Tanglish particles
+    "la", "le", "ku", "ke", "nu", "da", "di", "na", "ah", "va", "oda", "nala",
+    # English function words
+    "a", "an", "the", "is", "are", "was", "in", "on", "at", "of", "to",
+    "and", "or", "for", "from", "by", "with", "due",
+})
+
+
+def normalize_latin(token: str) -> str:
+    """Collapses common Tanglish spelling variants to one form."""
+    token = token.replace("zh", "l")
+    token = ASPIRATE_RE.sub(r"\1", token)
+    return REPEAT_RE.sub(r"\1", token)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits mixed Tamil / English / Tanglish text into index terms.
+    """
+    terms: list[str] = []
+
+    for tok in TOKEN_RE.findall(text.lower()):
+        if TAMIL_RE.match(tok):
+            terms.append(tok)
+            if len(tok) > TAMIL_STEM_CHARS:
+                terms.append(tok[:TAMIL_STEM_CHARS])
+            continue
+
+        if tok in STOPWORDS:
+            continue
+
+        norm = normalize_latin(tok)
+        terms.append(norm)
+
+        if len(norm) > 5 and not norm.isdigit():
+            for suffix in TANGLISH_SUFFIXES:
+                if norm.endswith(suffix):
+                    terms.append(norm[: -len(suffix)])
+                    break
+
+    return terms
+
+
+# ------------------ INDEX ------------------ #
+
+@dataclass(frozen=True)
+class SparseIndex:
+    vocab: dict[str, int]
+    indptr: np.ndarray   # int64 [V + 1], postings of term t are [indptr[t], indptr[t+1])
+    doc_ids: np.ndarray  # int32 [nnz], row ids aligned with the FAISS index
+    weights: np.ndarray  # float32 [nnz], precomputed BM25 weight
+    n_docs: int
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        Returns BM25 scores for every chunk as a float32 array [n_docs].
+        """
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids:
+            return np.zeros(self.n_docs, dtype=np.float32)
+
+        spans = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.doc_ids[s] for s in spans])
+        weights = np.concatenate([self.weights[s] for s in spans])
+
+        scores = np.bincount(docs, weights=weights, minlength=self.n_docs)
+        return scores.astype(np.float32, copy=False)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns ids of the k highest non-zero scores, best first."""
+    k = min(k, int(np.count_nonzero(scores)))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    ids = np.argpartition(-scores, k - 1)[:k]
+    return ids[np.argsort(-scores[ids], kind="stable")]
+
+
+class SparseIndexBuilder:
+    """
+    Accumulates postings one chunk at a time, so texts can be streamed in
+    batches; only the postings themselves are held in memory.
+    """
+
+    def __init__(self, *, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: dict[str, int] = {}
+        self._rows: list[int] = []
+        self._cols: list[int] = []
+        self._tfs: list[int] = []
+        self._doc_lens: list[int] = []
+
+    def add(self, text: str) -> None:
+        doc_id = len(self._doc_lens)
+        terms = tokenize(text)
+        self._doc_lens.append(len(terms))
+        for term, tf in Counter(terms).items():
+            self._rows.append(self.vocab.setdefault(term, len(self.vocab)))
+            self._cols.append(doc_id)
+            self._tfs.append(tf)
+
+    def build(self) -> SparseIndex:
+        vocab, k1, b = self.vocab, self.k1, self.b
+        n_docs = len(self._doc_lens)
+        term_ids = np.asarray(self._rows, dtype=np.int64)
+        doc_ids = np.asarray(self._cols, dtype=np.int32)
+        tf = np.asarray(self._tfs, dtype=np.float32)
+        dl = np.asarray(self._doc_lens, dtype=np.float32)
+
+        avgdl = float(dl.mean()) if n_docs and dl.sum() else 1.0
+        df = np.bincount(term_ids, minlength=len(vocab)).astype(np.float32)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        norm = k1 * (1.0 - b + b * dl[doc_ids] / avgdl)
+        weights = idf[term_ids] * tf * (k1 + 1.0) / (tf + norm)
+
+        # Term-major (CSR) layout
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=indptr[1:])
+
+        return SparseIndex(
+            vocab=vocab,
+            indptr=indptr,
+            doc_ids=doc_ids[order],
+            weights=weights[order].astype(np.float32),
+            n_docs=n_docs,
+        )
+
+
+def build_sparse_index(
+    texts: Iterable[str],
+    *,
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> SparseIndex:
+    builder = SparseIndexBuilder(k1=k1, b=b)
+    for text in texts:
+        builder.add(text)
+    return builder.build()
+
+
+# ------------------ PERSISTENCE ------------------ #
+
+def save_sparse_index(sparse: SparseIndex, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    terms = sorted(sparse.vocab, key=sparse.vocab.__getitem__)
+
+    with path.open("wb") as f:
+        np.savez(
+            f,
+            terms=np.asarray(terms, dtype=np.str_),
+            indptr=sparse.indptr,
+            doc_ids=sparse.doc_ids,
+            weights=sparse.weights,
+            n_docs=np.asarray(sparse.n_docs, dtype=np.int64),
+        )
+
+
+def load_sparse_index(path: Path) -> SparseIndex:
+    with np.load(path, allow_pickle=False) as data:
+        terms = data["terms"].tolist()
+        return SparseIndex(
+            vocab={t: i for i, t in enumerate(terms)},
+            indptr=data["indptr"],
+            doc_ids=data["doc_ids"],
+            weights=data["weights"],
+            n_docs=int(data["n_docs"]),
+        )
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
@@ -16,53 +19,691 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from config import PATHS
+from config import INDEX, PATHS, RETRIEVAL, Index
+from embeddings.meta_store import (
+    DATE_MISSING,
+    MetaStore,
+    MetaStoreWriter,
+    date_to_days,
+    days_to_date,
+    load_meta_store,
+)
+from embeddings.sparse_index import SparseIndex, SparseIndexBuilder, load_sparse_index, save_sparse_index
 
 
 @dataclass(frozen=True)
 class VectorStore:
     index: faiss.Index
-    meta: list[dict[str, Any]]
+    meta: MetaStore
+
+    # Per-domain sub-indexes (IndexIDMap over global row ids) and their ids.
+    # Empty for stores built before domain partitioning.
+    domain_indexes: dict[str, faiss.Index] = field(default_factory=dict)
+    domain_ids: dict[str, np.ndarray] = field(default_factory=dict)
+
+    # Changes whenever the index is rebuilt; used to invalidate caches.
+    version: str = ""
+
+    # PCA / OPQ transform the index was built with (None: raw vectors).
+    projection: faiss.VectorTransform | None = None
+
+    # Time shards keyed by (day since epoch, domain): IndexIDMap over global
+    # row ids, like the domain sub-indexes. Expired days are not loaded.
+    time_shards: dict[tuple[int, str], faiss.Index] = field(default_factory=dict)
+    time_ids: dict[tuple[int, str], np.ndarray] = field(default_factory=dict)
+
+    # BM25 index of the same build (None if it was not built). Kept on the
+    # store so a hot reload swaps dense + sparse + metadata as one unit.
+    sparse: SparseIndex | None = None
+
+    def project(self, matrix: np.ndarray) -> np.ndarray:
+        """Maps [n, d] query embeddings into the index's vector space."""
+        if self.projection is None:
+            return matrix
+        return apply_projection(self.projection, matrix)
+
+    def vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Stored vectors of global row ids (decoded, in the projected space), L2-normalized."""
+        out = self.index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+        faiss.normalize_L2(out)
+        return out
+
+
+@dataclass(frozen=True)
+class IndexFiles:
+    """
+    Artifact locations inside one index directory. File names follow
+    config.Paths, so the default root (embeddings/) gives exactly the
+    PATHS locations.
+    """
+
+    root: Path = PATHS.embeddings_dir
+
+    @property
+    def faiss_index(self) -> Path:
+        return self.root / PATHS.faiss_index_path.name
+
+    @property
+    def meta_store(self) -> Path:
+        return self.root / PATHS.meta_store_dir.name
+
+    @property
+    def sparse_index(self) -> Path:
+        return self.root / PATHS.sparse_index_path.name
+
+    @property
+    def domain_dir(self) -> Path:
+        return self.root / PATHS.domain_index_dir.name
+
+    @property
+    def projection(self) -> Path:
+        return self.root / PATHS.projection_path.name
+
+    @property
+    def time_dir(self) -> Path:
+        return self.root / PATHS.time_index_dir.name
+
+    @property
+    def versions_dir(self) -> Path:
+        return self.root / PATHS.index_versions_dir.name
+
+    @property
+    def current_pointer(self) -> Path:
+        return self.root / PATHS.current_version_path.name
 
 
 def _ensure_parent_dir(p: Path) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _read_index(path: Path, params: Index = INDEX) -> faiss.Index:
+    # Flat / SQ / PQ / HNSW codes are mapped from the file instead of copied into RAM
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if params.mmap else 0
+    return faiss.read_index(str(path), flags)
+
+
+# ---------- VERSIONS ---------- #
+
+def current_version(root: Path = PATHS.embeddings_dir) -> str | None:
+    """Name of the live version under `root`, or None for an unversioned store."""
+    try:
+        return IndexFiles(root).current_pointer.read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_index_dir(root: Path = PATHS.embeddings_dir) -> Path:
+    """
+    Directory holding the live index files: versions/<CURRENT> for a
+    versioned store, otherwise `root` itself (legacy flat layout).
+    """
+    version = current_version(root)
+    return IndexFiles(root).versions_dir / version if version else root
+
+
+def publish_version(base: IndexFiles, staging: Path, name: str, keep: int) -> Path:
+    """
+    Makes a fully written build live: the staging directory is renamed to
+    versions/<name>, then the CURRENT pointer is replaced atomically.
+    Readers see either the old or the new version, never a partial one.
+    """
+    final = base.versions_dir / name
+    staging.rename(final)
+
+    tmp = base.current_pointer.with_name(base.current_pointer.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, base.current_pointer)
+
+    prune_versions(base, keep)
+    return final
+
+
+def prune_versions(base: IndexFiles, keep: int) -> list[str]:
+    """
+    Deletes all but the newest `keep` published versions (never the live
+    one). Processes still serving a deleted version keep their mapped files
+    until they reload.
+    """
+    live = current_version(base.root)
+    names = sorted(p.name for p in base.versions_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    stale = [n for n in names[: max(len(names) - keep, 0)] if n != live]
+
+    for name in stale:
+        shutil.rmtree(base.versions_dir / name, ignore_errors=True)
+    return stale
+
+
+# ---------- INDEX TYPES ---------- #
+
+_SQ_CODECS = {"flat": "Flat", "fp16": "SQfp16", "sq8": "SQ8", "sq4": "SQ4"}
+
+
+def _pq_string(d: int, params: Index) -> str:
+    if d % params.pq_m:
+        raise ValueError(f"pq_m={params.pq_m} must divide the embedding dim {d}")
+    return f"PQ{params.pq_m}x{params.pq_nbits}"
+
+
+def codec_string(d: int, n: int, params: Index = INDEX) -> str:
+    """FAISS storage codec for `params.codec`; PQ needs >= 2^nbits training vectors."""
+    if params.codec == "pq":
+        return _pq_string(d, params) if n >= 2 ** params.pq_nbits else "Flat"
+    if params.codec not in _SQ_CODECS:
+        raise ValueError(f"Unknown codec: {params.codec!r}")
+    return _SQ_CODECS[params.codec]
+
+
+def index_factory_string(d: int, n: int, params: Index = INDEX) -> str:
+    """
+    FAISS factory string for `params.index_type` at corpus size `n`, storing
+    vectors with `params.codec`. Small corpora always get an exhaustive index.
+    """
+    kind = params.index_type
+    codec = codec_string(d, n, params)
+    if kind == "flat" or n < params.min_vectors_for_ann:
+        return codec
+
+    nlist = params.nlist or max(1, int(4 * np.sqrt(n)))
+    # FAISS wants ~39 training points per IVF cell
+    nlist = max(1, min(nlist, n // 39))
+
+    if kind == "ivf_flat":
+        return f"IVF{nlist},{codec}"
+    if kind == "hnsw":
+        return f"HNSW{params.hnsw_m}" if codec == "Flat" else f"HNSW{params.hnsw_m}_{codec}"
+    if kind == "ivf_pq":
+        return f"IVF{nlist},{_pq_string(d, params)}"
+
+    raise ValueError(f"Unknown index_type: {kind!r}")
+
+
+def needs_training(params: Index = INDEX) -> bool:
+    """False only for exact float32 storage; every other type or codec is trained on a sample."""
+    return params.index_type != "flat" or params.codec != "flat"
+
+
+def make_index(d: int, n: int, params: Index = INDEX) -> faiss.Index:
+    """Empty inner-product index of the configured type, sized for n vectors."""
+    index = faiss.index_factory(d, index_factory_string(d, n, params), faiss.METRIC_INNER_PRODUCT)
+
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efConstruction = params.hnsw_ef_construction
+
+    return index
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, params: Index = INDEX) -> None:
+    """Trains IVF / PQ indexes on a random sample of at most params.train_sample vectors."""
+    if index.is_trained:
+        return
+
+    index.train(_training_sample(vectors, params))
+
+
+def _training_sample(vectors: np.ndarray, params: Index) -> np.ndarray:
+    if len(vectors) <= params.train_sample:
+        return vectors
+
+    rng = np.random.default_rng(0)
+    return vectors[np.sort(rng.choice(len(vectors), params.train_sample, replace=False))]
+
+
+def set_search_params(index: faiss.Index, params: Index = INDEX) -> None:
+    """Applies query-time knobs (nprobe / efSearch); no-op for flat indexes."""
+    ps = faiss.ParameterSpace()
+    base = faiss.downcast_index(index.index if isinstance(index, faiss.IndexIDMap) else index)
+
+    if isinstance(base, faiss.IndexIVF):
+        ps.set_index_parameter(index, "nprobe", params.nprobe)
+    elif isinstance(base, faiss.IndexHNSW):
+        ps.set_index_parameter(index, "efSearch", params.hnsw_ef_search)
+
+
+# ---------- PROJECTION ---------- #
+
+def train_projection(vectors: np.ndarray, params: Index = INDEX) -> faiss.VectorTransform | None:
+    """
+    Trains the PCA / OPQ transform from `params.projection`. Returns None
+    (no projection) when it is disabled or there are too few vectors to fit it.
+    """
+    if params.projection == "none":
+        return None
+
+    d, d_out = int(vectors.shape[1]), params.projection_dim
+    if len(vectors) <= max(d_out, 2 ** params.pq_nbits):
+        print(f"⚠️ {len(vectors)} vectors are too few to train {params.projection}{d_out}; storing raw vectors")
+        return None
+
+    sample = np.ascontiguousarray(_training_sample(vectors, params), dtype=np.float32)
+
+    if params.projection == "opq":
+        if d_out % params.pq_m:
+            raise ValueError(f"pq_m={params.pq_m} must divide projection_dim {d_out}")
+        opq = faiss.OPQMatrix(d, params.pq_m, d_out)
+        opq.train(sample)
+        return opq
+
+    if params.projection != "pca":
+        raise ValueError(f"Unknown projection: {params.projection!r}")
+
+    pca = faiss.PCAMatrix(d, d_out)
+    pca.train(sample)
+
+    # Keep only the [d_out, d] matrix + bias; PCAMatrix also stores the full d x d basis
+    transform = faiss.LinearTransform(d, d_out, True)
+    transform.A = pca.A
+    transform.b = pca.b
+    transform.is_trained = True
+    return transform
+
+
+def apply_projection(transform: faiss.VectorTransform, vectors: np.ndarray) -> np.ndarray:
+    """Projects and re-normalizes, so inner product stays a cosine similarity."""
+    out = transform.apply(np.ascontiguousarray(vectors, dtype=np.float32))
+    faiss.normalize_L2(out)
+    return out
+
+
+class _GrowingIndex:
+    """
+    A FAISS index fed batch by batch. Types and codecs that need training
+    (IVF, HNSW / flat with SQ or PQ codes) buffer the first `train_sample`
+    vectors (or the whole stream, if shorter), train once on them, and then
+    add everything else as it arrives, so a streamed build gets the same
+    index as one built from all vectors at once.
+
+    With a `template` (the main index), the trained but empty structure is
+    cloned from it instead, so domain sub-indexes and time shards share its
+    IVF cells and SQ / PQ codebooks rather than training their own on fewer
+    vectors. The clone is taken from a copy saved right after training,
+    before any vectors were added; exact flat indexes need no training and
+    are made empty with make_index. Sub-indexes buffer only until the
+    template is ready, then add straight away.
+    """
+
+    def __init__(
+        self,
+        *,
+        with_ids: bool,
+        expected_size: int = 0,
+        params: Index = INDEX,
+        template: _GrowingIndex | None = None,
+    ):
+        self.with_ids = with_ids
+        self.expected_size = expected_size
+        self.params = params
+        self.template = template
+        self.index: faiss.Index | None = None
+        # Trained copy taken before the first add; what sub-indexes are cloned from
+        self.empty: faiss.Index | None = None
+        self._buf: list[tuple[np.ndarray, np.ndarray | None]] = []
+        self._buffered = 0
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray | None = None) -> None:
+        if self.index is not None:
+            self._add(vectors, ids)
+            return
+
+        self._buf.append((vectors, ids))
+        self._buffered += len(vectors)
+
+        if self._ready():
+            self._materialize()
+
+    def finish(self) -> faiss.Index | None:
+        if self.index is None and self._buffered:
+            self._materialize()
+        return self.index
+
+    def _ready(self) -> bool:
+        if self.template is not None:
+            return self.template.index is not None
+        return not needs_training(self.params) or self._buffered >= self.params.train_sample
+
+    def _materialize(self) -> None:
+        vectors = np.concatenate([v for v, _ in self._buf])
+        ids = np.concatenate([i for _, i in self._buf]) if self.with_ids else None
+        self._buf.clear()
+
+        if self.template is not None and self.template.empty is not None:
+            # Cloning the filled template and reset() would keep its whole buffer allocated
+            index = faiss.clone_index(self.template.empty)
+        else:
+            n = max(len(vectors), self.expected_size)
+            index = make_index(int(vectors.shape[1]), n, self.params)
+            train_index(index, vectors, self.params)
+            if self.template is None and needs_training(self.params):
+                self.empty = faiss.clone_index(index)
+
+        self.index = faiss.IndexIDMap(index) if self.with_ids else index
+        self._add(vectors, ids)
+
+    def _add(self, vectors: np.ndarray, ids: np.ndarray | None) -> None:
+        if self.with_ids:
+            self.index.add_with_ids(vectors, ids)
+        else:
+            self.index.add(vectors)
+
+
+# ---------- DOMAIN SUB-INDEXES ---------- #
+
+def _domain_index_path(files: IndexFiles, domain: str) -> Path:
+    return files.domain_dir / f"{domain}.faiss"
+
+
+def _read_sub_index(path: Path) -> tuple[faiss.Index, np.ndarray]:
+    sub = _read_index(path)
+    set_search_params(sub)
+    return sub, faiss.vector_to_array(sub.id_map).astype(np.int64)
+
+
+def _load_domain_indexes(files: IndexFiles) -> tuple[dict[str, faiss.Index], dict[str, np.ndarray]]:
+    indexes: dict[str, faiss.Index] = {}
+    ids: dict[str, np.ndarray] = {}
+
+    if not files.domain_dir.exists():
+        return indexes, ids
+
+    for path in sorted(files.domain_dir.glob("*.faiss")):
+        indexes[path.stem], ids[path.stem] = _read_sub_index(path)
+
+    return indexes, ids
+
+
+# ---------- TIME SHARDS ---------- #
+
+# Time shard key for rows without a domain
+NO_DOMAIN = "unknown"
+
+
+def today_days() -> int:
+    """Current UTC date in the metadata store's unit (days since 1970-01-01)."""
+    return int(time.time() // 86400)
+
+
+def retention_cutoff(params: Index = INDEX, today: int | None = None) -> int | None:
+    """Oldest day kept under params.retention_days (None: no limit)."""
+    if params.retention_days is None:
+        return None
+    return (today_days() if today is None else today) - params.retention_days
+
+
+def _time_shard_path(files: IndexFiles, day: int, domain: str) -> Path:
+    return files.time_dir / days_to_date(day) / f"{domain}.faiss"
+
+
+def _load_time_shards(
+    files: IndexFiles, cutoff_day: int | None
+) -> tuple[dict[tuple[int, str], faiss.Index], dict[tuple[int, str], np.ndarray]]:
+    shards: dict[tuple[int, str], faiss.Index] = {}
+    ids: dict[tuple[int, str], np.ndarray] = {}
+
+    if not files.time_dir.exists():
+        return shards, ids
+
+    for path in sorted(files.time_dir.glob("*/*.faiss")):
+        day = date_to_days(path.parent.name)
+        if day == DATE_MISSING or (cutoff_day is not None and day < cutoff_day):
+            continue
+        key = (day, path.stem)
+        shards[key], ids[key] = _read_sub_index(path)
+
+    return shards, ids
+
+
+# ---------- WRITING ---------- #
+
+class IndexWriter:
+    """
+    Writes the vector store incrementally: each add() appends a batch of
+    vectors + metadata to the main index, the per-domain sub-indexes and
+    per-(day, domain) time shards (IndexIDMap keyed by global row id), the
+    BM25 postings and the columnar metadata store. Nothing is written to
+    the index files until close().
+
+    Chunks dated before the retention cutoff (params.retention_days) are
+    skipped and counted in `expired`.
+
+    With a PCA / OPQ projection configured, vectors are held back until
+    `train_sample` of them (or the whole stream) have arrived, the
+    projection is trained on them, and everything is indexed projected.
+
+    Usage:
+        with IndexWriter() as writer:
+            for vectors, metas in batches:
+                writer.add(vectors, metas)
+
+    `root` defaults to embeddings/; pass another directory to build a
+    separate store (e.g. benchmark corpora).
+
+    With versioned=True the build goes to a staging directory under
+    root/versions/ and is published on close() by an atomic swap of
+    root/CURRENT (see publish_version), so running readers never see a
+    half-written index and can hot-reload it (rag/retrieve.py).
+    """
+
+    def __init__(
+        self,
+        *,
+        expected_size: int = 0,
+        root: Path = PATHS.embeddings_dir,
+        params: Index = INDEX,
+        versioned: bool = False,
+    ):
+        self.base = IndexFiles(root)
+        self.version: str | None = None
+        if versioned:
+            self.version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            root = self.base.versions_dir / f".building-{self.version}"
+
+        self.files = IndexFiles(root)
+        self.params = params
+        self._main = _GrowingIndex(with_ids=False, expected_size=expected_size, params=params)
+        self._domains: dict[str, _GrowingIndex] = {}
+        self._time: dict[tuple[int, str], _GrowingIndex] = {}
+        self._cutoff = retention_cutoff(params)
+        self.expired = 0
+        self._sparse = SparseIndexBuilder(k1=RETRIEVAL.bm25_k1, b=RETRIEVAL.bm25_b)
+        self._n = 0
+
+        self.projection: faiss.VectorTransform | None = None
+        self._projection_ready = params.projection == "none"
+        self._pending: list[tuple[np.ndarray, np.ndarray, list[str | None], list[int]]] = []
+        self._pending_n = 0
+
+        self._meta = MetaStoreWriter(self.files.meta_store)
+
+    def __enter__(self) -> IndexWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self.version is not None:
+            # A failed versioned build never becomes visible
+            shutil.rmtree(self.files.root, ignore_errors=True)
+
+    @property
+    def count(self) -> int:
+        return self._n
+
+    def add(self, vectors: np.ndarray, meta: list[dict[str, Any]]) -> None:
+        if vectors.ndim != 2:
+            raise ValueError("index_vectors must be a 2D array [n, d]")
+        if len(meta) != vectors.shape[0]:
+            raise ValueError("meta length must match number of vectors")
+
+        days = [date_to_days(m.get("date")) for m in meta]
+        if self._cutoff is not None:
+            keep = [i for i, day in enumerate(days) if day == DATE_MISSING or day >= self._cutoff]
+            if len(keep) < len(meta):
+                self.expired += len(meta) - len(keep)
+                vectors, meta, days = vectors[keep], [meta[i] for i in keep], [days[i] for i in keep]
+            if not meta:
+                return
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.arange(self._n, self._n + len(meta), dtype=np.int64)
+        domains = [m.get("domain") for m in meta]
+
+        if self._projection_ready:
+            self._add_vectors(vectors, ids, domains, days)
+        else:
+            self._pending.append((vectors, ids, domains, days))
+            self._pending_n += len(vectors)
+            if self._pending_n >= self.params.train_sample:
+                self._train_projection()
+
+        for m in meta:
+            self._meta.add(m)
+            self._sparse.add(m.get("text") or "")
+            self._n += 1
+
+    def _add_vectors(
+        self, vectors: np.ndarray, ids: np.ndarray, domains: list[str | None], days: list[int]
+    ) -> None:
+        if self.projection is not None:
+            vectors = apply_projection(self.projection, vectors)
+        trained = self._main.index is not None
+        self._main.add(vectors)
+
+        self._add_partitioned(self._domains, [d or None for d in domains], vectors, ids)
+        if self.params.time_shards:
+            keys = [
+                None if day == DATE_MISSING else (day, domain or NO_DOMAIN)
+                for day, domain in zip(days, domains)
+            ]
+            self._add_partitioned(self._time, keys, vectors, ids)
+
+        if not trained and self._main.index is not None:
+            # The main index was just trained: sub-indexes holding raw vectors
+            # until then are cloned from it now instead of at close()
+            for sub in [*self._domains.values(), *self._time.values()]:
+                sub.finish()
+
+    def _add_partitioned(self, parts: dict, keys: list, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Routes rows to the sub-index of their key (None: not partitioned)."""
+        rows_by_key: dict[Any, list[int]] = {}
+        for i, key in enumerate(keys):
+            if key is not None:
+                rows_by_key.setdefault(key, []).append(i)
+
+        for key, rows in rows_by_key.items():
+            sub = parts.get(key)
+            if sub is None:
+                sub = parts[key] = _GrowingIndex(with_ids=True, params=self.params, template=self._main)
+            sub.add(vectors[rows], ids[rows])
+
+    def _train_projection(self) -> None:
+        self.projection = train_projection(np.concatenate([v for v, *_ in self._pending]), self.params)
+        self._projection_ready = True
+
+        pending, self._pending = self._pending, []
+        for vectors, ids, domains, days in pending:
+            self._add_vectors(vectors, ids, domains, days)
+
+    def close(self) -> None:
+        self._meta.close()
+        if not self._projection_ready:
+            self._train_projection()
+
+        index = self._main.finish()
+        if index is None:
+            raise ValueError("No vectors were written")
+
+        files = self.files
+        files.root.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(index, str(files.faiss_index))
+
+        files.domain_dir.mkdir(parents=True, exist_ok=True)
+        for stale in files.domain_dir.glob("*.faiss"):
+            stale.unlink()
+        for domain, sub in self._domains.items():
+            faiss.write_index(sub.finish(), str(_domain_index_path(files, domain)))
+
+        if files.time_dir.exists():
+            shutil.rmtree(files.time_dir)
+        for (day, domain), sub in sorted(self._time.items()):
+            path = _time_shard_path(files, day, domain)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            faiss.write_index(sub.finish(), str(path))
+
+        save_sparse_index(self._sparse.build(), files.sparse_index)
+
+        if self.projection is not None:
+            faiss.write_VectorTransform(self.projection, str(files.projection))
+        elif files.projection.exists():
+            files.projection.unlink()
+
+        if self.version is not None:
+            self.files = IndexFiles(publish_version(self.base, files.root, self.version, self.params.keep_versions))
+
+
 def build_and_save(index_vectors: np.ndarray, meta: list[dict[str, Any]]) -> None:
     """
-    Saves a cosine-similarity FAISS index (IndexFlatIP) and metadata.
-    Assumes vectors are already L2-normalized.
+    Saves a cosine-similarity FAISS index (type, projection and codec from
+    config.Index; exact IndexFlatIP by default), per-domain sub-indexes,
+    metadata and the BM25 sparse index used for hybrid retrieval.
+    Assumes vectors are already L2-normalized. The build is published as
+    a new version under embeddings/versions/.
     """
     if index_vectors.ndim != 2:
         raise ValueError("index_vectors must be a 2D array [n, d]")
     if len(meta) != index_vectors.shape[0]:
         raise ValueError("meta length must match number of vectors")
 
-    d = int(index_vectors.shape[1])
-    index = faiss.IndexFlatIP(d)
-    index.add(index_vectors.astype(np.float32, copy=False))
+    with IndexWriter(expected_size=len(meta), versioned=True) as writer:
+        writer.add(index_vectors, meta)
 
-    PATHS.embeddings_dir.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(PATHS.faiss_index_path))
 
-    _ensure_parent_dir(PATHS.meta_path)
-    with PATHS.meta_path.open("w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False, indent=2)
-
-
-def load() -> VectorStore:
-    if not PATHS.faiss_index_path.exists():
-        raise FileNotFoundError(
-            f"FAISS index not found: {PATHS.faiss_index_path}. Run `python embeddings/embed.py`."
-        )
-    if not PATHS.meta_path.exists():
+def load(root: Path = PATHS.embeddings_dir) -> VectorStore:
+    """
+    Loads the live index under `root` (the CURRENT version of a versioned
+    store, else the files in `root`) with its metadata, sub-indexes and
+    BM25 index.
+    """
+    version = current_version(root)
+    files = IndexFiles(resolve_index_dir(root))
+    if not files.faiss_index.exists():
         raise FileNotFoundError(
-            f"Metadata not found: {PATHS.meta_path}. Run `python embeddings/embed.py`."
+            f"FAISS index not found: {files.faiss_index}. Run `python embeddings/embed.py`."
         )
 
-    index = faiss.read_index(str(PATHS.faiss_index_path))
-    with PATHS.meta_path.open("r", encoding="utf-8") as f:
-        meta = json.load(f)
-    return VectorStore(index=index, meta=meta)
+    meta = load_meta_store(files.meta_store)
+    stat = files.faiss_index.stat()
+    index = _read_index(files.faiss_index)
+    set_search_params(index)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # Lets VectorStore.vectors() reconstruct by row id (MMR in rag/retrieve.py)
+        ivf.make_direct_map()
+
+    projection = None
+    if files.projection.exists():
+        projection = faiss.read_VectorTransform(str(files.projection))
+
+    # A published build is never modified: rows past the retention window are
+    # dropped by the writer at build time, and shards that aged past it since
+    # are only skipped here (the next build drops their rows everywhere)
+    domain_indexes, domain_ids = _load_domain_indexes(files)
+    time_shards, time_ids = _load_time_shards(files, retention_cutoff())
+
+    # Missing sparse index -> dense-only retrieval
+    sparse = load_sparse_index(files.sparse_index) if files.sparse_index.exists() else None
 
+    return VectorStore(
+        index=index,
+        meta=meta,
+        domain_indexes=domain_indexes,
+        domain_ids=domain_ids,
+        version=version or f"{stat.st_mtime_ns}-{stat.st_size}",
+        projection=projection,
+        time_shards=time_shards,
+        time_ids=time_ids,
+        sparse=sparse,
+    )
@@ -6,15 +6,32 @@ Input:
 
 Output:
 - data/processed/cleaned.json
+
+Files are cleaned sequentially by default. With --workers N (or
+config.Ingest.workers) they are cleaned in a process pool instead: each
+.json file, and each line-aligned byte range of a large .jsonl file, is
+one shard. Shards are merged back in order, so the output and doc_ids are
+identical to the sequential build, and records are written to disk as
+they arrive rather than collected into one list.
+
+Usage (from project root):
+    python ingest/build_corpus.py
+    python ingest/build_corpus.py --workers 0 --shard-mb 16   # 0 = one worker per CPU
 """
 
 from __future__ import annotations
 
+import argparse
+import io
 import json
+import os
 import re
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import islice
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, TextIO
 import sys
 
 # Ensure project root on path
@@ -22,7 +39,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from config import PATHS
+from config import INGEST, PATHS
 
 
 # ------------------ CLEANING ------------------ #
@@ -39,12 +56,27 @@ def clean_text(text: str) -> str:
 
 # ------------------ FILE ITERATORS ------------------ #
 
+def _iter_lines(f: TextIO) -> Iterable[dict[str, Any]]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
 def _iter_jsonl(path: Path) -> Iterable[dict[str, Any]]:
     with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                yield json.loads(line)
+        yield from _iter_lines(f)
+
+
+def _iter_jsonl_range(path: Path, start: int, end: int) -> Iterable[dict[str, Any]]:
+    """Like _iter_jsonl, for the line-aligned byte range [start, end)."""
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    # Same text-mode line splitting as the sequential reader
+    with io.TextIOWrapper(io.BytesIO(data), encoding="utf-8") as f:
+        yield from _iter_lines(f)
 
 
 def _iter_json(path: Path) -> Iterable[dict[str, Any]]:
@@ -131,10 +163,7 @@ def normalize_record(
 
 # ------------------ MAIN PIPELINE ------------------ #
 
-def build_corpus() -> list[dict[str, Any]]:
-    PATHS.data_processed_dir.mkdir(parents=True, exist_ok=True)
-
-    records: list[dict[str, Any]] = []
+def list_raw_files() -> list[Path]:
     raw_files = (
         sorted(PATHS.data_raw_dir.glob("*.json"))
         + sorted(PATHS.data_raw_dir.glob("*.jsonl"))
@@ -143,6 +172,11 @@ def build_corpus() -> list[dict[str, Any]]:
     if not raw_files:
         raise FileNotFoundError(f"No raw files found in {PATHS.data_raw_dir}")
 
+    return raw_files
+
+
+def iter_corpus_records(raw_files: Iterable[Path]) -> Iterable[NormalizedRecord]:
+    """Yields cleaned records file by file, in a deterministic order."""
     for path in raw_files:
         fallback_source = path.stem
         fallback_domain = infer_domain_from_filename(path)
@@ -160,14 +194,151 @@ def build_corpus() -> list[dict[str, Any]]:
             )
 
             if rec:
-                records.append(rec.__dict__)
+                yield rec
+
+
+# ------------------ PARALLEL BUILD ------------------ #
+
+@dataclass(frozen=True)
+class Shard:
+    """A whole raw file, or a line-aligned byte range [start, end) of a JSONL file."""
+    path: Path
+    start: int = 0
+    end: int | None = None
+
+
+def plan_shards(raw_files: Iterable[Path], shard_bytes: int) -> list[Shard]:
+    """Splits JSONL files larger than shard_bytes at line boundaries; other files stay whole."""
+    shards = []
+    for path in raw_files:
+        size = path.stat().st_size
+        if path.suffix.lower() != ".jsonl" or size <= shard_bytes:
+            shards.append(Shard(path))
+            continue
+
+        bounds = [0]
+        with path.open("rb") as f:
+            while bounds[-1] + shard_bytes < size:
+                f.seek(bounds[-1] + shard_bytes)
+                f.readline()  # skip to the start of the next line
+                if f.tell() >= size:
+                    break
+                bounds.append(f.tell())
+        bounds.append(size)
+
+        shards.extend(Shard(path, a, b) for a, b in zip(bounds, bounds[1:]))
+    return shards
+
+
+def _clean_shard(shard: Shard) -> tuple[list[tuple[int, NormalizedRecord]], int]:
+    """
+    Worker: cleans one shard.
+    Returns (shard-local object index, record) pairs and the number of raw
+    objects read, so the parent can assign file-global doc_ids.
+    """
+    path = shard.path
+    fallback_domain = infer_domain_from_filename(path)
+
+    if shard.end is None:
+        objects = iter_raw_records(path)
+    else:
+        objects = _iter_jsonl_range(path, shard.start, shard.end)
+
+    out = []
+    n = 0
+    for obj in objects:
+        rec = normalize_record(
+            obj,
+            doc_id="",
+            fallback_source=path.stem,
+            fallback_domain=fallback_domain,
+        )
+        if rec:
+            out.append((n, rec))
+        n += 1
+
+    return out, n
+
+
+def iter_corpus_records_parallel(
+    raw_files: Iterable[Path],
+    *,
+    workers: int = INGEST.workers,
+    shard_bytes: int = INGEST.shard_mb * 2**20,
+) -> Iterable[NormalizedRecord]:
+    """
+    Same records, order and doc_ids as iter_corpus_records, cleaned in a
+    process pool. At most 2 * workers shards are in flight or waiting to be
+    merged, so memory does not grow with the corpus.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from iter_corpus_records(raw_files)
+        return
+
+    shards = iter(plan_shards(raw_files, shard_bytes))
+    offsets: dict[Path, int] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque((s, pool.submit(_clean_shard, s)) for s in islice(shards, 2 * workers))
+        try:
+            while pending:
+                shard, future = pending.popleft()
+                records, n_objects = future.result()
+
+                nxt = next(shards, None)
+                if nxt is not None:
+                    pending.append((nxt, pool.submit(_clean_shard, nxt)))
+
+                stem = shard.path.stem
+                offset = offsets.get(shard.path, 0)
+                for i, rec in records:
+                    yield replace(rec, doc_id=f"{stem}:{offset + i}")
+                offsets[shard.path] = offset + n_objects
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def write_json_array(items: Iterable[dict[str, Any]], path: Path) -> int:
+    """
+    Writes items as a JSON array one at a time; the bytes match
+    json.dump(list(items), f, ensure_ascii=False, indent=2).
+    """
+    n = 0
+    with path.open("w", encoding="utf-8") as f:
+        for item in items:
+            f.write("[\n  " if n == 0 else ",\n  ")
+            # indent=2 only emits newlines between tokens (string newlines are escaped)
+            f.write(json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            n += 1
+        f.write("\n]" if n else "[]")
+    return n
+
+
+def build_corpus(
+    *,
+    workers: int = INGEST.workers,
+    shard_bytes: int = INGEST.shard_mb * 2**20,
+) -> int:
+    """Writes data/processed/cleaned.json and returns the number of records."""
+    PATHS.data_processed_dir.mkdir(parents=True, exist_ok=True)
+
+    records = iter_corpus_records_parallel(list_raw_files(), workers=workers, shard_bytes=shard_bytes)
+    n = write_json_array((rec.__dict__ for rec in records), PATHS.cleaned_path)
+
+    print(f"Wrote {n} cleaned records to {PATHS.cleaned_path}")
+    return n
+
 
-    with PATHS.cleaned_path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build data/processed/cleaned.json from data/raw")
+    parser.add_argument("--workers", type=int, default=INGEST.workers, help="1 = sequential, 0 = one per CPU")
+    parser.add_argument("--shard-mb", type=float, default=INGEST.shard_mb, help="JSONL byte-range shard size")
+    args = parser.parse_args()
 
-    print(f"Wrote {len(records)} cleaned records to {PATHS.cleaned_path}")
-    return records
+    build_corpus(workers=args.workers, shard_bytes=int(args.shard_mb * 2**20))
 
 
 if __name__ == "__main__":
-    build_corpus()
+    main()
@@ -6,11 +6,24 @@ Input:
 
 Output:
 - data/processed/chunks.json
+
+Near-duplicate chunks (reposts, lightly edited copies) are dropped on the
+way out; see ingest/dedup.py and config.Dedup.
+
+Chunks are computed as char offsets into the record (chunk_spans). The
+chunk dicts passed down the pipeline carry a copy of their text for dedup
+and the encoder, but chunks.json / chunks.jsonl store only the offsets:
+load_chunks() slices the text back out of cleaned.json, so the overlap
+sentence of adjacent chunks is not written twice. The index metadata store
+shares it the same way (embeddings/meta_store.py).
 """
 
 from __future__ import annotations
 
 import json
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from typing import Iterable
 
 import sys
@@ -22,10 +35,47 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from config import PATHS
+from ingest.dedup import NearDuplicateFilter, dedup_chunks
+from rag.tokens import count_tokens
 
 
 CHUNK_WORDS = 200
+# The next chunk repeats up to OVERLAP_SENTENCES whole trailing sentences, at most OVERLAP_WORDS words
 OVERLAP_WORDS = 50
+OVERLAP_SENTENCES = 1
+
+# Latin tokens whose trailing "." does not end a sentence
+ABBREVIATIONS = (
+    "dr", "mr", "mrs", "ms", "st", "no", "nos", "vs", "etc", "approx", "govt",
+    "dept", "rd", "jn", "opp", "nr", "ltd", "pvt", "co", "km", "hrs", "min", "rs",
+)
+
+_CLOSERS = "\"'\u201d\u2019)\\]"
+# Checked after the mark, so the regex only looks back at candidate sentence ends.
+# One lookbehind per abbreviation length (a lookbehind must be fixed-width).
+_NOT_ABBREVIATION = "".join(
+    rf"(?<!\s(?i:{group})\.)(?<!^(?i:{group})\.)"
+    for group in (
+        "|".join(a for a in ABBREVIATIONS if len(a) == n)
+        for n in sorted({len(a) for a in ABBREVIATIONS})
+    )
+)
+
+# Sentence end (the match ends where the sentence does):
+# - ! ? … (plus closing quotes / brackets) before whitespace
+# - "." likewise, unless it follows a Latin initial / abbreviation ("R.S.",
+#   "a.m.", "Dr."). Tanglish often starts sentences in lowercase, so case
+#   is not used; Tamil words end sentences with "." and take no exception.
+# One character class rather than an alternation lets the regex engine skip
+# ahead to candidate marks; the lookbehinds all end in "\." and so never
+# reject "!" / "?" / "…".
+BREAK_RE = re.compile(
+    rf"[.!?\u2026](?<![\s.][A-Za-z]\.)(?<!^[A-Za-z]\.){_NOT_ABBREVIATION}"
+    rf"[.!?\u2026]*[{_CLOSERS}]*(?=\s)"
+)
+# ... and the end of a line (only searched when the text has line breaks)
+LINE_END_RE = re.compile(r"(?<=\S)[^\S\n]*$", re.MULTILINE)
+WORD_RE = re.compile(r"\S+")
 
 
 def chunk_words(words: list[str], *, chunk_words: int, overlap_words: int) -> Iterable[list[str]]:
@@ -42,42 +92,156 @@ def chunk_words(words: list[str], *, chunk_words: int, overlap_words: int) -> It
         yield window
 
 
-def chunk_text(text: str) -> Iterable[str]:
-    words = text.split()
+# ------------------ SENTENCES ------------------ #
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    """Char offsets (start, end) of the sentences of `text`, whitespace excluded."""
+    return _sentences(text)[0]
+
+
+def _sentences(text: str) -> tuple[list[tuple[int, int]], list[int]]:
+    """sentence_spans(text) and the word count of each sentence, in one pass."""
+    ends = [m.end() for m in BREAK_RE.finditer(text)]
+    if "\n" in text:
+        ends = sorted(set(ends).union(m.start() for m in LINE_END_RE.finditer(text)))
+    ends.append(len(text.rstrip()))
+
+    spans, words, prev = [], [], 0
+    for end in ends:
+        seg = text[prev:end]
+        n = len(seg.split())
+        # Whitespace-only segments (e.g. between a break and a line end) are dropped
+        if n:
+            spans.append((prev + len(seg) - len(seg.lstrip()), end))
+            words.append(n)
+        prev = end
+    return spans, words
+
+
+# ------------------ CHUNKING ------------------ #
+
+def chunk_spans(text: str) -> list[tuple[int, int]]:
+    """
+    Char offsets (start, end) of the chunks of `text`. Chunks are runs of
+    whole sentences of at most CHUNK_WORDS words. The next chunk starts with
+    the last OVERLAP_SENTENCES sentences of the previous one, as far as they
+    fit in OVERLAP_WORDS (none when the last sentence alone is longer). A
+    sentence longer than CHUNK_WORDS is cut into word windows with
+    OVERLAP_WORDS overlap.
+    """
+    # Most reports are one short window: no sentence split needed
+    if len(text) <= 2 * CHUNK_WORDS or len(text.split()) <= CHUNK_WORDS:
+        end = len(text.rstrip())
+        return [(len(text) - len(text.lstrip()), end)] if end else []
+
+    sents, words = _sentences(text)
+    # Sentence i is words [cum[i], cum[i + 1]) of the text; windows are found by bisection
+    cum = [0, *accumulate(words)]
+
+    out = []
+    i, n = 0, len(sents)
+    while i < n:
+        j = bisect_right(cum, cum[i] + CHUNK_WORDS) - 1
+        if j == i:
+            out.extend(_split_sentence(text, *sents[i]))
+            i += 1
+            continue
+
+        out.append((sents[i][0], sents[j - 1][1]))
+        if j == n:
+            break
+
+        # Overlap: trailing sentences of [i, j), if the next chunk still takes sentence j
+        k = max(bisect_left(cum, cum[j] - OVERLAP_WORDS), j - OVERLAP_SENTENCES, i + 1)
+        i = k if k < j and cum[j + 1] - cum[k] <= CHUNK_WORDS else j
+
+    return out
+
+
+def _split_sentence(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Word windows (char offsets) over one sentence longer than CHUNK_WORDS."""
+    words = [m.span() for m in WORD_RE.finditer(text, start, end)]
+    out = []
     for window in chunk_words(words, chunk_words=CHUNK_WORDS, overlap_words=OVERLAP_WORDS):
-        yield " ".join(window)
+        out.append((window[0][0], window[-1][1]))
+        if window[-1] == words[-1]:
+            break
+    return out
 
 
-def build_chunks() -> list[dict]:
-    with PATHS.cleaned_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+def chunk_text(text: str) -> Iterable[str]:
+    for start, end in chunk_spans(text):
+        yield text[start:end]
 
-    chunks: list[dict] = []
 
-    for doc in data:
+def iter_chunks(docs: Iterable[dict]) -> Iterable[dict]:
+    """
+    Yields chunk dicts (with preserved metadata) for each cleaned record.
+    `text` is a copy of record_text[char_start:char_end]; stored_chunk()
+    drops it before the chunk is written.
+    """
+    for doc in docs:
         doc_id = doc.get("doc_id") or ""
         text = doc.get("text") or ""
 
-        j = 0
-        for chunk in chunk_text(text):
-            chunks.append(
-                {
-                    "doc_id": doc_id,
-                    "chunk_id": f"{doc_id}#c{j}",
-                    "text": chunk,
-
-                    # ✅ PRESERVE METADATA
-                    "domain": doc.get("domain"),
-                    "source": doc.get("source"),
-                    "date": doc.get("date"),
-                    "url": doc.get("url"),
-                }
-            )
-            j += 1
+        for j, (start, end) in enumerate(chunk_spans(text)):
+            chunk = text[start:end]
+            yield {
+                "doc_id": doc_id,
+                "chunk_id": f"{doc_id}#c{j}",
+                "text": chunk,
+                "n_tokens": count_tokens(chunk),
+                # Char offsets of the chunk in the record's text
+                "char_start": start,
+                "char_end": end,
+
+                # ✅ PRESERVE METADATA
+                "domain": doc.get("domain"),
+                "source": doc.get("source"),
+                "date": doc.get("date"),
+                "url": doc.get("url"),
+            }
+
+
+# ------------------ CHUNK FILES ------------------ #
+
+def stored_chunk(chunk: dict) -> dict:
+    """The chunk as written to chunks.json / chunks.jsonl: offsets, no text."""
+    return {k: v for k, v in chunk.items() if k != "text"}
+
+
+def load_chunks(chunks_path: Path = PATHS.chunks_path, records_path: Path = PATHS.cleaned_path) -> list[dict]:
+    """
+    Reads chunks.json and restores each chunk's text from its record in
+    cleaned.json through char_start / char_end. Chunk files written before
+    offsets were stored still carry their text and are returned as is.
+    """
+    with chunks_path.open("r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    if all("text" in c for c in chunks):
+        return chunks
+
+    with records_path.open("r", encoding="utf-8") as f:
+        texts = {r.get("doc_id") or "": r.get("text") or "" for r in json.load(f)}
+
+    for c in chunks:
+        if "text" not in c:
+            c["text"] = texts[c["doc_id"]][c["char_start"] : c["char_end"]]
+    return chunks
+
+
+def build_chunks() -> list[dict]:
+    with PATHS.cleaned_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    dedup = NearDuplicateFilter()
+    chunks = list(dedup_chunks(iter_chunks(data), dedup_filter=dedup))
+    if dedup.dropped:
+        print(f"Dropped {dedup.dropped} near-duplicate chunks")
 
     PATHS.data_processed_dir.mkdir(parents=True, exist_ok=True)
     with PATHS.chunks_path.open("w", encoding="utf-8") as f:
-        json.dump(chunks, f, ensure_ascii=False, indent=2)
+        json.dump([stored_chunk(c) for c in chunks], f, ensure_ascii=False, indent=2)
 
     print(f"Wrote {len(chunks)} chunks to {PATHS.chunks_path}")
     return chunks
@@ -0,0 +1,145 @@
+"""
+Near-duplicate collapsing of chunks with MinHash + LSH.
+
+The raw sources repeat the same report many times: reposts, forwards and
+lightly edited copies of one news item. Each chunk's text is lowercased,
+stripped of punctuation and split into character shingles (so Tamil
+script and Tanglish are handled the same way), then summarized by a
+MinHash signature. Signatures are split into LSH bands; chunks of the same
+domain that share a band bucket are compared, and a chunk whose estimated
+Jaccard similarity to an earlier kept chunk reaches DEDUP.threshold is
+dropped. The first chunk of every cluster is kept, so the output stays
+deterministic.
+
+The same report written in Tamil script and in Tanglish shares no
+shingles; those copies are collapsed at query time by the embedding-space
+MMR step in rag/retrieve.py.
+
+Usage:
+    chunks = dedup_chunks(iter_chunks(records))   # generator, one pass
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import DEDUP, Dedup
+
+
+# ------------------ SIGNATURES ------------------ #
+
+# Anything but letters, digits, whitespace and the Tamil block (its vowel signs are not \w)
+PUNCT_RE = re.compile(r"[^\w\s\u0B80-\u0BFF]+")
+WS_RE = re.compile(r"\s+")
+
+_PRIME = (1 << 31) - 1
+
+
+def normalize_for_hashing(text: str) -> str:
+    text = PUNCT_RE.sub(" ", text.lower())
+    return WS_RE.sub(" ", text).strip()
+
+
+def shingles(text: str, n: int) -> set[str]:
+    text = normalize_for_hashing(text)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class MinHasher:
+    """num_perm universal hash functions (a * x + b) mod p over CRC32 shingle hashes."""
+
+    def __init__(self, num_perm: int, *, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, items: set[str]) -> np.ndarray:
+        if not items:
+            return np.full(len(self.a), _PRIME, dtype=np.uint64)
+
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64, count=len(items))
+        x %= _PRIME
+        # a, x < 2^31 -> a * x + b fits in uint64
+        return ((np.outer(x, self.a) + self.b) % _PRIME).min(axis=0)
+
+
+# ------------------ LSH FILTER ------------------ #
+
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate check: is_duplicate(chunk) is True when an
+    earlier chunk of the same domain is at least params.threshold similar.
+    Only signatures of kept chunks and their band buckets are held.
+    """
+
+    def __init__(self, params: Dedup = DEDUP):
+        if params.num_perm % params.bands:
+            raise ValueError(f"bands={params.bands} must divide num_perm={params.num_perm}")
+
+        self.params = params
+        self.rows = params.num_perm // params.bands
+        self.hasher = MinHasher(params.num_perm)
+
+        self._signatures: list[np.ndarray] = []
+        self._buckets: dict[tuple, list[int]] = {}
+        self.kept = 0
+        self.dropped = 0
+
+    def _keys(self, domain, sig: np.ndarray) -> list[tuple]:
+        r = self.rows
+        return [(domain, band, sig[band * r : (band + 1) * r].tobytes()) for band in range(self.params.bands)]
+
+    def is_duplicate(self, chunk: dict) -> bool:
+        sig = self.hasher.signature(shingles(chunk.get("text") or "", self.params.shingle_chars))
+        keys = self._keys(chunk.get("domain"), sig)
+
+        seen = set()
+        for key in keys:
+            for j in self._buckets.get(key, ()):
+                if j in seen:
+                    continue
+                seen.add(j)
+                if np.mean(self._signatures[j] == sig) >= self.params.threshold:
+                    self.dropped += 1
+                    return True
+
+        j = len(self._signatures)
+        self._signatures.append(sig)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(j)
+        self.kept += 1
+        return False
+
+
+def dedup_chunks(
+    chunks: Iterable[dict],
+    params: Dedup = DEDUP,
+    *,
+    dedup_filter: NearDuplicateFilter | None = None,
+) -> Iterator[dict]:
+    """
+    Yields chunks, skipping near-duplicates of earlier ones (pass-through
+    when params.enabled is False). Pass `dedup_filter` to read its
+    kept / dropped counts afterwards.
+    """
+    if not params.enabled:
+        yield from chunks
+        return
+
+    f = dedup_filter or NearDuplicateFilter(params)
+    for chunk in chunks:
+        if not f.is_duplicate(chunk):
+            yield chunk
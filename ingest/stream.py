@@ -0,0 +1,140 @@
+"""
+End-to-end streaming build with bounded memory:
+
+    raw JSON / JSONL -> normalize_record -> chunk_text -> dedup -> batched LaBSE encode -> index
+
+Every stage is a generator, so records flow through one batch at a time and
+nothing waits for the previous stage to finish. Intermediate outputs are
+written as JSONL while they stream past, and each encoded batch is appended
+to the vector store via embeddings/vector_store.IndexWriter, which publishes
+the build as a new index version once it is complete.
+
+Each batch is encoded through the embedding cache (embeddings/
+embedding_cache.py, keyed by content_key as in embeddings/embed.py), so a
+periodic refresh only encodes chunks that are new or changed.
+
+Memory is bounded by the batch size plus the index and the embedding cache
+(and, for IVF /
+PQ index types and SQ / PQ codecs, the training sample buffered before the
+first add; domain sub-indexes and time shards start adding as soon as the
+main index is trained).
+
+Usage (from project root):
+    python ingest/stream.py --batch-size 256
+    python ingest/stream.py --workers 4    # clean raw files in a process pool
+
+Outputs:
+- data/processed/cleaned.jsonl
+- data/processed/chunks.jsonl (char offsets into cleaned.jsonl, no text)
+- embeddings/versions/<version>/ (index.faiss, meta/, ...) + embeddings/CURRENT
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import INGEST, MODELS, PATHS
+from embeddings.embed import iter_indexable_chunks
+from ingest.build_corpus import iter_corpus_records_parallel, list_raw_files
+from ingest.chunk import iter_chunks, stored_chunk
+from ingest.dedup import dedup_chunks
+
+T = TypeVar("T")
+
+
+# ------------------ STAGES ------------------ #
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    if size <= 0:
+        raise ValueError("batch size must be > 0")
+
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def tee_jsonl(
+    items: Iterable[dict[str, Any]],
+    path: Path,
+    stored: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Passes items through unchanged while appending each one (or stored(item))
+    to a JSONL file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(stored(item) if stored else item, ensure_ascii=False))
+            f.write("\n")
+            yield item
+
+
+def iter_cleaned_dicts(raw_files: Iterable[Path], *, workers: int = INGEST.workers) -> Iterator[dict[str, Any]]:
+    for rec in iter_corpus_records_parallel(raw_files, workers=workers):
+        yield rec.__dict__
+
+
+# ------------------ PIPELINE ------------------ #
+
+def run_streaming(*, batch_size: int = MODELS.encode_batch_size, workers: int = INGEST.workers) -> int:
+    """
+    Runs the full ingest -> embed pipeline in streaming mode.
+    Returns the number of chunks indexed.
+    """
+    # Heavy imports only when actually building
+    import numpy as np
+    from embeddings.embedding_cache import StreamingCache, load_cache, save_cache
+    from embeddings.vector_store import IndexWriter
+    from rag.encoder_backends import encoder_id, load_encoder
+
+    model = None
+
+    def encode(texts):
+        # Only loaded once a batch has chunks that are not in the cache
+        nonlocal model
+        if model is None:
+            model = load_encoder(MODELS.encoder_backend)
+        return model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+    cache = StreamingCache(load_cache(PATHS.embedding_cache_path, encoder_id(MODELS.encoder_backend)), encode)
+
+    records = tee_jsonl(iter_cleaned_dicts(list_raw_files(), workers=workers), PATHS.cleaned_jsonl_path)
+    chunks = tee_jsonl(dedup_chunks(iter_chunks(records)), PATHS.chunks_jsonl_path, stored_chunk)
+
+    with IndexWriter(versioned=True) as writer:
+        for batch in batched(iter_indexable_chunks(chunks), batch_size):
+            vectors = cache.encode([c["text"] for c in batch])
+            writer.add(np.asarray(vectors, dtype=np.float32), batch)
+            print(f"Indexed {writer.count} chunks", end="\r")
+
+    # Saved only once the build is published, like embed.py
+    updated, stats = cache.finish()
+    save_cache(updated, PATHS.embedding_cache_path)
+
+    print(f"\nIndexed {writer.count} chunks into {writer.files.root}")
+    print(f"Embedding cache: {stats.hits} reused, {stats.encoded} encoded, {stats.removed} removed")
+    return writer.count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming raw -> chunks -> embeddings build")
+    parser.add_argument("--batch-size", type=int, default=MODELS.encode_batch_size)
+    parser.add_argument("--workers", type=int, default=INGEST.workers, help="cleaning processes (0 = one per CPU)")
+    args = parser.parse_args()
+
+    run_streaming(batch_size=args.batch_size, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
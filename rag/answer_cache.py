@@ -0,0 +1,156 @@
+# rag/answer_cache.py
+# Semantic answer cache: near-identical questions over the same evidence reuse one LLM answer.
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from config import CACHE
+from rag.encoder import QueryEmbedding
+
+
+@dataclass
+class _Entry:
+    key: tuple
+    vector: np.ndarray
+    answer: str
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of generated answers.
+
+    A lookup hits when an unexpired entry has the same detected domain and
+    the same retrieved chunk ids, and its query embedding has cosine
+    similarity >= `similarity` with the new query. Entries are dropped when
+    the vector store version changes (index rebuilt).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = CACHE.answer_max_entries,
+        ttl_seconds: float = CACHE.answer_ttl_seconds,
+        similarity: float = CACHE.answer_similarity,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[int, _Entry] = OrderedDict()
+        self._by_key: dict[tuple, list[int]] = {}
+        self._next_id = 0
+        self._version: str | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(domain: str | None, docs: list[dict]) -> tuple:
+        return (domain, tuple(d.get("chunk_id") for d in docs))
+
+    def get(self, query_emb: QueryEmbedding, key: tuple, *, version: str | None = None) -> str | None:
+        with self._lock:
+            self._check_version(version)
+            now = self._clock()
+
+            best_id, best_sim = None, self.similarity
+            for entry_id in list(self._by_key.get(key, ())):
+                entry = self._lru[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+
+                sim = float(entry.vector @ query_emb.vector)
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._lru.move_to_end(best_id)
+            self.hits += 1
+            return self._lru[best_id].answer
+
+    def put(self, query_emb: QueryEmbedding, key: tuple, answer: str, *, version: str | None = None) -> None:
+        with self._lock:
+            self._check_version(version)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._lru[entry_id] = _Entry(
+                key=key,
+                vector=query_emb.vector,
+                answer=answer,
+                expires_at=self._clock() + self.ttl_seconds,
+            )
+            self._by_key.setdefault(key, []).append(entry_id)
+
+            while len(self._lru) > self.max_entries:
+                self._remove(next(iter(self._lru)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._by_key.clear()
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._lru),
+        }
+
+    def _check_version(self, version: str | None) -> None:
+        # Caller holds the lock
+        if version is not None and version != self._version:
+            self._lru.clear()
+            self._by_key.clear()
+            self._version = version
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._lru.pop(entry_id)
+        bucket = self._by_key[entry.key]
+        bucket.remove(entry_id)
+        if not bucket:
+            del self._by_key[entry.key]
+
+
+def cached_answer(
+    cache: AnswerCache,
+    query_emb: QueryEmbedding,
+    domain: str | None,
+    docs: list[dict],
+    generate: Callable[[], str | None],
+    *,
+    version: str | None = None,
+) -> str | None:
+    """
+    Returns a cached answer or calls `generate()`. Only non-None answers are
+    stored, so fallbacks used while the LLM is failing are never cached.
+    """
+    if not CACHE.enabled or not docs:
+        return generate()
+
+    key = cache.make_key(domain, docs)
+    answer = cache.get(query_emb, key, version=version)
+    if answer is not None:
+        return answer
+
+    answer = generate()
+    if answer is not None:
+        cache.put(query_emb, key, answer, version=version)
+    return answer
@@ -0,0 +1,185 @@
+# rag/context_pack.py
+# Token-budgeted prompt context: overlap-aware window merging, sentence selection, trimming.
+
+"""
+pack_context(query, docs) turns retrieved docs into the report passages
+of a prompt, within config.Context's token budget:
+
+1. Overlapping windows are merged. ingest/chunk.py cuts a document into
+   windows that repeat the previous window's last sentence, so two
+   adjacent windows of the same doc_id (chunk ids <doc_id>#c<j> and
+   #c<j+1>) become one passage with the shared words kept once. The
+   passage scores as its best window.
+2. If every passage fits the budget, they are used as is. The token count
+   comes from the per-chunk n_tokens stored at ingest, so nothing is
+   re-counted on this path.
+3. Otherwise passages are split into sentences. Each sentence is scored by
+   its passage's retrieval score plus query_term_weight times the share of
+   query terms it contains, exact duplicates are dropped, and sentences are
+   taken best first while they fit. One that does not fit is cut to the
+   remaining budget (ending in "…") when at least min_trim_tokens remain.
+
+Kept sentences are emitted in document order, one passage per report,
+passages in retrieval order.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+from config import CONTEXT
+from rag import tracing
+from rag.keyword_matcher import normalize
+from rag.tokens import count_tokens, trim_to_tokens
+
+# "- " bullet + newline per report line in the prompt
+LINE_TOKENS = 2
+
+_WINDOW_RE = re.compile(r"#c(\d+)$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    passages: list[str]   # one per report, in retrieval order
+    tokens: int           # estimated tokens, LINE_TOKENS per passage included
+    trimmed: bool         # sentences were dropped or cut to fit
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _stems(text: str) -> set[str]:
+    # 5-character prefixes: "raining" meets "rain", "கோவையில்" meets "கோவை"
+    return {w[:5] for w in normalize(text).split() if len(w) >= 3}
+
+
+# ---------------- WINDOW MERGING ---------------- #
+
+def _window(doc) -> int | None:
+    m = _WINDOW_RE.search(doc.get("chunk_id") or "")
+    return int(m.group(1)) if m and doc.get("doc_id") else None
+
+
+def _overlap(a: list[str], b: list[str]) -> int:
+    """Longest m such that the last m words of a are the first m words of b."""
+    for m in range(min(len(a), len(b)), 0, -1):
+        if a[-m:] == b[:m]:
+            return m
+    return 0
+
+
+def _merge_run(run) -> tuple[int, str, float, int]:
+    """(first position, text, score, tokens) of consecutive windows [(j, position, doc)]."""
+    words = run[0][2]["text"].split()
+    prev = words
+    shared = []
+    for _, _, d in run[1:]:
+        new = d["text"].split()
+        m = _overlap(prev, new)
+        words += new[m:]
+        shared += new[:m]
+        prev = new
+
+    tokens = sum(_tokens(d) for _, _, d in run) - count_tokens(" ".join(shared))
+    return min(pos for _, pos, _ in run), " ".join(words), max(_score(d) for _, _, d in run), tokens
+
+
+def _score(doc) -> float:
+    return float(doc.get("score") or 0.0)
+
+
+def _tokens(doc) -> int:
+    n = doc.get("n_tokens")
+    return count_tokens(doc["text"]) if n is None else int(n)
+
+
+def merge_windows(docs) -> list[tuple[str, float, int]]:
+    """(text, score, tokens) per passage, in the order of each passage's first doc."""
+    spans = []
+    windows = defaultdict(list)     # doc_id -> [(j, position, doc)]
+    for pos, d in enumerate(docs):
+        j = _window(d)
+        if j is None:
+            spans.append((pos, d["text"], _score(d), _tokens(d)))
+        else:
+            windows[d["doc_id"]].append((j, pos, d))
+
+    for group in windows.values():
+        group.sort(key=lambda w: w[0])
+        run = [group[0]]
+        for w in group[1:]:
+            if w[0] == run[-1][0]:
+                continue
+            if w[0] != run[-1][0] + 1:
+                spans.append(_merge_run(run))
+                run = []
+            run.append(w)
+        spans.append(_merge_run(run))
+
+    spans.sort(key=lambda s: s[0])
+    return [(text, score, tokens) for _, text, score, tokens in spans]
+
+
+# ---------------- PACKING ---------------- #
+
+def pack_context(query: str, docs, budget: int | None = None) -> PackedContext:
+    """Report passages for the prompt, within `budget` estimated tokens."""
+    budget = CONTEXT.prompt_token_budget if budget is None else budget
+
+    with tracing.span("pack_context"):
+        spans = merge_windows(docs[: CONTEXT.max_docs])
+
+        total = sum(tokens + LINE_TOKENS for _, _, tokens in spans)
+        if total <= budget:
+            packed = PackedContext([text for text, _, _ in spans], total, False)
+        else:
+            packed = _select_sentences(query, spans, budget)
+
+    tracing.incr("context_tokens", packed.tokens)
+    if packed.trimmed:
+        tracing.incr("context_trimmed")
+    return packed
+
+
+def _select_sentences(query, spans, budget) -> PackedContext:
+    terms = _stems(query)
+
+    candidates = []     # (relevance, span, position, sentence, tokens)
+    for s, (text, score, _) in enumerate(spans):
+        for p, sentence in enumerate(split_sentences(text)):
+            overlap = len(terms & _stems(sentence)) / len(terms) if terms else 0.0
+            relevance = score + CONTEXT.query_term_weight * overlap
+            candidates.append((relevance, s, p, sentence, count_tokens(sentence)))
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+
+    chosen: dict[int, list[tuple[int, str]]] = {}
+    seen = set()
+    used = 0
+    for _, s, p, sentence, tokens in candidates:
+        key = normalize(sentence)
+        if key in seen:
+            continue
+
+        # A span's first sentence also pays for its report line
+        cost = tokens + (0 if s in chosen else LINE_TOKENS)
+        if used + cost > budget:
+            left = budget - used - (0 if s in chosen else LINE_TOKENS)
+            if left < CONTEXT.min_trim_tokens:
+                continue
+            # One token is kept for the ellipsis that marks the cut
+            sentence = trim_to_tokens(sentence, left - 1)
+            if not sentence:
+                continue
+            sentence += "…"
+            cost = count_tokens(sentence) + (0 if s in chosen else LINE_TOKENS)
+
+        seen.add(key)
+        chosen.setdefault(s, []).append((p, sentence))
+        used += cost
+
+    passages = [" ".join(x for _, x in sorted(chosen[s])) for s in sorted(chosen)]
+    return PackedContext(passages, used, True)
@@ -1,32 +1,326 @@
 # domain_detect.py
-from sentence_transformers import SentenceTransformer, util
-
-# Load LaBSE once
-model = SentenceTransformer("sentence-transformers/LaBSE")
-
-# Domain labels (THIS is not hardcoding logic, just class names)
-DOMAINS = {
-    "transport": "bus, metro, train, transport, perundhu, strike, delay",
-    "traffic": "traffic, jam, road, congestion, signal, accident",
-    "water": "water, thanni, water problem, drinking water, pipeline",
-    "power": "power cut, current cut, electricity, tneb",
-    "weather": "rain, cyclone, flood, weather, climate"
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import DOMAIN_DETECTION
+from rag.encoder import QueryEmbedding, encode_queries, encode_query, encode_texts
+from rag import tracing
+from rag.keyword_matcher import KeywordMatcher
+from rag.lazy import Lazy
+
+# ---------------- TIER 1: KEYWORDS ---------------- #
+
+# keyword -> weight per domain (THIS is not hardcoding logic, just a lexicon).
+# English, Tanglish spellings and Tamil script; see rag/keyword_matcher.py for
+# the syntax ("*" = word prefix). 0.5 = weak evidence that needs a second hit.
+DOMAIN_KEYWORDS = {
+    "transport": {
+        "bus": 1.0, "buses": 1.0, "bus stand": 1.0, "perundhu": 1.0, "perunthu": 1.0,
+        "metro": 1.0, "train": 1.0, "trains": 1.0, "railway*": 1.0, "mtc": 1.0, "tnstc": 1.0,
+        "strike": 1.0, "auto": 0.5, "flight*": 1.0, "airport": 1.0, "delay*": 0.5, "transport": 1.0,
+        "பேருந்து": 1.0, "ரயில்": 1.0, "இரயில்": 1.0, "மெட்ரோ": 1.0,
+        "வேலைநிறுத்தம்": 1.0, "போக்குவரத்து": 0.5,
+    },
+    "traffic": {
+        "traffic": 1.0, "jam*": 1.0, "congestion": 1.0, "nerisal": 1.0, "accident*": 1.0,
+        "vibathu": 1.0, "flyover": 1.0, "diversion": 1.0, "signal": 0.5, "road": 0.5,
+        "நெரிசல்": 1.0, "விபத்து": 1.0, "போக்குவரத்து நெரிசல்": 1.5, "சாலை": 0.5,
+    },
+    "water": {
+        "water": 1.0, "thanni": 1.0, "tanni": 1.0, "kudineer": 1.0, "kudi neer": 1.0,
+        "drinking water": 1.5, "water supply": 1.5, "pipeline": 1.0, "pipe": 0.5,
+        "borewell": 1.0, "tanker": 1.0, "sewage": 1.0, "drainage": 0.5,
+        "குடிநீர்": 1.0, "தண்ணீர்": 1.0, "தண்ணி": 1.0, "குழாய்": 0.5,
+    },
+    "power": {
+        "power": 1.0, "power cut": 1.5, "powercut": 1.5,
+        # Bare "current" is also the English adjective ("current status"): weak
+        # alone, full weight in the phrases that mean a power cut
+        "current": 0.5, "current cut": 1.5, "current pochu": 1.5, "current poyiduchu": 1.5,
+        "current illa": 1.5, "current varala": 1.5, "current eppo varum": 1.5,
+        "electricity": 1.0, "eb": 1.0, "tneb": 1.0, "tangedco": 1.0, "transformer": 1.0,
+        "voltage": 1.0, "blackout": 1.0, "shutdown": 0.5,
+        "மின்தடை": 1.0, "மின் தடை": 1.0, "மின்வெட்டு": 1.0, "மின்சாரம்": 1.0,
+    },
+    "weather": {
+        "rain*": 1.0, "mazhai": 1.0, "malai": 0.5, "cyclone*": 1.0, "flood*": 1.0,
+        "weather": 1.0, "climate": 1.0, "storm*": 1.0, "thunder*": 1.0, "imd": 1.0,
+        "heatwave": 1.0, "heat wave": 1.0, "temperature": 1.0, "veyil": 1.0, "umbrella": 0.5,
+        # "water logging" is rain, not supply: the longer match wins over "water"
+        "waterlogging": 1.5, "water logging": 1.5, "water stagnation": 1.5,
+        "மழை": 1.0, "கனமழை": 1.0, "புயல்": 1.0, "வெள்ளம்": 1.0, "வானிலை": 1.0,
+    },
 }
 
-# Precompute embeddings
-domain_names = list(DOMAINS.keys())
-domain_texts = list(DOMAINS.values())
-domain_embeddings = model.encode(domain_texts, normalize_embeddings=True)
+_keyword_matcher = Lazy(
+    "keyword_matcher",
+    lambda: KeywordMatcher(
+        (kw, domain, weight) for domain, kws in DOMAIN_KEYWORDS.items() for kw, weight in kws.items()
+    ),
+)
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    return _keyword_matcher.get()
+
+
+# ---------------- TIER 2: EXEMPLARS ---------------- #
+
+# A few example reports per domain; a query is compared with each of them.
+DOMAIN_EXEMPLARS = {
+    "transport": [
+        "bus, metro, train, transport, perundhu, strike, delay",
+        "Government buses not running today due to the transport workers strike",
+        "metro train services delayed on the airport line",
+        "perundhu varala, bus stand la romba kootam",
+        "பேருந்து சேவை இன்று நிறுத்தம்",
+    ],
+    "traffic": [
+        "traffic, jam, road, congestion, signal, accident",
+        "Heavy traffic jam near the flyover after an accident",
+        "road diversion due to construction, vehicles moving slowly",
+        "signal work aagala, vandi ellam nikkuthu",
+        "சாலையில் கடும் போக்குவரத்து நெரிசல்",
+    ],
+    "water": [
+        "water, thanni, water problem, drinking water, pipeline",
+        "Drinking water supply will be suspended for pipeline maintenance",
+        "no water in taps for three days, tanker lorry not coming",
+        "veetla thanni varala, corporation ku complaint pannanum",
+        "குடிநீர் விநியோகம் நாளை நிறுத்தப்படும்",
+    ],
+    "power": [
+        "power cut, current cut, electricity, tneb",
+        "Scheduled power shutdown for maintenance from 9 am to 2 pm",
+        "transformer failure, whole street without electricity",
+        "current pochu, fan odala, eppo varum",
+        "இன்று மின்தடை அறிவிப்பு",
+    ],
+    "weather": [
+        "rain, cyclone, flood, weather, climate",
+        "Heavy rain warning issued, low lying areas may flood",
+        "cyclone expected to make landfall near the coast tomorrow",
+        "semma mazhai, roads ellam thanni nikkuthu",
+        "கனமழை எச்சரிக்கை விடுக்கப்பட்டுள்ளது",
+    ],
+}
+
+domain_names = list(DOMAIN_EXEMPLARS.keys())
+
+# Exemplars are embedded domain after domain: _exemplar_slices[i] are domain i's rows
+_exemplar_texts = [t for d in domain_names for t in DOMAIN_EXEMPLARS[d]]
+_exemplar_slices = []
+_row = 0
+for _d in domain_names:
+    _exemplar_slices.append(slice(_row, _row + len(DOMAIN_EXEMPLARS[_d])))
+    _row += len(DOMAIN_EXEMPLARS[_d])
+
+# Precomputed on first use (needs the encoder)
+_domain_embeddings = Lazy("domain_embeddings", lambda: encode_texts(_exemplar_texts))
+
+
+def get_domain_embeddings():
+    return _domain_embeddings.get()
+
+
+# ---------------- CLASSIFY ---------------- #
+
+@dataclass(frozen=True)
+class DomainPrediction:
+    domain: str
+    tier: str       # "keyword" or "embedding"
+    score: float    # summed keyword weight, or exemplar cosine
+
+
+def _text(query: str | QueryEmbedding) -> str:
+    return query.text if isinstance(query, QueryEmbedding) else query
+
+
+def _keyword_scores(query: str | QueryEmbedding) -> dict[str, float]:
+    """Summed keyword weight per matched domain ({} with the keyword tier off)."""
+    if not DOMAIN_DETECTION.use_keywords:
+        return {}
+
+    with tracing.span("detect_domain_keywords"):
+        return get_keyword_matcher().scores(_text(query))
+
+
+def keyword_domain(query: str | QueryEmbedding) -> DomainPrediction | None:
+    """
+    Tier 1: returns a prediction when the keyword matcher is confident
+    (config.DomainDetection), else None. No encoder call.
+    """
+    scores = _keyword_scores(query)
+    if not scores:
+        return None
+
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    best, score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    if score < DOMAIN_DETECTION.keyword_min_score or score - runner_up < DOMAIN_DETECTION.keyword_margin:
+        return None
+    return DomainPrediction(best, "keyword", score)
+
+
+def _exemplar_scores(matrix: np.ndarray) -> np.ndarray:
+    """[n, d] query embeddings -> [n, n_domains] mean cosine to each domain's top-n exemplars."""
+    # Both sides are L2-normalized, so the dot product is the cosine similarity.
+    sims = matrix @ get_domain_embeddings().T
+    top_n = DOMAIN_DETECTION.exemplar_top_n
+    out = np.empty((len(matrix), len(domain_names)), dtype=np.float32)
+    for i, sl in enumerate(_exemplar_slices):
+        block = np.sort(sims[:, sl], axis=1)
+        out[:, i] = block[:, -top_n:].mean(axis=1)
+    return out
+
+
+def classify_domain(query: str | QueryEmbedding) -> DomainPrediction:
+    """
+    Tiered domain classification: the keyword matcher answers when it is
+    confident; only ambiguous queries are encoded (unless already a
+    QueryEmbedding) and compared with the domain exemplars.
+    """
+    pred = keyword_domain(query)
+    if pred is not None:
+        tracing.incr("domain_tier_keyword")
+        return pred
+
+    query_emb = encode_query(query)
+    with tracing.span("detect_domain"):
+        scores = _exemplar_scores(query_emb.as_matrix())[0]
+        best_idx = int(scores.argmax())
 
+    tracing.incr("domain_tier_embedding")
+    return DomainPrediction(domain_names[best_idx], "embedding", float(scores[best_idx]))
 
-def detect_domain(query: str) -> str:
+
+def classify_domain_batch(
+    queries: list[str | QueryEmbedding],
+    batch_size: int | None = None,
+) -> list[DomainPrediction]:
+    """
+    Batched classify_domain(): keyword tier per query, then one encoder
+    pass and one matrix product for the queries it left undecided.
     """
-    Detects best matching domain using embedding similarity.
+    preds: list[DomainPrediction | None] = [keyword_domain(q) for q in queries]
+    pending = [i for i, p in enumerate(preds) if p is None]
+    tracing.incr("domain_tier_keyword", len(queries) - len(pending))
+
+    if pending:
+        query_embs = encode_queries([queries[i] for i in pending], batch_size=batch_size)
+        with tracing.span("detect_domain"):
+            scores = _exemplar_scores(np.stack([q.vector for q in query_embs]))
+            best = scores.argmax(axis=1)
+
+        tracing.incr("domain_tier_embedding", len(pending))
+        for row, i in enumerate(pending):
+            j = int(best[row])
+            preds[i] = DomainPrediction(domain_names[j], "embedding", float(scores[row, j]))
+
+    return preds  # type: ignore[return-value]
+
+
+def detect_domain(query: str | QueryEmbedding) -> str:
+    """
+    Detects the best matching domain (see classify_domain).
+    Accepts a raw query or a QueryEmbedding from rag.encoder.encode_query.
     Returns domain name.
     """
-    query_emb = model.encode(query, normalize_embeddings=True)
+    return classify_domain(query).domain
+
+
+def detect_domain_batch(
+    queries: list[str | QueryEmbedding],
+    batch_size: int | None = None,
+) -> list[str]:
+    """Batched detect_domain()."""
+    if not queries:
+        return []
+    return [p.domain for p in classify_domain_batch(queries, batch_size=batch_size)]
+
+
+# ---------------- MULTI-LABEL ROUTING ---------------- #
+
+@dataclass(frozen=True)
+class DomainScores:
+    """Calibrated probability per domain (independent, need not sum to 1)."""
+    scores: dict[str, float]
+    tier: str       # "keyword" or "embedding"
+
+    def routed(
+        self,
+        threshold: float | None = None,
+        max_domains: int | None = None,
+    ) -> dict[str, float]:
+        """
+        Domains at or above `threshold` (DOMAIN_DETECTION.route_threshold),
+        best first, at most `max_domains`. Falls back to the single best
+        domain, so there is always at least one.
+        """
+        threshold = DOMAIN_DETECTION.route_threshold if threshold is None else threshold
+        max_domains = max_domains or DOMAIN_DETECTION.max_route_domains
+
+        ranked = sorted(self.scores.items(), key=lambda kv: kv[1], reverse=True)
+        picked = [(d, p) for d, p in ranked if p >= threshold][:max_domains]
+        return dict(picked or ranked[:1])
+
+
+def _keyword_probabilities(scores: dict[str, float]) -> dict[str, float]:
+    # 1 - 0.5 ** (w / half): 0.5 at keyword_half_weight, approaching 1 with more hits
+    half = DOMAIN_DETECTION.keyword_half_weight
+    return {d: 1.0 - 0.5 ** (scores.get(d, 0.0) / half) for d in domain_names}
+
+
+def _embedding_probabilities(exemplar_scores: np.ndarray) -> np.ndarray:
+    # Platt scaling of the exemplar cosine; see benchmarks/routing_benchmark.py --fit
+    z = (exemplar_scores - DOMAIN_DETECTION.embedding_center) / DOMAIN_DETECTION.embedding_temperature
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def domain_scores_batch(
+    queries: list[str | QueryEmbedding],
+    batch_size: int | None = None,
+) -> list[DomainScores]:
+    """
+    Multi-label domain_scores() for many queries. Queries with a keyword
+    hit of at least keyword_min_score are scored from their keywords, so
+    "rain la current cut and traffic jam" gets weather, power and traffic.
+    The rest share one encoder pass and are scored from the exemplars.
+    """
+    out: list[DomainScores | None] = []
+    pending = []
+    for i, q in enumerate(queries):
+        kw = _keyword_scores(q)
+        if kw and max(kw.values()) >= DOMAIN_DETECTION.keyword_min_score:
+            out.append(DomainScores(_keyword_probabilities(kw), "keyword"))
+        else:
+            out.append(None)
+            pending.append(i)
+    tracing.incr("domain_tier_keyword", len(queries) - len(pending))
+
+    if pending:
+        query_embs = encode_queries([queries[i] for i in pending], batch_size=batch_size)
+        with tracing.span("detect_domain"):
+            probs = _embedding_probabilities(_exemplar_scores(np.stack([q.vector for q in query_embs])))
+
+        tracing.incr("domain_tier_embedding", len(pending))
+        for row, i in enumerate(pending):
+            out[i] = DomainScores({d: float(p) for d, p in zip(domain_names, probs[row])}, "embedding")
+
+    return out  # type: ignore[return-value]
+
+
+def domain_scores(query: str | QueryEmbedding) -> DomainScores:
+    """
+    Calibrated probability for every domain. Use .routed() for the domains
+    worth searching (see rag.retrieve.retrieve_routed).
+    """
+    return domain_scores_batch([query])[0]
 
-    scores = util.cos_sim(query_emb, domain_embeddings)[0]
-    best_idx = int(scores.argmax())
 
-    return domain_names[best_idx]
+def route_domains(query: str | QueryEmbedding) -> dict[str, float]:
+    """Domains to search for `query` with their probabilities, best first."""
+    return domain_scores(query).routed()
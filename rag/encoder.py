@@ -0,0 +1,92 @@
+# rag/encoder.py
+# Shared query encoder: one LaBSE instance per process, one forward pass per query.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import MODELS
+from rag import tracing
+from rag.lazy import Lazy
+
+
+# ---------------- LOAD MODEL ---------------- #
+
+def _load_model():
+    # Imported here so that importing rag.* does not pull in torch.
+    from rag.encoder_backends import load_encoder
+
+    return load_encoder(MODELS.encoder_backend)
+
+
+_model = Lazy("encoder", _load_model)
+
+
+def get_model():
+    """
+    Returns the shared SentenceTransformer (backend from MODELS.encoder_backend),
+    loading it on first use.
+    """
+    return _model.get()
+
+
+# ---------------- QUERY EMBEDDING ---------------- #
+
+@dataclass(frozen=True)
+class QueryEmbedding:
+    """
+    A query and its L2-normalized embedding, computed once per request and
+    shared by domain detection and FAISS search.
+    """
+    text: str
+    vector: np.ndarray  # shape [d], float32
+
+    def as_matrix(self) -> np.ndarray:
+        """Returns the embedding as a [1, d] float32 matrix for FAISS."""
+        return self.vector.reshape(1, -1)
+
+
+def encode_texts(texts: list[str], batch_size: int | None = None) -> np.ndarray:
+    """
+    Encodes texts into a [n, d] float32 matrix of normalized embeddings.
+    """
+    model = get_model()
+
+    with tracing.span("encode"):
+        embs = model.encode(
+            texts,
+            batch_size=batch_size or MODELS.encode_batch_size,
+            normalize_embeddings=True,
+        )
+    return np.asarray(embs, dtype=np.float32)
+
+
+def encode_query(query: str | QueryEmbedding) -> QueryEmbedding:
+    """
+    Encodes a query once. Passing an existing QueryEmbedding returns it as-is,
+    so callers can hand either a string or a pre-encoded query downstream.
+    """
+    if isinstance(query, QueryEmbedding):
+        return query
+    return QueryEmbedding(text=query, vector=encode_texts([query])[0])
+
+
+def encode_queries(
+    queries: list[str | QueryEmbedding],
+    batch_size: int | None = None,
+) -> list[QueryEmbedding]:
+    """
+    Batched encode_query(): all raw strings go through the encoder together;
+    already-encoded queries are passed through.
+    """
+    raw = [i for i, q in enumerate(queries) if not isinstance(q, QueryEmbedding)]
+    out = list(queries)
+
+    if raw:
+        vectors = encode_texts([queries[i] for i in raw], batch_size=batch_size)
+        for i, vec in zip(raw, vectors):
+            out[i] = QueryEmbedding(text=queries[i], vector=vec)
+
+    return out
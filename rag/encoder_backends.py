@@ -0,0 +1,77 @@
+# rag/encoder_backends.py
+# CPU encoder backends for LaBSE: fp32 torch, dynamic int8 torch, ONNX Runtime (fp32 / int8).
+
+"""
+Every backend returns a SentenceTransformer, so callers keep the same
+`encode(texts, batch_size=..., normalize_embeddings=True)` contract. Only
+the transformer forward pass changes; LaBSE's pooling, dense layer and
+normalization run as before.
+
+    torch       fp32 PyTorch (default)
+    torch_int8  torch.quantization.quantize_dynamic on every nn.Linear
+    onnx        ONNX Runtime export of the transformer
+    onnx_int8   ONNX Runtime with dynamically quantized int8 weights
+
+ONNX exports are written once to PATHS.onnx_encoder_dir and reused. They
+need `pip install "sentence-transformers[onnx]"` (optimum + onnxruntime).
+
+Vectors from different backends are close but not identical: switching
+MODELS.encoder_backend requires rebuilding the index, and the embedding
+cache keeps separate entries per backend (encoder_id()).
+"""
+
+from __future__ import annotations
+
+from config import MODELS, PATHS
+
+BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+
+
+def encoder_id(backend: str = MODELS.encoder_backend) -> str:
+    """Model name + backend; the fp32 backend keeps the bare model name."""
+    return MODELS.embed_model_name if backend == "torch" else f"{MODELS.embed_model_name}#{backend}"
+
+
+def _onnx_file(quantized: bool) -> str:
+    return f"onnx/model_qint8_{MODELS.onnx_quantization}.onnx" if quantized else "onnx/model.onnx"
+
+
+def export_onnx(*, quantized: bool) -> None:
+    """Exports LaBSE to ONNX (and optionally an int8 copy) under PATHS.onnx_encoder_dir."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    out_dir = PATHS.onnx_encoder_dir
+    if not (out_dir / _onnx_file(False)).exists():
+        # backend="onnx" on a hub model exports on the fly; save it once
+        model = SentenceTransformer(MODELS.embed_model_name, backend="onnx", device="cpu")
+        model.save_pretrained(str(out_dir))
+
+    if quantized and not (out_dir / _onnx_file(True)).exists():
+        model = SentenceTransformer(str(out_dir), backend="onnx", device="cpu")
+        export_dynamic_quantized_onnx_model(model, MODELS.onnx_quantization, str(out_dir))
+
+
+def load_encoder(backend: str = MODELS.encoder_backend):
+    """Loads the embedding model for `backend` (one of BACKENDS)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {BACKENDS}")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(MODELS.embed_model_name)
+
+    if backend == "torch_int8":
+        import torch
+
+        model = SentenceTransformer(MODELS.embed_model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    quantized = backend == "onnx_int8"
+    export_onnx(quantized=quantized)
+    return SentenceTransformer(
+        str(PATHS.onnx_encoder_dir),
+        backend="onnx",
+        device="cpu",
+        model_kwargs={"file_name": _onnx_file(quantized)},
+    )
@@ -1,16 +1,54 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration
+# rag/generate.py
+# Local flan-t5 generation engine: the offline answer path when Gemini is unavailable.
 
-MODEL_NAME = "google/flan-t5-small"
+"""
+CPU engine for MODELS.generate_model_name (google/flan-t5-small), tuned by
+config.Generation:
+- fast (Rust) tokenizer; the fixed instruction text around the context and
+  the question is tokenized once, and every request only tokenizes its own
+  context + question (one batched tokenizer call per batch)
+- the context, not the question, is truncated to fit max_input_tokens
+  (a backstop: app.py packs the context to CONTEXT.local_token_budget
+  with rag/context_pack.py first)
+- dynamic int8 quantization of every nn.Linear (quantize=True)
+- batching: concurrent generate_answer() calls that arrive within
+  max_wait_ms share one padded model.generate (up to max_batch)
+- encoder-output reuse: the encoder runs once per distinct prompt. Repeats
+  (the same question over the same docs, e.g. a retry or a second session)
+  and duplicates inside a batch reuse cached encoder outputs. Decoding uses
+  the KV cache, so each new token only attends over cached keys / values.
 
-tokenizer = T5Tokenizer.from_pretrained(
-    MODEL_NAME,
-    use_fast=False
-)
+T5's encoder is bidirectional: the hidden states of the shared instruction
+prefix depend on the rest of the prompt, so they cannot be reused across
+different prompts without changing the answer. The prefix's tokenization is
+reused instead.
+"""
 
-model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME)
+from __future__ import annotations
 
-def generate_answer(context, query):
-    prompt = f"""
+import threading
+import time
+from collections import OrderedDict
+from threading import Thread
+
+from config import GENERATION, MODELS
+from rag import tracing
+from rag.lazy import Lazy
+from rag.microbatch import ThreadBatcher
+
+MODEL_NAME = MODELS.generate_model_name
+
+GENERATE_KWARGS = dict(
+    max_new_tokens=GENERATION.max_new_tokens,
+    min_length=10,
+    do_sample=False,
+    repetition_penalty=1.2,
+    no_repeat_ngram_size=3,
+    use_cache=True,
+)
+
+# Prompt template, split around the two variable parts
+PROMPT_PREFIX = """
 You are given a factual context.
 Answer the question by stating the fact clearly.
 Do NOT repeat the question.
@@ -19,32 +57,208 @@ If the context contains a single fact, restate that fact.
 Reply in natural Tamil-English mix, 1 sentence, no extra symbols like '-' or '.'.
 
 Context:
-{context}
+"""
+PROMPT_MIDDLE = """
 
 Question:
-{query}
+"""
+PROMPT_SUFFIX = """
 
 Answer:
 """
 
 
+# ---------------- LOAD MODEL ---------------- #
 
+def _load_generator():
+    # Imported here so that importing rag.generate does not pull in torch.
+    import torch
+    from transformers import AutoTokenizer, T5ForConditionalGeneration
 
-    inputs = tokenizer(
-        prompt,
-        return_tensors="pt",
-        truncation=True,
-        max_length=512
-    )
+    if GENERATION.num_threads:
+        torch.set_num_threads(GENERATION.num_threads)
 
-    outputs = model.generate(
-    **inputs,
-    max_length=100,
-    min_length=10,
-    do_sample=False,
-    repetition_penalty=1.2,
-    no_repeat_ngram_size=3,
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=True)
+    model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME).eval()
+
+    if GENERATION.quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return tokenizer, model
+
+
+_generator = Lazy("generator", _load_generator)
+
+
+def get_generator():
+    """Returns (tokenizer, model), loading them on first use."""
+    return _generator.get()
+
+
+# ---------------- ENGINE ---------------- #
+
+class LocalEngine:
+    """Batched generation over (context, query) pairs with encoder-output reuse."""
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+        def ids(text):
+            return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+        self._prefix = ids(PROMPT_PREFIX)
+        self._middle = ids(PROMPT_MIDDLE)
+        self._suffix = ids(PROMPT_SUFFIX) + [tokenizer.eos_token_id]
+
+        self._encoder_cache: OrderedDict[tuple[int, ...], object] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.requests = 0
+        self.encoder_hits = 0
+        self.prompt_tokens = 0
+        self.generated_tokens = 0
+        self.generate_seconds = 0.0
+
+    def input_ids(self, items: list[tuple[str, str]]) -> list[list[int]]:
+        """Prompt token ids per (context, query); the context is cut to fit max_input_tokens."""
+        contexts = self.tokenizer([c for c, _ in items], add_special_tokens=False)["input_ids"]
+        queries = self.tokenizer([q for _, q in items], add_special_tokens=False)["input_ids"]
+
+        fixed = len(self._prefix) + len(self._middle) + len(self._suffix)
+        out = []
+        for ctx, q in zip(contexts, queries):
+            q = q[: max(GENERATION.max_input_tokens - fixed, 0)]
+            ctx = ctx[: max(GENERATION.max_input_tokens - fixed - len(q), 0)]
+            out.append(self._prefix + ctx + self._middle + q + self._suffix)
+        return out
+
+    def _encode(self, prompts: list[list[int]]):
+        """Padded encoder outputs + attention mask; only prompts not in the cache run the encoder."""
+        import torch
+        from transformers.modeling_outputs import BaseModelOutput
+
+        keys = [tuple(p) for p in prompts]
+        with self._cache_lock:
+            hidden = {k: self._encoder_cache[k] for k in set(keys) if k in self._encoder_cache}
+            for k in hidden:
+                self._encoder_cache.move_to_end(k)
+        self.encoder_hits += sum(k in hidden for k in keys)
+
+        missing = [k for k in dict.fromkeys(keys) if k not in hidden]
+        if missing:
+            batch = self.tokenizer.pad({"input_ids": [list(k) for k in missing]}, return_tensors="pt")
+            with tracing.span("local_encode"):
+                states = self.model.get_encoder()(**batch).last_hidden_state
+            with self._cache_lock:
+                for i, k in enumerate(missing):
+                    hidden[k] = states[i, : len(k)]
+                    self._encoder_cache[k] = hidden[k]
+                    if len(self._encoder_cache) > GENERATION.encoder_cache_entries:
+                        self._encoder_cache.popitem(last=False)
+
+        longest = max(len(k) for k in keys)
+        dim = hidden[keys[0]].shape[-1]
+        states = torch.zeros(len(keys), longest, dim, dtype=hidden[keys[0]].dtype)
+        mask = torch.zeros(len(keys), longest, dtype=torch.long)
+        for i, k in enumerate(keys):
+            states[i, : len(k)] = hidden[k]
+            mask[i, : len(k)] = 1
+        return BaseModelOutput(last_hidden_state=states), mask
+
+    def generate(self, items: list[tuple[str, str]], streamer=None) -> list[str]:
+        """One answer per (context, query), from one model.generate call."""
+        import torch
+
+        prompts = self.input_ids(items)
+        start = time.perf_counter()
+
+        with torch.inference_mode():
+            encoder_outputs, mask = self._encode(prompts)
+            with tracing.span("local_generate"):
+                outputs = self.model.generate(
+                    encoder_outputs=encoder_outputs,
+                    attention_mask=mask,
+                    streamer=streamer,
+                    **GENERATE_KWARGS,
+                )
+
+        # Drop the decoder start token; padding after EOS is not a generated token
+        new_tokens = int((outputs[:, 1:] != self.tokenizer.pad_token_id).sum())
+        self.requests += len(items)
+        self.prompt_tokens += sum(len(p) for p in prompts)
+        self.generated_tokens += new_tokens
+        self.generate_seconds += time.perf_counter() - start
+        tracing.incr("local_generated_tokens", new_tokens)
+
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "encoder_cache_hits": self.encoder_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "generated_tokens": self.generated_tokens,
+            "tokens_per_s": self.generated_tokens / self.generate_seconds if self.generate_seconds else 0.0,
+        }
+
+
+_engine = Lazy("generate_engine", lambda: LocalEngine(*get_generator()))
+_batcher = Lazy(
+    "generate_batcher",
+    lambda: ThreadBatcher(
+        lambda items: get_engine().generate(items),
+        max_batch=GENERATION.max_batch,
+        max_wait_ms=GENERATION.max_wait_ms,
+        name="rag-generate",
+    ),
 )
 
 
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+def get_engine() -> LocalEngine:
+    return _engine.get()
+
+
+# ---------------- GENERATE ---------------- #
+
+def generate_batch(items: list[tuple[str, str]]) -> list[str]:
+    """Answers for many (context, query) pairs in one batched generate."""
+    return get_engine().generate(items) if items else []
+
+
+def generate_answer(context, query):
+    """
+    Answer for one (context, query). Concurrent callers are batched
+    together (GENERATION.max_batch / max_wait_ms); this call blocks until
+    its batch is done.
+    """
+    if GENERATION.max_batch <= 1:
+        return get_engine().generate([(context, query)])[0]
+    return _batcher.get().submit((context, query))
+
+
+def generate_answer_stream(context, query):
+    """
+    Same answer as generate_answer, yielded as text pieces while
+    model.generate runs in a background thread. Wrap in
+    rag.streaming.GuardedStream to apply guardrails / a fallback.
+    Streams are not batched.
+    """
+    from transformers import TextIteratorStreamer
+
+    engine = get_engine()
+
+    # timeout: a crash inside generate() surfaces here instead of hanging
+    streamer = TextIteratorStreamer(engine.tokenizer, skip_special_tokens=True, timeout=60)
+    thread = Thread(
+        target=engine.generate,
+        args=([(context, query)],),
+        kwargs=dict(streamer=streamer),
+        daemon=True,
+    )
+    thread.start()
+
+    try:
+        yield from streamer
+    finally:
+        thread.join()
@@ -0,0 +1,141 @@
+# rag/keyword_matcher.py
+# Multi-pattern keyword matching (Aho-Corasick) for Tanglish + Tamil-script queries.
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+# Anything but letters, digits, whitespace and the Tamil block (its vowel signs are not \w)
+PUNCT_RE = re.compile(r"[^\w\s\u0B80-\u0BFF]+")
+WS_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, NFC, punctuation -> space, single spaces, padded with one space each side."""
+    text = unicodedata.normalize("NFC", text).lower()
+    text = PUNCT_RE.sub(" ", text)
+    return " " + WS_RE.sub(" ", text).strip() + " "
+
+
+def _is_latin(s: str) -> bool:
+    return s.isascii()
+
+
+@dataclass(frozen=True)
+class Pattern(Generic[T]):
+    text: str       # normalized, without padding
+    value: T        # payload returned on a match (e.g. a domain label)
+    weight: float
+    prefix: bool    # Latin patterns only: may be followed by more letters ("rain*" -> "raining")
+
+
+@dataclass(frozen=True)
+class Match(Generic[T]):
+    start: int
+    end: int
+    pattern: Pattern[T]
+
+
+# ---------------- AUTOMATON ---------------- #
+
+class KeywordMatcher(Generic[T]):
+    """
+    Aho-Corasick automaton over a fixed keyword list, compiled once.
+    find() scans a query in one pass regardless of how many keywords there are.
+
+    Keyword syntax:
+    - Latin (Tanglish / English) keywords match whole words; a trailing "*"
+      also matches longer words ("flood*" -> "flooding").
+    - Tamil-script keywords match anywhere in a word, since case and
+      postposition suffixes are written joined ("மழை" in "மழையால்").
+    - Multi-word keywords are allowed ("current cut").
+    Overlapping matches keep the leftmost-longest one, so "போக்குவரத்து
+    நெரிசல்" wins over its parts.
+    """
+
+    def __init__(self, keywords: Iterable[tuple[str, T, float]]):
+        self.patterns: list[Pattern[T]] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for keyword, value, weight in keywords:
+            prefix = keyword.endswith("*")
+            text = normalize(keyword.rstrip("*")).strip()
+            if not text:
+                continue
+            self.patterns.append(Pattern(text, value, weight, prefix and _is_latin(text)))
+            self._insert(text, len(self.patterns) - 1)
+
+        self._build_failure_links()
+
+    def _insert(self, text: str, pattern_id: int) -> None:
+        node = 0
+        for ch in text:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pattern_id)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _boundary_ok(self, text: str, start: int, end: int, p: Pattern[T]) -> bool:
+        if not _is_latin(p.text):
+            return True
+        if text[start - 1].isalnum():
+            return False
+        return p.prefix or not text[end].isalnum()
+
+    def find(self, query: str) -> list[Match[T]]:
+        """Non-overlapping matches in `query`, leftmost-longest first."""
+        text = normalize(query)
+        goto, fail, out = self._goto, self._fail, self._out
+
+        hits: list[Match[T]] = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                p = self.patterns[pid]
+                start = i + 1 - len(p.text)
+                if self._boundary_ok(text, start, i + 1, p):
+                    hits.append(Match(start, i + 1, p))
+
+        hits.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        kept: list[Match[T]] = []
+        end = 0
+        for m in hits:
+            if m.start >= end:
+                kept.append(m)
+                end = m.end
+        return kept
+
+    def scores(self, query: str) -> dict[T, float]:
+        """Summed keyword weight per value."""
+        totals: dict[T, float] = {}
+        for m in self.find(query):
+            totals[m.pattern.value] = totals.get(m.pattern.value, 0.0) + m.pattern.weight
+        return totals
@@ -0,0 +1,73 @@
+# rag/lazy.py
+# Lazy, thread-safe loading of heavy resources (models, indexes) with load timing.
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+from rag import tracing
+
+T = TypeVar("T")
+
+# resource name -> seconds spent loading it (cold start cost)
+LOAD_TIMES: dict[str, float] = {}
+
+
+class Lazy(Generic[T]):
+    """
+    Loads a resource on first use and caches it for the life of the process.
+    Concurrent first callers block on a lock so the loader runs exactly once.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], T]):
+        self.name = name
+        self._loader = loader
+        self._value: T | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value  # type: ignore[return-value]
+
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                with tracing.span(f"load_{self.name}"):
+                    self._value = self._loader()
+                LOAD_TIMES[self.name] = time.perf_counter() - start
+                self._loaded = True
+
+        return self._value  # type: ignore[return-value]
+
+    def set(self, value: T) -> None:
+        """
+        Replaces the cached value (hot reload). A concurrent get() returns
+        either the old or the new value, never a partial one.
+        """
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+    def reset(self) -> None:
+        """Drops the cached value; the next get() reloads it."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            LOAD_TIMES.pop(self.name, None)
+
+
+def cold_start_metrics() -> dict[str, float]:
+    """
+    Returns per-resource load seconds plus a `total` entry.
+    Only resources that have actually been loaded are reported.
+    """
+    metrics = dict(LOAD_TIMES)
+    metrics["total"] = sum(LOAD_TIMES.values())
+    return metrics
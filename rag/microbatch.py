@@ -0,0 +1,180 @@
+# rag/microbatch.py
+# Groups concurrent requests into one batched call (one encoder pass, one FAISS search, one generate).
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted within `max_wait_ms` of the first one (up to
+    `max_batch`) and runs `handler(items)` once for all of them in a worker
+    thread, so the blocking model / index work never stalls the event loop.
+    `handler` must return one result per item, in order; items it returns
+    no result for fail with RuntimeError.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[T]], list[R]],
+        *,
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[tuple[T, asyncio.Future[R]]] | None = None
+        self._task: asyncio.Task | None = None
+
+        self.batches = 0
+        self.items = 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: T) -> R:
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher.start() has not been called")
+
+        fut: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        return await fut
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            self.batches += 1
+            self.items += len(items)
+
+            try:
+                results = list(await asyncio.to_thread(self.handler, items))
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+            # A short result list would leave its callers waiting forever
+            if len(results) < len(batch):
+                e = RuntimeError(f"handler returned {len(results)} results for {len(batch)} items")
+                for _, fut in batch[len(results):]:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+
+class ThreadBatcher(Generic[T, R]):
+    """
+    MicroBatcher for blocking callers (CLI, Streamlit sessions, worker
+    threads): submit() blocks until `handler(items)` has run, in one daemon
+    worker thread, for every item submitted within `max_wait_ms` of the
+    first one (up to `max_batch`). As there, a caller the handler returns no
+    result for gets a RuntimeError.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[T]], list[R]],
+        *,
+        max_batch: int = 8,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+    ):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue[tuple[T, Future]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: T) -> R:
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut.result()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            self.batches += 1
+            self.items += len(items)
+
+            try:
+                results = list(self.handler(items))
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+            if len(results) < len(batch):
+                e = RuntimeError(f"handler returned {len(results)} results for {len(batch)} items")
+                for _, fut in batch[len(results):]:
+                    fut.set_exception(e)
@@ -1,50 +1,547 @@
 # rag/retrieve.py
-import faiss
-import json
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from pathlib import Path
 
-# ---------------- LOAD MODEL ---------------- #
-model = SentenceTransformer("sentence-transformers/LaBSE")
+from config import DOMAIN_COMPATIBILITY, INDEX, MODELS, PATHS, RETRIEVAL
+from embeddings.meta_store import DATE_MISSING
+from embeddings.sparse_index import top_k
+from rag import tracing
+from rag.encoder import QueryEmbedding, encode_queries, encode_query
+from rag.lazy import Lazy
 
-# ---------------- PATHS ---------------- #
-BASE_DIR = Path(__file__).resolve().parents[1]
-INDEX_PATH = BASE_DIR / "embeddings" / "index.faiss"
-META_PATH = BASE_DIR / "embeddings" / "meta.json"
 
 # ---------------- LOAD INDEX ---------------- #
-index = faiss.read_index(str(INDEX_PATH))
 
-with open(META_PATH, encoding="utf-8") as f:
-    meta = json.load(f)
+# Directory holding index.faiss, meta/, domains/ and sparse_index.npz, or a
+# versioned store (versions/<version>/ + CURRENT) of them
+_index_root = PATHS.embeddings_dir
 
-# ---------------- RETRIEVE ---------------- #
-def retrieve(query: str, k: int = 8):
+
+def _load_store():
+    # Imported here so that importing rag.retrieve does not pull in faiss.
+    from embeddings.vector_store import load
+
+    return load(_index_root)
+
+
+_store = Lazy("vector_store", _load_store)
+
+
+def set_index_root(root):
+    """
+    Points retrieval at another index directory (built with
+    IndexWriter(root=...)). The store is reloaded on next use.
+    """
+    global _index_root
+    _index_root = root
+    _store.reset()
+
+
+def get_store():
+    """Returns the FAISS index + metadata + BM25 index, loading them on first use."""
+    return _store.get()
+
+
+def get_sparse_index():
+    """Returns the BM25 sparse index, or None if it has not been built."""
+    return get_store().sparse
+
+
+# ---------------- HOT RELOAD ---------------- #
+
+_reload_lock = threading.Lock()
+_watcher_stop = threading.Event()
+_watcher: threading.Thread | None = None
+
+
+def reload_index() -> bool:
+    """
+    Swaps in the version CURRENT points to, if it is not the one in use.
+    The new store (index, metadata, BM25) is loaded completely before one
+    reference swap, so queries see the old or the new build, never a mix,
+    and in-flight queries finish on the store they started with.
+    Returns True if a new version was swapped in.
+    """
+    from embeddings.vector_store import current_version, load
+
+    with _reload_lock:
+        version = current_version(_index_root)
+        if version is None or not _store.loaded or get_store().version == version:
+            return False
+
+        with tracing.span("index_reload"):
+            store = load(_index_root)
+        _store.set(store)
+
+    tracing.incr("index_reloads")
+    print(f"Index reloaded: version {store.version}")
+    return True
+
+
+def _watch(interval_s):
+    while not _watcher_stop.wait(interval_s):
+        try:
+            reload_index()
+        except Exception as e:
+            # e.g. the version was pruned mid-load; retried on the next tick
+            print(f"⚠️ Index reload failed: {e!r}")
+
+
+def start_watcher(interval_s: float = INDEX.reload_interval_s) -> None:
+    """Checks for newly published index versions every `interval_s` seconds in a daemon thread."""
+    global _watcher
+    if interval_s <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return
+
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch, args=(interval_s,), name="index-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watcher() -> None:
+    global _watcher
+    _watcher_stop.set()
+    if _watcher is not None:
+        _watcher.join()
+        _watcher = None
+
+
+# ---------------- HELPERS ---------------- #
+
+def _to_result(m, score):
+    return {
+        "text": m["text"],
+        "chunk_id": m.get("chunk_id"),
+        "doc_id": m.get("doc_id"),
+        "domain": m.get("domain"),
+        "source": m.get("source"),
+        "date": m.get("date"),
+        "url": m.get("url"),
+        "n_tokens": m.get("n_tokens"),
+        "score": float(score)
+    }
+
+
+def _domain_rows(store, domains):
+    """Global row ids of all chunks in the given domains."""
+    if store.domain_ids:
+        parts = [store.domain_ids[d] for d in sorted(domains) if d in store.domain_ids]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    # Stores built before domain partitioning: derive from the domain column
+    return store.meta.rows_with("domain", domains)
+
+
+def _since_day(now_h, max_age_hours):
     """
-    Returns list of dicts with full metadata
+    First day (since epoch) inside a last-N-hours window. Dates are day
+    precision, so a chunk dated `day` is (day + 1) * 24 hours old at most.
     """
-    query_emb = model.encode(
-        [query],
-        normalize_embeddings=True
-    )
+    return math.ceil((now_h - max_age_hours) / 24) - 1
+
+
+def _window_keys(store, domains, since_day):
+    """Time shard keys (day, domain) inside the window, restricted to `domains`."""
+    return [
+        key for key in sorted(store.time_shards)
+        if key[0] >= since_day and (domains is None or key[1] in domains)
+    ]
+
+
+def _allowed_rows(store, domains, since_day):
+    """Global row ids searchable under a domain and / or time restriction."""
+    if since_day is None:
+        return _domain_rows(store, domains)
+
+    if store.time_shards:
+        parts = [store.time_ids[key] for key in _window_keys(store, domains, since_day)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    # Stores built without time shards: scan the date column (undated rows are DATE_MISSING)
+    rows = np.flatnonzero(np.asarray(store.meta.dates) >= since_day)
+    return rows if domains is None else np.intersect1d(rows, _domain_rows(store, domains))
 
-    scores, ids = index.search(np.array(query_emb, dtype=np.float32), k)
+
+def _rows(scores, ids):
+    """Splits FAISS [nq, k] results into per-query (ids, scores), dropping -1 padding."""
+    out = []
+    for row_scores, row_ids in zip(scores, ids):
+        keep = row_ids != -1
+        out.append((row_ids[keep].astype(np.int64), row_scores[keep]))
+    return out
+
+
+def _selector_search(store, matrix, k, rows):
+    """Searches the full index restricted to `rows` with an ID selector."""
+    import faiss
+
+    sel = faiss.IDSelectorBatch(rows)
+    scores, ids = store.index.search(matrix, k, params=faiss.SearchParameters(sel=sel))
+    return _rows(scores, ids)
+
+
+def _merge_shards(shards, matrix, k):
+    """Searches each sub-index (IndexIDMap over global ids) and merges the per-query top-k."""
+    per_shard = []
+    for sub in shards:
+        if sub.ntotal:
+            scores, ids = sub.search(matrix, min(k, sub.ntotal))
+            per_shard.append(_rows(scores, ids))
 
     results = []
-    for score, idx in zip(scores[0], ids[0]):
-        if idx == -1:
+    for q in range(len(matrix)):
+        if not per_shard:
+            results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
             continue
 
-        m = meta[idx]
+        ids = np.concatenate([hits[q][0] for hits in per_shard])
+        scores = np.concatenate([hits[q][1] for hits in per_shard])
+        order = np.argsort(-scores, kind="stable")[:k]
+        results.append((ids[order], scores[order]))
+
+    return results
+
+
+def _dense_search(store, matrix, k, domains=None, since_day=None):
+    """
+    Top-k dense search for every row of the [nq, d] query matrix, with one
+    index.search call per index. With `domains`, only those domains'
+    sub-indexes are searched and their hits merged, so all k results are
+    in-domain. With `since_day`, only the time shards of that day onward
+    are searched, so old data is never scanned. Returns a list of
+    (ids, scores) per query.
+    """
+    if since_day is not None:
+        if store.time_shards:
+            keys = _window_keys(store, domains, since_day)
+            return _merge_shards([store.time_shards[key] for key in keys], matrix, k)
+        return _selector_search(store, matrix, k, _allowed_rows(store, domains, since_day))
+
+    if domains is None:
+        scores, ids = store.index.search(matrix, k)
+        return _rows(scores, ids)
+
+    if not store.domain_indexes:
+        # No sub-indexes on disk: restrict the full index with an ID selector
+        return _selector_search(store, matrix, k, _domain_rows(store, domains))
+
+    return _merge_shards([store.domain_indexes[d] for d in sorted(domains) if d in store.domain_indexes], matrix, k)
+
+
+def _fuse(dense_ids, dense_scores, bm25_scores, sparse_ids):
+    """
+    Weighted fusion of dense cosine and BM25 scores over the union of both
+    candidate lists. Dense scores are min-max scaled over the dense
+    candidates; BM25 is scaled by its best score. A sparse-only candidate
+    gets the lowest dense candidate score, since its cosine is at most that.
+    """
+    cand = np.union1d(dense_ids, sparse_ids)
+    if not len(cand):
+        return cand, np.empty(0, dtype=np.float32)
+
+    dense = np.full(len(cand), dense_scores.min() if len(dense_scores) else 0.0, dtype=np.float32)
+    dense[np.searchsorted(cand, dense_ids)] = dense_scores
+    span = float(dense.max() - dense.min())
+    dense = (dense - dense.min()) / span if span > 0 else np.ones_like(dense)
+
+    bm25 = bm25_scores[cand]
+    best = float(bm25_scores.max())
+    if best > 0:
+        bm25 = bm25 / best
+
+    fused = RETRIEVAL.dense_weight * dense + RETRIEVAL.bm25_weight * bm25
+    order = np.argsort(-fused, kind="stable")
+    return cand[order], fused[order]
+
+
+def _hybrid_rank(sparse, text, dense_ids, dense_scores, k, rows):
+    bm25_scores = sparse.score(text)
+    if rows is not None:
+        masked = np.zeros_like(bm25_scores)
+        masked[rows] = bm25_scores[rows]
+        bm25_scores = masked
+
+    n_cand = max(k, RETRIEVAL.dense_candidates_k)
+    ids, scores = _fuse(dense_ids, dense_scores, bm25_scores, top_k(bm25_scores, n_cand))
+    return ids[:k], scores[:k]
+
+
+def _recency_boost(store, ids, scores, now_h):
+    """Adds the recency bonus (see config.Retrieval) and re-sorts; undated chunks get none."""
+    if not len(ids):
+        return ids, scores
+
+    days = np.asarray(store.meta.dates[ids])
+    age_h = np.maximum(now_h - (days.astype(np.float64) + 1) * 24, 0)
+    bonus = RETRIEVAL.recency_weight * 0.5 ** (age_h / RETRIEVAL.recency_half_life_hours)
+    bonus[days == DATE_MISSING] = 0
+
+    scores = (scores + bonus).astype(np.float32)
+    order = np.argsort(-scores, kind="stable")
+    return ids[order], scores[order]
+
+
+def _diversify(store, ids, scores, k):
+    """
+    MMR over relevance-ranked candidates. Each pick maximizes
+    mmr_lambda * score - (1 - mmr_lambda) * (max cosine to earlier picks);
+    candidates at least RETRIEVAL.dedup_cosine similar to a pick are
+    dropped as near-duplicates (e.g. one report in Tamil script and in
+    Tanglish), so fewer than k results can come back.
+    """
+    if len(ids) <= 1:
+        return ids[:k], scores[:k]
+
+    vecs = store.vectors(ids)
+    sims = vecs @ vecs.T
+    lam = RETRIEVAL.mmr_lambda
+
+    # The most relevant candidate always comes first
+    picked = [0]
+    max_sim = sims[0].copy()
+    alive = max_sim < RETRIEVAL.dedup_cosine
+    alive[0] = False
+
+    while len(picked) < k and alive.any():
+        mmr = np.where(alive, lam * scores - (1 - lam) * max_sim, -np.inf)
+        j = int(np.argmax(mmr))
+        picked.append(j)
+        max_sim = np.maximum(max_sim, sims[j])
+        alive &= sims[j] < RETRIEVAL.dedup_cosine
+        alive[j] = False
+
+    picked = np.asarray(picked)
+    return ids[picked], scores[picked]
+
+
+def _allowed_domains(domain):
+    return DOMAIN_COMPATIBILITY.get(domain, {domain}) if domain else None
+
+
+def _search(query_embs, k, domain, max_age_hours=None, now=None):
+    """Retrieves for a group of encoded queries that share the same domain and window."""
+    # One snapshot for the whole search; a hot reload swaps in a new store object
+    store = get_store()
+    domains = _allowed_domains(domain)
+    sparse = store.sparse if RETRIEVAL.use_hybrid else None
+
+    # A sparse index from an older build would misalign row ids
+    if sparse is not None and sparse.n_docs != len(store.meta):
+        sparse = None
+
+    now_h = (time.time() if now is None else now) / 3600
+    window = RETRIEVAL.max_age_hours if max_age_hours is None else max_age_hours
+    since_day = None if window is None else _since_day(now_h, window)
+
+    # BM25 is scored over the whole corpus and masked to the searchable rows
+    rows = None
+    if sparse is not None and (domains is not None or since_day is not None):
+        rows = _allowed_rows(store, domains, since_day)
+
+    diversify = RETRIEVAL.mmr_lambda < 1 or RETRIEVAL.dedup_cosine < 1
+    recency = RETRIEVAL.recency_weight > 0
+    rerank = diversify or recency
+
+    # Same PCA / OPQ projection the index was built with (no-op if none)
+    matrix = store.project(np.stack([q.vector for q in query_embs]))
+    n_cand = max(k, RETRIEVAL.dense_candidates_k) if sparse is not None or rerank else k
+    with tracing.span("dense_search"):
+        dense_hits = _dense_search(store, matrix, n_cand, domains, since_day)
+
+    results = []
+    for q, (ids, scores) in zip(query_embs, dense_hits):
+        if sparse is not None:
+            with tracing.span("hybrid_rank"):
+                ids, scores = _hybrid_rank(sparse, q.text, ids, scores, n_cand if rerank else k, rows)
+
+        if recency:
+            ids, scores = _recency_boost(store, ids, scores, now_h)
+
+        if diversify:
+            with tracing.span("diversify"):
+                ids, scores = _diversify(store, ids, scores, k)
+        else:
+            ids, scores = ids[:k], scores[:k]
+
+        # Only the returned ids are hydrated from the memory-mapped metadata
+        with tracing.span("hydrate"):
+            results.append([_to_result(m, score) for m, score in zip(store.meta.hydrate(ids), scores)])
+
+    return results
+
+
+# ---------------- RETRIEVE ---------------- #
+def retrieve(
+    query: str | QueryEmbedding,
+    k: int = 8,
+    domain: str | None = None,
+    max_age_hours: float | None = None,
+    now: float | None = None,
+):
+    """
+    Returns list of dicts with full metadata.
+    Accepts a raw query or a QueryEmbedding from rag.encoder.encode_query.
+
+    If `domain` is given (the detected query domain), only chunks from the
+    domains in DOMAIN_COMPATIBILITY[domain] are searched.
+
+    With RETRIEVAL.use_hybrid and a built sparse index, dense and BM25
+    candidates are fused using RETRIEVAL.dense_weight / bm25_weight.
+
+    Fresher chunks get a recency bonus (RETRIEVAL.recency_weight). With
+    `max_age_hours` (default RETRIEVAL.max_age_hours), only chunks from the
+    last N hours before `now` (unix seconds, default: current time) are
+    searched, via the per-day time shards.
+
+    The final k are picked by MMR (RETRIEVAL.mmr_lambda), dropping
+    near-duplicates above RETRIEVAL.dedup_cosine.
+    """
+    return _search([encode_query(query)], k, domain, max_age_hours, now)[0]
+
+
+def retrieve_batch(
+    queries: list[str | QueryEmbedding],
+    k: int = 8,
+    domains: list[str | None] | None = None,
+    batch_size: int | None = None,
+    max_age_hours: float | None = None,
+    now: float | None = None,
+):
+    """
+    Batched retrieve(): queries are encoded `batch_size` at a time and each
+    batch is searched with one index.search over its query matrix (one per
+    domain group when `domains` is given, aligned with `queries`).
+
+    Returns one result list per query, in input order.
+    """
+    if domains is not None and len(domains) != len(queries):
+        raise ValueError("domains must be aligned with queries")
+
+    batch_size = batch_size or MODELS.encode_batch_size
+    results: list[list[dict] | None] = [None] * len(queries)
+
+    for start in range(0, len(queries), batch_size):
+        embs = encode_queries(queries[start : start + batch_size], batch_size=batch_size)
+
+        groups: dict[str | None, list[int]] = {}
+        for i in range(len(embs)):
+            groups.setdefault(domains[start + i] if domains else None, []).append(i)
+
+        for domain, members in groups.items():
+            hits = _search([embs[i] for i in members], k, domain, max_age_hours, now)
+            for i, res in zip(members, hits):
+                results[start + i] = res
+
+    return results
+
+
+# ---------------- DOMAIN FAN-OUT ---------------- #
+
+# Sub-searches of a routed query run concurrently (FAISS and numpy release the GIL)
+_fanout_pool = ThreadPoolExecutor(max_workers=RETRIEVAL.fanout_workers, thread_name_prefix="rag-fanout")
+
+
+def _fanout(calls):
+    """Runs (fn, *args) calls on the fan-out pool, in the caller's tracing context."""
+    if len(calls) == 1:
+        fn, *args = calls[0]
+        return [fn(*args)]
+
+    futures = [_fanout_pool.submit(contextvars.copy_context().run, *call) for call in calls]
+    return [f.result() for f in futures]
+
+
+def _merge_routed(per_domain, weights, k):
+    """
+    Merges one query's per-domain result lists, keeping each list's own
+    (MMR) order: the next result is the list head with the best score times
+    the domain's probability relative to the best routed domain (each
+    sub-search scales scores over its own candidates). A chunk reached
+    through two compatible domains is kept once.
+    """
+    best = max(weights.values(), default=1.0) or 1.0
+    lists = [(weights[domain] / best, docs) for domain, docs in per_domain]
+    pos = [0] * len(lists)
+
+    merged, seen = [], set()
+    while len(merged) < k:
+        heads = [(w * docs[pos[j]]["score"], -j) for j, (w, docs) in enumerate(lists) if pos[j] < len(docs)]
+        if not heads:
+            break
+        j = -max(heads)[1]
+        d = lists[j][1][pos[j]]
+        pos[j] += 1
+
+        key = d["chunk_id"] or d["text"]
+        if key not in seen:
+            seen.add(key)
+            merged.append(d)
+    return merged
+
+
+def retrieve_routed(
+    query: str | QueryEmbedding,
+    domains: dict[str, float],
+    k: int = 8,
+    max_age_hours: float | None = None,
+    now: float | None = None,
+):
+    """
+    retrieve() over several detected domains at once, e.g.
+    retrieve_routed(q, route_domains(q)) from rag.domain_detect.
+
+    `domains` maps each routed domain to its probability. Every domain is
+    searched (with its DOMAIN_COMPATIBILITY set) concurrently, then the
+    lists are merged into one top-k (see _merge_routed).
+    """
+    return retrieve_routed_batch([query], [domains], k, max_age_hours=max_age_hours, now=now)[0]
+
+
+def retrieve_routed_batch(
+    queries: list[str | QueryEmbedding],
+    domains: list[dict[str, float]],
+    k: int = 8,
+    batch_size: int | None = None,
+    max_age_hours: float | None = None,
+    now: float | None = None,
+):
+    """
+    Batched retrieve_routed(): per encoded batch, the queries routed to
+    each domain share one search, and the domain searches run concurrently.
+    """
+    if len(domains) != len(queries):
+        raise ValueError("domains must be aligned with queries")
+
+    batch_size = batch_size or MODELS.encode_batch_size
+    results: list[list[dict] | None] = [None] * len(queries)
+
+    for start in range(0, len(queries), batch_size):
+        embs = encode_queries(queries[start : start + batch_size], batch_size=batch_size)
+        routes = domains[start : start + len(embs)]
+
+        groups: dict[str, list[int]] = {}
+        for i, route in enumerate(routes):
+            for domain in route:
+                groups.setdefault(domain, []).append(i)
+
+        with tracing.span("routed_search"):
+            hits = _fanout([
+                (_search, [embs[i] for i in members], k, domain, max_age_hours, now)
+                for domain, members in groups.items()
+            ])
+
+        per_query: list[list] = [[] for _ in embs]
+        for (domain, members), group_hits in zip(groups.items(), hits):
+            for i, docs in zip(members, group_hits):
+                per_query[i].append((domain, docs))
 
-        results.append({
-            "text": m["text"],
-            "domain": m.get("domain"),
-            "source": m.get("source"),
-            "date": m.get("date"),
-            "url": m.get("url"),
-            "score": float(score)
-        })
+        for i, route in enumerate(routes):
+            tracing.incr("routed_domains", len(route))
+            results[start + i] = _merge_routed(per_query[i], route, k)
 
     return results
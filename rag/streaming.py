@@ -0,0 +1,74 @@
+# rag/streaming.py
+# Guarded token streaming: show text as it arrives, but let guardrails and the fallback take over.
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Iterator
+
+# Yielded by GuardedStream when text already shown must be discarded and
+# replaced by what follows (the fallback).
+RESET = object()
+
+
+class GuardedStream:
+    """
+    Wraps an iterator of text deltas (LLM stream chunks).
+
+    Deltas are held back until `verdict(text, done)` can decide on the
+    partial answer (it returns True / False, or None while undecided), so
+    an answer that trips the guardrails is never shown. Once accepted, the
+    remaining deltas pass straight through. If the guardrails reject the
+    answer, or the stream fails mid-way, the fallback text is yielded
+    instead, preceded by RESET when something was already shown.
+
+    After iteration, `text` is the final answer and `fell_back` tells
+    whether it came from the fallback (such answers should not be cached).
+    """
+
+    def __init__(
+        self,
+        deltas: Iterable[str],
+        verdict: Callable[[str, bool], bool | None],
+        fallback: Callable[[], str],
+    ):
+        self._deltas = deltas
+        self._verdict = verdict
+        self._fallback = fallback
+
+        self.text = ""
+        self.fell_back = False
+
+    def __iter__(self) -> Iterator[str | object]:
+        shown = False
+        try:
+            for delta in self._deltas:
+                if not delta:
+                    continue
+                self.text += delta
+
+                if shown:
+                    yield delta
+                    continue
+
+                ok = self._verdict(self.text, False)
+                if ok is False:
+                    break
+                if ok:
+                    shown = True
+                    yield self.text
+            else:
+                if not shown and self._verdict(self.text, True):
+                    shown = True
+                    yield self.text
+                if shown:
+                    return
+
+        except Exception as e:
+            print("❌ Stream error:", e)
+
+        self.fell_back = True
+        self.text = self._fallback()
+        if shown:
+            yield RESET
+        yield self.text
+
@@ -0,0 +1,54 @@
+# rag/tokens.py
+# Fast, dependency-free prompt token estimate for Tanglish + Tamil-script text.
+
+"""
+count_tokens() approximates what a subword tokenizer (Gemini's, or
+flan-t5's SentencePiece) makes of a text, without loading either:
+- Latin letter runs: one token per 4 characters, at least one per word
+  (romanized Tamil is split into more pieces than English)
+- Tamil-script runs: one token per 2 code points (vowel signs included)
+- digit runs: one token per 3 digits
+- any other non-space character: one token each
+
+The estimate is meant to err above real counts so that a prompt packed to
+a token budget (rag/context_pack.py) is not cut by the model. It is stored
+per chunk at ingest (ingest/chunk.py -> meta column n_tokens), so packing
+the retrieved docs does not re-count them.
+"""
+
+from __future__ import annotations
+
+import re
+
+# characters per token, per kind of run
+_LATIN_CHARS = 4
+_TAMIL_CHARS = 2
+_DIGIT_CHARS = 3
+
+# One match per token: a greedy {1,n} repeat splits a run of L characters
+# into ceil(L / n) matches, so counting is a single findall
+_TOKEN_RE = re.compile(
+    rf"[A-Za-z]{{1,{_LATIN_CHARS}}}"
+    rf"|[\u0B80-\u0BFF]{{1,{_TAMIL_CHARS}}}"
+    rf"|[0-9]{{1,{_DIGIT_CHARS}}}"
+    r"|[^\sA-Za-z0-9\u0B80-\u0BFF]"
+)
+
+
+def count_tokens(text: str | None) -> int:
+    """Estimated prompt tokens of `text`."""
+    if not text:
+        return 0
+    return len(_TOKEN_RE.findall(text))
+
+
+def trim_to_tokens(text: str, budget: int) -> str:
+    """The longest word prefix of `text` whose estimate fits `budget` ("" if none)."""
+    out, used = [], 0
+    for word in text.split():
+        n = count_tokens(word)
+        if used + n > budget:
+            break
+        out.append(word)
+        used += n
+    return " ".join(out)
@@ -0,0 +1,227 @@
+# rag/tracing.py
+# Lightweight per-stage tracing: spans, counters, JSONL trace log and Prometheus text export.
+
+"""
+Usage:
+
+    with tracing.trace("query", query=q):     # one JSONL record per trace
+        with tracing.span("encode"):          # timed stage
+            ...
+        tracing.incr("fallbacks")             # counter
+
+Every span feeds a per-stage latency histogram; spans opened inside a
+trace are also listed in that trace's JSONL record. prometheus_text()
+renders histograms, counters and model load times (rag.lazy) for a
+/metrics endpoint.
+
+Disabled by default (config.Tracing.enabled, or RAG_TRACING=1). When
+disabled, span() / trace() return one shared no-op object and incr() is a
+flag check, so the instrumented code pays about one function call per
+stage.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from config import PATHS, TRACING
+
+# Histogram upper bounds, seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = TRACING.enabled or os.environ.get("RAG_TRACING") == "1"
+
+_lock = threading.Lock()
+_histograms: dict[str, list] = {}  # stage -> [bucket counts..., +Inf count, sum]
+_counters: dict[str, float] = {}
+
+_current: ContextVar["Trace | None"] = ContextVar("rag_trace", default=None)
+_log_file = None
+
+
+def enable(flag: bool = True) -> None:
+    global _enabled
+    _enabled = flag
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+# ---------------- RECORDING ---------------- #
+
+def observe(stage: str, seconds: float) -> None:
+    """Adds one latency sample for `stage` (spans call this on exit)."""
+    if not _enabled:
+        return
+
+    with _lock:
+        h = _histograms.get(stage)
+        if h is None:
+            h = _histograms[stage] = [0] * (len(BUCKETS) + 2)
+        h[bisect_left(BUCKETS, seconds)] += 1
+        h[-1] += seconds
+
+
+def incr(name: str, value: float = 1) -> None:
+    if not _enabled:
+        return
+
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def annotate(**attrs) -> None:
+    """Attaches attributes to the current trace, if any."""
+    t = _current.get() if _enabled else None
+    if t is not None:
+        t.attrs.update(attrs)
+
+
+class _Noop:
+    spans = ()
+    attrs: dict = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        observe(self.name, end - self._start)
+
+        t = _current.get()
+        if t is not None:
+            t.spans.append({
+                "name": self.name,
+                "start_ms": round((self._start - t.start) * 1000, 3),
+                "duration_ms": round((end - self._start) * 1000, 3),
+            })
+        return False
+
+
+class Trace:
+    """One request / batch; written to the JSONL trace log on exit."""
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.spans: list[dict] = []
+        self.trace_id = uuid.uuid4().hex[:16]
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _current.reset(self._token)
+        observe(self.name, duration)
+
+        if exc is not None:
+            self.attrs["error"] = repr(exc)
+
+        _write({
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "ts": round(self.wall, 3),
+            "duration_ms": round(duration * 1000, 3),
+            "attrs": self.attrs,
+            "spans": self.spans,
+        })
+        return False
+
+
+def span(name: str):
+    return _Span(name) if _enabled else _NOOP
+
+
+def trace(name: str, **attrs):
+    return Trace(name, attrs) if _enabled else _NOOP
+
+
+# ---------------- EXPORT ---------------- #
+
+def _write(record: dict) -> None:
+    global _log_file
+
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if _log_file is None:
+            PATHS.trace_log_path.parent.mkdir(parents=True, exist_ok=True)
+            _log_file = open(PATHS.trace_log_path, "a", encoding="utf-8")
+        _log_file.write(line + "\n")
+        _log_file.flush()
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def prometheus_text() -> str:
+    """Metrics in the Prometheus text exposition format."""
+    from rag.lazy import LOAD_TIMES
+
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP rag_stage_duration_seconds Time spent per pipeline stage.",
+        "# TYPE rag_stage_duration_seconds histogram",
+    ]
+    for stage, h in sorted(histograms.items()):
+        cumulative = 0
+        for le, n in zip([*map(str, BUCKETS), "+Inf"], h[:-1]):
+            cumulative += n
+            lines.append(f'rag_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'rag_stage_duration_seconds_sum{{stage="{stage}"}} {_fmt(h[-1])}')
+        lines.append(f'rag_stage_duration_seconds_count{{stage="{stage}"}} {cumulative}')
+
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE rag_{name}_total counter")
+        lines.append(f"rag_{name}_total {_fmt(value)}")
+
+    lines.append("# HELP rag_model_load_seconds Cold start cost per lazily loaded resource.")
+    lines.append("# TYPE rag_model_load_seconds gauge")
+    for resource, seconds in sorted(LOAD_TIMES.items()):
+        lines.append(f'rag_model_load_seconds{{resource="{resource}"}} {_fmt(seconds)}')
+
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clears histograms and counters (benchmarks call this between runs)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
@@ -0,0 +1,32 @@
+# rag/warmup.py
+# Optional explicit warm-up: load models and indexes before the first query.
+
+from __future__ import annotations
+
+from rag.lazy import cold_start_metrics
+
+
+def warm_up(*, include_generator: bool = False) -> dict[str, float]:
+    """
+    Loads the shared encoder, domain keyword matcher, domain embeddings,
+    vector store and BM25 index up front (and the local flan-t5 generator
+    if requested).
+
+    Returns cold start metrics: seconds per resource plus `total`.
+    """
+    from rag.domain_detect import get_domain_embeddings, get_keyword_matcher
+    from rag.encoder import get_model
+    from rag.retrieve import get_sparse_index, get_store
+
+    get_model()
+    get_keyword_matcher()
+    get_domain_embeddings()
+    get_store()
+    get_sparse_index()
+
+    if include_generator:
+        from rag.generate import get_generator
+
+        get_generator()
+
+    return cold_start_metrics()
@@ -0,0 +1,209 @@
+# server.py
+# Tamil–English Code-Switched RAG – async HTTP API with micro-batched retrieval
+
+"""
+Endpoints:
+- POST /query   {"query": "...", "generate": true}
+                -> {"query", "domain", "domains", "docs", "answer"}
+                   (domains: routed domain -> probability, best first)
+- GET  /health
+- GET  /stats   micro-batching + answer cache (+ local generator) counters
+- GET  /metrics per-stage latency histograms and counters (Prometheus text;
+                empty unless tracing is enabled, see rag/tracing.py)
+
+Concurrent requests that arrive within SERVING.max_wait_ms of each other are
+grouped: one LaBSE encode, one domain-scoring matrix product and one FAISS
+search per routed domain for the whole batch (domain searches run
+concurrently; a multi-domain query takes part in each of its domains). The
+Gemini call is awaited through the async client, so it never blocks the
+event loop. With GENERATION.local_fallback, failed Gemini answers go to the
+local flan-t5 engine in worker threads, where concurrent ones share a batch.
+
+Run (from project root):
+    python server.py --port 8000
+"""
+
+import argparse
+import asyncio
+
+from aiohttp import web
+
+from app import (
+    GENERATION_CONFIG,
+    MODEL_NAME,
+    VALID_DOMAINS,
+    build_prompt,
+    client,
+    filter_by_domain,
+    is_valid_question,
+    offline_answer,
+    passes_guardrails,
+)
+from config import CACHE, GENERATION, SERVING
+from rag.answer_cache import AnswerCache
+from rag.domain_detect import domain_scores_batch
+from rag.encoder import encode_queries
+from rag.microbatch import MicroBatcher
+from rag.retrieve import get_store, retrieve_routed_batch, start_watcher, stop_watcher
+from rag import tracing
+from rag.warmup import warm_up
+
+# ---------------- BATCHED PIPELINE ---------------- #
+
+def process_batch(queries):
+    """
+    Runs in a worker thread for a whole micro-batch.
+    Returns (query_emb, routed domains -> probability, docs) per query.
+    """
+    with tracing.trace("batch", size=len(queries)):
+        query_embs = encode_queries(queries)
+        routes = [s.routed() for s in domain_scores_batch(query_embs)]
+        results = retrieve_routed_batch(query_embs, routes, k=SERVING.retrieve_k)
+
+        return [
+            (q, r, filter_by_domain(docs, r))
+            for q, r, docs in zip(query_embs, routes, results)
+        ]
+
+
+# ---------------- ASYNC GENERATION ---------------- #
+
+async def ask_gemini_async(query, docs):
+    """Async twin of app.ask_gemini: None on error or guardrail trip."""
+    try:
+        prompt = build_prompt(query, docs)
+        with tracing.span("gemini"):
+            response = await client.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=GENERATION_CONFIG,
+            )
+        answer = (response.text or "").strip()
+        return answer if passes_guardrails(answer) else None
+
+    except Exception as e:
+        print("❌ Gemini error:", e)
+        return None
+
+
+async def answer_for(app, query, query_emb, domain, docs):
+    if not docs:
+        return "No relevant update found."
+
+    tracing.incr("answers")
+    if not CACHE.enabled:
+        return await ask_gemini_async(query, docs) or await asyncio.to_thread(offline_answer, query, docs)
+
+    cache = app["answer_cache"]
+    key = cache.make_key(domain, docs)
+    version = get_store().version
+
+    answer = cache.get(query_emb, key, version=version)
+    if answer is None:
+        answer = await ask_gemini_async(query, docs)
+        if answer is not None:
+            cache.put(query_emb, key, answer, version=version)
+
+    return answer or await asyncio.to_thread(offline_answer, query, docs)
+
+
+# ---------------- HANDLERS ---------------- #
+
+async def handle_query(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Body must be a JSON object")
+
+    query = str(body.get("query", "")).strip()
+    if not is_valid_question(query):
+        raise web.HTTPBadRequest(text="Ask a clear, meaningful question.")
+
+    with tracing.trace("request", query=query) as t:
+        with tracing.span("batched_retrieval"):
+            query_emb, routed, docs = await request.app["batcher"].submit(query)
+        domain = next(iter(routed))
+        t.set(domain=domain, domains=list(routed), docs=len(docs))
+
+        answer = None
+        if domain not in VALID_DOMAINS:
+            answer, docs = "No relevant update found.", []
+        elif body.get("generate", True):
+            answer = await answer_for(request.app, query, query_emb, domain, docs)
+
+    return web.json_response({
+        "query": query,
+        "domain": domain,
+        "domains": routed,
+        "docs": docs,
+        "answer": answer,
+    })
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def handle_stats(request):
+    stats = {
+        "batching": request.app["batcher"].stats(),
+        "answer_cache": request.app["answer_cache"].stats(),
+        "cold_start": request.app["cold_start"],
+    }
+    if GENERATION.local_fallback:
+        from rag.generate import get_engine
+
+        stats["local_generate"] = get_engine().stats()
+    return web.json_response(stats)
+
+
+async def handle_metrics(request):
+    return web.Response(text=tracing.prometheus_text(), content_type="text/plain")
+
+
+# ---------------- APP ---------------- #
+
+async def on_startup(app):
+    app["batcher"].start()
+    # Picks up newly published index versions without a restart
+    start_watcher()
+
+
+async def on_cleanup(app):
+    await app["batcher"].stop()
+    stop_watcher()
+
+
+def create_app():
+    app = web.Application()
+    app["cold_start"] = warm_up(include_generator=GENERATION.local_fallback)
+    app["answer_cache"] = AnswerCache()
+    app["batcher"] = MicroBatcher(
+        process_batch,
+        max_batch=SERVING.max_batch,
+        max_wait_ms=SERVING.max_wait_ms,
+    )
+
+    app.router.add_post("/query", handle_query)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_get("/metrics", handle_metrics)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async RAG HTTP API")
+    parser.add_argument("--host", default=SERVING.host)
+    parser.add_argument("--port", type=int, default=SERVING.port)
+    args = parser.parse_args()
+
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,18 +7,18 @@ from google import genai
 
 # ---------------- IMPORT BACKEND ---------------- #
 
-from rag.retrieve import retrieve
-from rag.domain_detect import detect_domain
+from rag.encoder import encode_query
+from rag.retrieve import get_store, retrieve_routed, start_watcher
+from rag.domain_detect import domain_scores
+from rag.warmup import warm_up
+from rag.answer_cache import AnswerCache, cached_answer
+from rag.context_pack import pack_context
+from rag.streaming import RESET, GuardedStream
+from rag import tracing
 
 # ---------------- CONFIG ---------------- #
 
-DOMAIN_COMPATIBILITY = {
-    "traffic": {"traffic", "transport"},
-    "transport": {"transport", "traffic"},
-    "water": {"water"},
-    "power": {"power"},
-    "weather": {"weather"}
-}
+from config import CACHE, CONTEXT, DOMAIN_COMPATIBILITY, GENERATION
 
 VALID_DOMAINS = set(DOMAIN_COMPATIBILITY.keys())
 
@@ -33,12 +33,39 @@ MODEL_NAME = "models/gemini-flash-latest"
 # ---------------- HELPERS ---------------- #
 
 def filter_by_domain(docs, detected_domain):
-    allowed = DOMAIN_COMPATIBILITY.get(detected_domain, {detected_domain})
-    return [d for d in docs if d.get("domain") in allowed]
+    """Keeps docs compatible with the detected domain (or any of several routed domains)."""
+    routed = [detected_domain] if isinstance(detected_domain, str) else list(detected_domain)
+    allowed = set().union(*(DOMAIN_COMPATIBILITY.get(d, {d}) for d in routed))
+
+    with tracing.span("filter_by_domain"):
+        kept = [d for d in docs if d.get("domain") in allowed]
+
+    tracing.incr("docs_before_filter", len(docs))
+    tracing.incr("docs_after_filter", len(kept))
+    return kept
+
+
+def fallback_answer(query, docs):
+    """Local flan-t5 answer (GENERATION.local_fallback), else the top doc."""
+    if GENERATION.local_fallback:
+        from rag.generate import generate_answer as local_generate
+
+        try:
+            packed = pack_context(query, docs, budget=CONTEXT.local_token_budget)
+            answer = local_generate("\n".join(packed.passages), query).strip()
+            if len(answer.split()) >= 4:
+                tracing.incr("local_answers")
+                return answer
+        except Exception:
+            pass
+
+    tracing.incr("fallbacks")
+    return docs[0]["text"]
 
 
 def build_prompt(query, docs):
-    context = "\n".join(f"- {d['text']}" for d in docs[:5])
+    # Most relevant sentences within CONTEXT.prompt_token_budget
+    context = "\n".join(f"- {p}" for p in pack_context(query, docs).passages)
 
     return f"""
 You are a hyperlocal Tamil Nadu city update assistant.
@@ -74,26 +101,130 @@ def clean_answer(answer: str) -> str:
     return " ".join(lines)
 
 
-def generate_answer(query, docs):
-    if not docs:
-        return "No relevant update found."
-
+def ask_gemini(query, docs):
+    """Returns the cleaned Gemini answer, or None if it fails or is too short."""
     prompt = build_prompt(query, docs)
 
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt
-        )
+        with tracing.span("gemini"):
+            response = client.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt
+            )
 
         raw = response.text.strip()
         if len(raw.split()) < 4:
-            return docs[0]["text"]
+            return None
 
         return clean_answer(raw)
 
     except Exception as e:
-        return docs[0]["text"]
+        print("❌ Gemini error:", e)
+        return None
+
+
+def generate_answer(query, docs, query_emb, detected_domain):
+    if not docs:
+        return "No relevant update found."
+
+    tracing.incr("answers")
+
+    # Near-identical questions over the same docs reuse the last answer
+    answer = cached_answer(
+        get_answer_cache(),
+        query_emb,
+        detected_domain,
+        docs,
+        lambda: ask_gemini(query, docs),
+        version=get_store().version,
+    )
+
+    return answer or fallback_answer(query, docs)
+
+
+def answer_verdict(partial, done):
+    # Same "at least 4 words" rule as ask_gemini, decided as soon as possible
+    if done or len(partial.split()) >= 4:
+        return len(partial.split()) >= 4
+    return None
+
+
+def stream_gemini(query, docs):
+    prompt = build_prompt(query, docs)
+
+    with tracing.span("gemini_stream"):
+        for chunk in client.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=prompt
+        ):
+            yield chunk.text or ""
+
+
+def generate_answer_stream(query, docs, query_emb, detected_domain):
+    """
+    Yields answer text deltas, or RESET when the text shown so far must be
+    replaced: by the fallback (Gemini failed mid-stream), or by the cleaned
+    answer once the Gemini stream is complete.
+    """
+    if not docs:
+        yield "No relevant update found."
+        return
+
+    tracing.incr("answers")
+
+    cache = get_answer_cache()
+    key = cache.make_key(detected_domain, docs)
+    version = get_store().version
+
+    answer = cache.get(query_emb, key, version=version) if CACHE.enabled else None
+    if answer is not None:
+        yield answer
+        return
+
+    stream = GuardedStream(
+        stream_gemini(query, docs),
+        answer_verdict,
+        lambda: fallback_answer(query, docs),
+    )
+    yield from stream
+    if stream.fell_back:
+        return
+
+    # Labels are stripped from the finished Gemini text only; report text
+    # from the cache or the fallback keeps its colons ("10:30", "Note: ...")
+    # clean_answer also joins lines; only redraw when it dropped a label
+    answer = clean_answer(stream.text.strip())
+    if answer.split() != stream.text.split():
+        yield RESET
+        yield answer
+
+    if CACHE.enabled:
+        cache.put(query_emb, key, answer, version=version)
+
+
+def show_stream(placeholder, deltas):
+    """Renders deltas into `placeholder` as they arrive; returns the final text."""
+    text = ""
+    for delta in deltas:
+        text = "" if delta is RESET else text + delta
+        placeholder.success(text)
+    return text
+
+
+# ---------------- WARM-UP ---------------- #
+
+@st.cache_resource(show_spinner="Loading models and index...")
+def cold_start_metrics():
+    # Runs once per server process; later reruns reuse the loaded resources.
+    metrics = warm_up(include_generator=GENERATION.local_fallback)
+    start_watcher()
+    return metrics
+
+
+@st.cache_resource
+def get_answer_cache():
+    # Shared by all sessions on this server process
+    return AnswerCache()
 
 
 # ---------------- STREAMLIT UI ---------------- #
@@ -107,28 +238,49 @@ st.set_page_config(
 st.title("🗣️ Tamil–English Code-Switched RAG")
 st.caption("Hyperlocal city updates using AI + RAG")
 
+cold_start = cold_start_metrics()
+
+stream_answer = st.toggle("Stream answer", value=True)
+
 query = st.text_input(
     "Ask about traffic, water, transport, power, weather 👇",
     placeholder="gandhipuram route la traffic irukka?"
 )
 
 if query:
-    with st.spinner("Analyzing reports..."):
+    with st.spinner("Analyzing reports..."), tracing.trace("query", query=query) as query_trace:
+
+        # Encode once; domain detection and retrieval share the embedding.
+        query_emb = encode_query(query)
 
-        detected_domain = detect_domain(query)
+        # Every domain above the routing threshold is searched, best first
+        routed = domain_scores(query_emb).routed()
+        detected_domain = next(iter(routed))
 
         if detected_domain not in VALID_DOMAINS:
             st.warning("No relevant domain detected.")
         else:
-            docs = retrieve(query, k=8)
-            docs = filter_by_domain(docs, detected_domain)
-
-            answer = generate_answer(query, docs)
+            docs = retrieve_routed(query_emb, routed, k=8)
+            docs = filter_by_domain(docs, routed)
 
             st.subheader("📍 Answer")
-            st.success(answer)
+
+            if stream_answer:
+                show_stream(
+                    st.empty(),
+                    generate_answer_stream(query, docs, query_emb, detected_domain),
+                )
+            else:
+                st.success(generate_answer(query, docs, query_emb, detected_domain))
 
             with st.expander("🔍 Debug / Retrieved Context"):
-                st.write(f"**Detected domain:** `{detected_domain}`")
+                st.write("**Detected domains:** " + ", ".join(f"`{d}` ({p:.2f})" for d, p in routed.items()))
+                st.write(f"**Cold start:** `{cold_start['total']:.2f}s`")
+                cache_stats = get_answer_cache().stats()
+                st.write(f"**Answer cache:** `{cache_stats['hits']}` hits / `{cache_stats['misses']}` misses")
+                if query_trace.spans:
+                    st.write("**Stage timings (ms):** " + ", ".join(
+                        f"{s['name']}={s['duration_ms']:.1f}" for s in query_trace.spans
+                    ))
                 for d in docs[:5]:
                     st.write("•", d["text"])